@@ -3,16 +3,204 @@ Stock Analyzer v4.0 - Advanced Scoring System
 Implements sophisticated technical analysis with percentile-based scoring
 """
 
+import os
+import heapq
 import numpy as np
-from typing import Dict, List, Tuple, Optional
+from datetime import date, datetime
+from bisect import bisect_left, insort
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from operator import itemgetter
+from typing import Dict, List, Tuple, Optional, NamedTuple
 import config
+from indicators import (NUMBA_AVAILABLE, ema_loop, ema_multi, rsi_loop, atr_loop, atr_numpy,
+                        bb_percentiles, compute_indicators, percentile_lookup, universe_indicators)
+from keyword_scanner import KeywordScanner
+from log_utils import get_logger
+from score_cache import ScoreCache, score_key, scoring_digest
+
+logger = get_logger('analyzer')
+
+# Storage precision for OHLCV columns; reductions that need it accumulate in float64.
+# These columns feed the scoring kernels only: persisted metrics come from the bar dicts.
+PRICE_DTYPE = np.float32
+
+_get_high = itemgetter('high')
+_get_low = itemgetter('low')
+_get_close = itemgetter('close')
+_get_volume = itemgetter('volume')
+_get_composite = itemgetter('composite_score')
+
+
+def _clip10(x: float) -> float:
+    """Clamp a scalar score to 0-10 without NumPy dispatch"""
+    return 0.0 if x < 0 else (10.0 if x > 10 else x)
+
+
+def _rank(results: List[Dict], top_n: Optional[int]) -> List[Dict]:
+    """Results by composite score, best first; a heap selects just the top_n when given"""
+    if top_n is not None:
+        return heapq.nlargest(top_n, results, key=_get_composite)
+    results.sort(key=_get_composite, reverse=True)
+    return results
+
+
+def _column(hist: List[Dict], getter) -> np.ndarray:
+    """One OHLCV field of a bar list as a PRICE_DTYPE array, without a temporary list"""
+    return np.fromiter(map(getter, hist), dtype=PRICE_DTYPE, count=len(hist))
+
+
+class PriceSeries(NamedTuple):
+    """Column-wise (SoA) view of a stock's OHLCV history, stored as PRICE_DTYPE (scoring only)"""
+    opens: np.ndarray
+    highs: np.ndarray
+    lows: np.ndarray
+    closes: np.ndarray
+    volumes: np.ndarray
+
+
+@dataclass(frozen=True, slots=True)
+class Filters:
+    """ANALYSIS_CONFIG['filters'] as fixed attributes (unknown keys fail at startup)"""
+    min_price: float
+    max_price: float
+    min_avg_volume: float
+    min_data_points: int
+    exclude_sectors: Tuple[str, ...] = ()
+    
+    @classmethod
+    def from_config(cls, filters: Dict) -> 'Filters':
+        return cls(**{**filters, 'exclude_sectors': tuple(filters.get('exclude_sectors', ()))})
+
+
+class IndicatorCache:
+    """
+    Memo for indicator results, scoped to a single analyze_stock call
+    Keys are the function name, the identity of the input arrays and the
+    scalar parameters; inputs are held so their ids stay unique while cached
+    """
+    
+    def __init__(self):
+        self._store = {}
+    
+    def get(self, fn, arrays: Tuple, *params):
+        """Return fn(*arrays, *params), computing it on first request only"""
+        key = (fn.__name__, tuple(id(a) for a in arrays), params)
+        entry = self._store.get(key)
+        if entry is None:
+            entry = (arrays, fn(*arrays, *params))
+            self._store[key] = entry
+        return entry[1]
+    
+    def put(self, value, fn, arrays: Tuple, *params):
+        """Seed the cache with a result computed elsewhere (e.g. a batch kernel)"""
+        self._store[(fn.__name__, tuple(id(a) for a in arrays), params)] = (arrays, value)
+    
+    def clear(self):
+        """Drop every cached result"""
+        self._store.clear()
+
 
 class StockAnalyzer:
     """Advanced stock analysis with multi-dimensional scoring"""
     
-    def __init__(self):
+    # Fixed reference points for the technical percentile conversions
+    PERCENTILE_REFS = {
+        'roc_5': [-10, -5, -2, 0, 2, 5, 10, 20],
+        'roc_20': [-20, -10, -5, 0, 5, 10, 20, 40],
+        'ema_slope': [-2, -1, -0.5, 0, 0.5, 1, 2, 4],
+        'rel_vol': [0.5, 0.7, 0.9, 1.0, 1.2, 1.5, 2.0, 3.0],
+        'hv_cluster': [0, 10, 20, 30, 40, 50, 60, 80],
+        'atr_expansion': [0.8, 0.9, 0.95, 1.0, 1.05, 1.1, 1.2, 1.5],
+        'breakout_prox': [-20, -10, -5, 0, 5, 10, 20, 40],
+        'atr_percent': [1, 2, 3, 4, 5, 6, 8, 12],
+        'relative_roc': [-10, -5, -2, 0, 2, 5, 10, 20],
+    }
+    
+    # Keys of a stock's data dict that the scorers read (the rest is not shipped to workers)
+    INPUT_KEYS = ('symbol', 'historical', 'profile', 'news', 'spy_data', 'sector_data',
+                  'financials', 'short_interest', 'growth_metrics', 'options_analysis')
+    
+    # Scores computed column-wise by analyze_batch_vectorized, and its input columns
+    TABLE_SCORES = ('fundamental_quality_score', 'short_interest_score',
+                    'growth_score', 'options_score')
+    TABLE_COLUMNS = ('has_financials', 'roic', 'fcf_yield', 'debt_to_equity', 'eps_stability',
+                     'has_short', 'days_to_cover', 'short_float', 'short_change',
+                     'has_growth', 'revenue_growth', 'eps_growth', 'cagr',
+                     'has_options', 'has_put_call', 'put_call', 'has_iv', 'atm_iv',
+                     'options_volume', 'net_delta')
+    
+    # Histories whose column arrays are kept between calls (see _series_for)
+    SERIES_MEMO_SIZE = 512
+    
+    # Tickers whose sorted volume windows are kept between calls (see _sorted_volume_window)
+    VOLUME_WINDOWS_SIZE = 512
+    
+    # Below this many stocks a process pool costs more than it saves
+    PARALLEL_MIN_BATCH = 32
+    
+    # Options scoring ladders: points[searchsorted(thresholds, value, side)]
+    # Put/call: strictly below each threshold earns the higher tier
+    _PC_THRESH = np.array([0.7, 0.85, 1.0, 1.2, 1.5])
+    _PC_PTS = np.array([4.0, 3.0, 2.0, 1.5, 1.0, 0.0])
+    # ATM IV %: [15,20) 1, [20,40] 3, (40,50] 2, (50,60] 1, otherwise 0.5
+    _IV_THRESH = np.array([15, 20, np.nextafter(40, np.inf), np.nextafter(50, np.inf),
+                           np.nextafter(60, np.inf)])
+    _IV_PTS = np.array([0.5, 1.0, 3.0, 2.0, 1.0, 0.5])
+    # Total contracts: strictly above each threshold earns the next tier
+    _VOL_THRESH = np.array([100, 1000, 5000, 10000])
+    _VOL_PTS = np.array([0.0, 0.5, 1.0, 1.5, 2.0])
+    # Net delta: strictly above each threshold earns the next tier
+    _DELTA_THRESH = np.array([-100, 0, 100])
+    _DELTA_PTS = np.array([0.0, 0.3, 0.7, 1.0])
+    
+    # EMA periods shared by the momentum and technical scores
+    EMA_PERIODS = (20, 50, 200)
+    
+    # Trailing window for the momentum VWAP
+    VWAP_PERIOD = 20
+    
+    # Component order of each score's weight vector: (config section, weight key, components)
+    WEIGHT_ORDER = {
+        'momentum': ('momentum', 'weights',
+                     ['roc_5', 'roc_20', 'ema_slope', 'vwap_sign', 'trend_align']),
+        'volume': ('volume', 'weights', ['rel_vol', 'spike_percentile', 'hv_cluster']),
+        'technical': ('technical', 'weights',
+                      ['rsi_divergence', 'atr_expansion', 'ma_stack', 'breakout_prox']),
+        'volatility': ('volatility', 'weights', ['atr_percent', 'bb_signal']),
+        'fundamental_quality': ('fundamental_quality', 'metrics',
+                                ['roic', 'fcf_yield', 'debt_to_equity', 'eps_stability']),
+        'short_interest': ('short_interest', 'metrics',
+                           ['days_to_cover', 'short_float', 'short_change']),
+        'growth': ('growth', 'metrics', ['revenue_growth', 'eps_growth', 'cagr_5y']),
+    }
+    
+    def __init__(self, score_cache: bool = True):
+        """score_cache=False never opens the persistent score cache (process-pool workers)"""
         self.config = config.ANALYSIS_CONFIG
         self.weights = self.config['weights']
+        self.filters = Filters.from_config(self.config['filters'])
+        self._refs = self._build_percentile_refs()
+        self._w = self._build_weight_vectors()
+        self._news_scanner = KeywordScanner(self.config['catalyst']['sentiment_keywords'])
+        
+        # SPY / sector ETF stats are identical for every ticker in a run
+        self._benchmark_cache = {}
+        
+        # Per-ticker sorted volume windows:
+        # symbol -> (last bar date, lookback, last volume, oldest volume in window, sorted volumes)
+        self._volume_windows = {}
+        
+        # Column arrays per history list: id(hist) -> (hist, length, last bar, series)
+        self._series_memo = {}
+        
+        # Scores persisted from earlier runs, keyed to this scoring configuration
+        self._score_cache = (ScoreCache() if score_cache and config.SCORE_CACHE_CONFIG['enabled']
+                             else None)
+        self._config_digest = scoring_digest(self.config, self.PERCENTILE_REFS)
+        
+        # Day ordinal that _days_until measures from (refreshed per stock and per batch)
+        self._today_ord = date.today().toordinal()
         
     # ========================================================================
     # MAIN ANALYSIS FUNCTION
@@ -37,16 +225,57 @@ class StockAnalyzer:
         if not self._validate_data(data):
             return None
         
-        # Calculate all scores
-        scores = {}
+        # Reuse scores from an earlier run if none of the inputs changed
+        key = score_key(data, self._config_digest) if self._score_cache is not None else None
+        cached = self._cached_scores(data, key)
+        if cached is not None:
+            return cached
         
-        # Technical scores (70%)
+        self._today_ord = date.today().toordinal()
+        self._prepare(data)
+        try:
+            scores = self._score(data)
+        finally:
+            self._release(data)
+        
+        if key is not None:
+            self._score_cache.put(key, scores)
+        return scores
+    
+    def _prepare(self, data: Dict):
+        """Attach the column arrays, lower-cased news and a primed indicator cache"""
+        # Convert the bar dicts to column arrays and lower-case news once for every scorer
+        data['_series'] = self._series_for(data['historical'])
+        data['_news_lower'] = self._lower_news(data.get('news'))
+        data['_cache'] = IndicatorCache()
+        if NUMBA_AVAILABLE:
+            # One fused pass for every indicator; the scorers then hit the cache
+            series = data['_series']
+            bundle = compute_indicators(series.highs, series.lows, series.closes, series.volumes,
+                                        *self._indicator_params())
+            self._prime_indicators(data['_cache'], series, bundle)
+    
+    def _release(self, data: Dict):
+        """Remove what _prepare attached, leaving the caller's dict as it was passed in"""
+        data.pop('_cache').clear()
+        data.pop('_series', None)
+        data.pop('_news_lower', None)
+    
+    def _technical_scores(self, data: Dict) -> Dict:
+        """The price and news driven scores for prepared data"""
+        scores = {}
         scores['momentum_score'] = self.calculate_momentum_score(data)
         scores['volume_score'] = self.calculate_volume_score(data)
         scores['technical_score'] = self.calculate_technical_score(data)
         scores['volatility_score'] = self.calculate_volatility_score(data)
         scores['relative_strength_score'] = self.calculate_relative_strength_score(data)
         scores['catalyst_score'] = self.calculate_catalyst_score(data)
+        return scores
+    
+    def _score(self, data: Dict) -> Dict:
+        """Run every scorer over prepared data and build the result dict"""
+        # Technical scores (70%)
+        scores = self._technical_scores(data)
         
         # Fundamental scores (20%)
         scores['fundamental_quality_score'] = self.calculate_fundamental_quality_score(data)
@@ -55,7 +284,7 @@ class StockAnalyzer:
         scores['options_score'] = self.calculate_options_score(data)
         
         # Calculate composite score
-        composite = sum(scores[k] * self.weights[k] for k in scores.keys())
+        composite = float(self._composite_w @ np.array([scores[k] for k in self._score_keys]))
         scores['composite_score'] = composite
         
         # Add supporting metrics for reporting
@@ -72,52 +301,47 @@ class StockAnalyzer:
         Momentum = 0.30*ROC(5) + 0.30*ROC(20) + 0.20*EMA_slope + 0.10*VWAP_sign + 0.10*Trend_align
         All converted to 0-100 scale using percentiles
         """
-        hist = data['historical']
-        closes = np.array([d['close'] for d in hist])
-        volumes = np.array([d['volume'] for d in hist])
-        highs = np.array([d['high'] for d in hist])
-        lows = np.array([d['low'] for d in hist])
+        series = self._get_series(data)
+        closes, volumes = series.closes, series.volumes
+        highs, lows = series.highs, series.lows
         
         cfg = self.config['momentum']
         
+        # Trailing ROCs are shared with _extract_metrics
+        stats = self._cached(data, self._window_stats, (data['historical'],))
+        
         # 1. ROC(5) - 5-day rate of change
-        roc5 = (closes[-1] / closes[-6] - 1) * 100 if len(closes) > 5 else 0
-        roc5_pct = self._to_percentile(roc5, [-10, -5, -2, 0, 2, 5, 10, 20])
+        roc5 = stats['roc_5d']
+        roc5_pct = self._to_percentile(roc5, self._refs['roc_5'])
         
         # 2. ROC(20) - 20-day rate of change
-        roc20 = (closes[-1] / closes[-21] - 1) * 100 if len(closes) > 20 else 0
-        roc20_pct = self._to_percentile(roc20, [-20, -10, -5, 0, 5, 10, 20, 40])
+        roc20 = stats['roc_20d']
+        roc20_pct = self._to_percentile(roc20, self._refs['roc_20'])
         
         # 3. EMA(20) slope - trend acceleration
-        ema20 = self._calculate_ema(closes, 20)
+        # EMA200 is not used here but shares the pass; the technical score reuses it
+        ema20, ema50, _ = self._cached(data, self._calculate_emas, (closes,), self.EMA_PERIODS)
         if len(ema20) > cfg['slope_lookback']:
             ema_slope = ((ema20[-1] - ema20[-cfg['slope_lookback']-1]) / closes[-1]) * 100
-            ema_slope_pct = self._to_percentile(ema_slope, [-2, -1, -0.5, 0, 0.5, 1, 2, 4])
+            ema_slope_pct = self._to_percentile(ema_slope, self._refs['ema_slope'])
         else:
             ema_slope_pct = 50
         
         # 4. VWAP deviation sign - price position vs VWAP
-        vwap = self._calculate_vwap(highs, lows, closes, volumes)
+        vwap = self._cached(data, self._calculate_vwap, (highs, lows, closes, volumes))
         vwap_sign = 100 if closes[-1] > vwap else 0
         
         # 5. Trend alignment - EMA hierarchy
         ema20_val = ema20[-1]
-        ema50 = self._calculate_ema(closes, 50)
         ema50_val = ema50[-1] if len(ema50) > 0 else ema20_val
         
         trend_align = 100 if (closes[-1] > ema20_val > ema50_val) else 0
         
         # Combine with weights
-        w = cfg['weights']
-        momentum_score = (
-            w['roc_5'] * roc5_pct +
-            w['roc_20'] * roc20_pct +
-            w['ema_slope'] * ema_slope_pct +
-            w['vwap_sign'] * vwap_sign +
-            w['trend_align'] * trend_align
-        )
+        momentum_score = float(self._w['momentum'] @ np.array(
+            [roc5_pct, roc20_pct, ema_slope_pct, vwap_sign, trend_align]))
         
-        return np.clip(momentum_score / 10, 0, 10)  # Scale to 0-10
+        return _clip10(momentum_score / 10)  # Scale to 0-10
     
     # ========================================================================
     # 2. VOLUME SCORE (15.8%)
@@ -127,8 +351,7 @@ class StockAnalyzer:
         """
         Volume = 0.50*RelVol + 0.30*VolSpike_pct + 0.20*HV_cluster
         """
-        hist = data['historical']
-        volumes = np.array([d['volume'] for d in hist])
+        volumes = self._get_series(data).volumes
         
         cfg = self.config['volume']
         
@@ -136,44 +359,36 @@ class StockAnalyzer:
         if len(volumes) > cfg['rel_vol_period']:
             sma_vol = np.mean(volumes[-cfg['rel_vol_period']-1:-1])
             rel_vol = volumes[-1] / sma_vol if sma_vol > 0 else 1.0
-            rel_vol_pct = self._to_percentile(rel_vol, [0.5, 0.7, 0.9, 1.0, 1.2, 1.5, 2.0, 3.0])
+            rel_vol_pct = self._to_percentile(rel_vol, self._refs['rel_vol'])
         else:
             rel_vol_pct = 50
         
         # 2. Volume Spike Percentile (200-bar history)
         lookback = min(cfg['spike_lookback'], len(volumes))
         if lookback > 20:
-            recent_volumes = volumes[-lookback:]
-            vol_percentile = (np.sum(recent_volumes < volumes[-1]) / len(recent_volumes)) * 100
+            sorted_vols = self._sorted_volume_window(data, volumes, lookback)
+            vol_percentile = (bisect_left(sorted_vols, float(volumes[-1])) / lookback) * 100
         else:
             vol_percentile = 50
         
         # 3. High-Volume Cluster (last 10 bars with RelVol > 1.5)
         if len(volumes) > cfg['cluster_period'] + cfg['rel_vol_period']:
-            cluster_count = 0
-            for i in range(cfg['cluster_period']):
-                idx = -(i+1)
-                period_start = idx - cfg['rel_vol_period']
-                period_vol = volumes[period_start:idx] if period_start > -len(volumes) else volumes[:idx]
-                if len(period_vol) > 0:
-                    avg_vol = np.mean(period_vol)
-                    if volumes[idx] / avg_vol > cfg['cluster_threshold']:
-                        cluster_count += 1
+            # Each of the last cluster_period bars vs the mean of the rel_vol_period bars before it
+            tail = volumes[-(cfg['cluster_period'] + cfg['rel_vol_period']):]
+            prior_means = np.lib.stride_tricks.sliding_window_view(
+                tail[:-1], cfg['rel_vol_period']).mean(axis=1)
+            cluster_count = int(np.sum(tail[cfg['rel_vol_period']:] / prior_means > cfg['cluster_threshold']))
             
             hv_cluster = (cluster_count / cfg['cluster_period']) * 100
-            hv_cluster_pct = self._to_percentile(hv_cluster, [0, 10, 20, 30, 40, 50, 60, 80])
+            hv_cluster_pct = self._to_percentile(hv_cluster, self._refs['hv_cluster'])
         else:
             hv_cluster_pct = 50
         
         # Combine with weights
-        w = cfg['weights']
-        volume_score = (
-            w['rel_vol'] * rel_vol_pct +
-            w['spike_percentile'] * vol_percentile +
-            w['hv_cluster'] * hv_cluster_pct
-        )
+        volume_score = float(self._w['volume'] @ np.array(
+            [rel_vol_pct, vol_percentile, hv_cluster_pct]))
         
-        return np.clip(volume_score / 10, 0, 10)
+        return _clip10(volume_score / 10)
     
     # ========================================================================
     # 3. TECHNICAL SCORE (21.1%)
@@ -183,29 +398,25 @@ class StockAnalyzer:
         """
         Technical = 0.25*RSI_div + 0.25*ATR_exp + 0.25*MA_stack + 0.25*Breakout_prox
         """
-        hist = data['historical']
-        closes = np.array([d['close'] for d in hist])
-        highs = np.array([d['high'] for d in hist])
-        lows = np.array([d['low'] for d in hist])
+        series = self._get_series(data)
+        closes, highs, lows = series.closes, series.highs, series.lows
         
         cfg = self.config['technical']
         
         # 1. RSI Divergence
-        rsi = self._calculate_rsi(closes, cfg['rsi_period'])
+        rsi = self._cached(data, self._calculate_rsi, (closes,), cfg['rsi_period'])
         rsi_div_score = self._detect_rsi_divergence(closes, rsi)
         
         # 2. ATR Expansion
-        atr = self._calculate_atr(highs, lows, closes, cfg['atr_period'])
+        atr = self._cached(data, self._calculate_atr, (highs, lows, closes), cfg['atr_period'])
         if len(atr) > cfg['atr_lookback']:
             atr_expansion = atr[-1] / atr[-cfg['atr_lookback']-1] if atr[-cfg['atr_lookback']-1] > 0 else 1.0
-            atr_exp_pct = self._to_percentile(atr_expansion, [0.8, 0.9, 0.95, 1.0, 1.05, 1.1, 1.2, 1.5])
+            atr_exp_pct = self._to_percentile(atr_expansion, self._refs['atr_expansion'])
         else:
             atr_exp_pct = 50
         
         # 3. MA Stack
-        ema20 = self._calculate_ema(closes, 20)
-        ema50 = self._calculate_ema(closes, 50)
-        ema200 = self._calculate_ema(closes, 200)
+        ema20, ema50, ema200 = self._cached(data, self._calculate_emas, (closes,), self.EMA_PERIODS)
         
         ma_stack = self._calculate_ma_stack(closes[-1], 
                                            ema20[-1] if len(ema20) > 0 else closes[-1],
@@ -214,18 +425,13 @@ class StockAnalyzer:
         
         # 4. Breakout Proximity
         breakout_prox = self._calculate_breakout_proximity(closes, highs, lows, cfg['breakout_period'])
-        breakout_prox_pct = self._to_percentile(breakout_prox, [-20, -10, -5, 0, 5, 10, 20, 40])
+        breakout_prox_pct = self._to_percentile(breakout_prox, self._refs['breakout_prox'])
         
         # Combine with weights
-        w = cfg['weights']
-        technical_score = (
-            w['rsi_divergence'] * rsi_div_score +
-            w['atr_expansion'] * atr_exp_pct +
-            w['ma_stack'] * ma_stack +
-            w['breakout_prox'] * breakout_prox_pct
-        )
+        technical_score = float(self._w['technical'] @ np.array(
+            [rsi_div_score, atr_exp_pct, ma_stack, breakout_prox_pct]))
         
-        return np.clip(technical_score / 10, 0, 10)
+        return _clip10(technical_score / 10)
     
     # ========================================================================
     # 4. VOLATILITY SCORE (10.5%)
@@ -236,45 +442,36 @@ class StockAnalyzer:
         Volatility = 0.60*ATR% + 0.40*BB_signal
         Favors expansion after compression (squeeze setups)
         """
-        hist = data['historical']
-        closes = np.array([d['close'] for d in hist])
-        highs = np.array([d['high'] for d in hist])
-        lows = np.array([d['low'] for d in hist])
+        series = self._get_series(data)
+        closes, highs, lows = series.closes, series.highs, series.lows
         
         cfg = self.config['volatility']
         
         # 1. ATR as percentage of price
-        atr = self._calculate_atr(highs, lows, closes, cfg['atr_period'])
+        atr = self._cached(data, self._calculate_atr, (highs, lows, closes), cfg['atr_period'])
         if len(atr) > 0 and closes[-1] > 0:
             atr_percent = (atr[-1] / closes[-1]) * 100
-            atr_pct = self._to_percentile(atr_percent, [1, 2, 3, 4, 5, 6, 8, 12])
+            atr_pct = self._to_percentile(atr_percent, self._refs['atr_percent'])
         else:
             atr_pct = 50
         
         # 2. Bollinger Band squeeze-to-expansion signal
-        bb_width = self._calculate_bb_width(closes, cfg['bb_period'], cfg['bb_std'])
+        bb_width = self._cached(data, self._calculate_bb_width, (closes,),
+                                cfg['bb_period'], cfg['bb_std'])
         
         if len(bb_width) > cfg['bb_lookback']:
-            # Current BB width percentile
-            bb_pct_today = (np.sum(bb_width[:-1] < bb_width[-1]) / len(bb_width[:-1])) * 100
-            
-            # Historical BB width percentile 10 bars ago
-            bb_pct_prior = (np.sum(bb_width[:-cfg['bb_lookback']-1] < bb_width[-cfg['bb_lookback']-1]) / 
-                           len(bb_width[:-cfg['bb_lookback']-1])) * 100 if len(bb_width) > cfg['bb_lookback']+1 else 50
+            # Current BB width percentile and the same percentile 10 bars ago
+            bb_pct_today, bb_pct_prior = bb_percentiles(bb_width, cfg['bb_lookback'])
             
             # Squeeze-to-expansion signal (rising from low)
-            bb_signal = np.clip((bb_pct_today - bb_pct_prior) * 0.5 + 50, 0, 100)
+            bb_signal = min(100.0, max(0.0, (bb_pct_today - bb_pct_prior) * 0.5 + 50))
         else:
             bb_signal = 50
         
         # Combine with weights
-        w = cfg['weights']
-        volatility_score = (
-            w['atr_percent'] * atr_pct +
-            w['bb_signal'] * bb_signal
-        )
+        volatility_score = float(self._w['volatility'] @ np.array([atr_pct, bb_signal]))
         
-        return np.clip(volatility_score / 10, 0, 10)
+        return _clip10(volatility_score / 10)
     
     # ========================================================================
     # 5. RELATIVE STRENGTH SCORE (15.8%)
@@ -296,37 +493,25 @@ class StockAnalyzer:
             return 5.0  # Neutral score if insufficient data
         
         # Calculate stock ROC
-        stock_closes = np.array([d['close'] for d in hist])
+        stock_closes = self._get_series(data).closes
         stock_roc = (stock_closes[-1] / stock_closes[-period-1] - 1) * 100
         
-        # Calculate SPY ROC
-        spy_closes = np.array([d['close'] for d in spy_hist])
-        spy_roc = (spy_closes[-1] / spy_closes[-period-1] - 1) * 100
+        # SPY ROC and market regime (shared across tickers)
+        spy = self._benchmark_stats(spy_hist)
         
         # Calculate vs SPY
-        vs_spy = stock_roc - spy_roc
-        vs_spy_pct = self._to_percentile(vs_spy, [-10, -5, -2, 0, 2, 5, 10, 20])
+        vs_spy = stock_roc - spy['roc']
+        vs_spy_pct = self._to_percentile(vs_spy, self._refs['relative_roc'])
         
         # Calculate vs Sector (if available)
         if len(sector_hist) >= period:
-            sector_closes = np.array([d['close'] for d in sector_hist])
-            sector_roc = (sector_closes[-1] / sector_closes[-period-1] - 1) * 100
-            vs_sector = stock_roc - sector_roc
-            vs_sector_pct = self._to_percentile(vs_sector, [-10, -5, -2, 0, 2, 5, 10, 20])
+            vs_sector = stock_roc - self._benchmark_stats(sector_hist)['roc']
+            vs_sector_pct = self._to_percentile(vs_sector, self._refs['relative_roc'])
         else:
             vs_sector_pct = vs_spy_pct  # Fallback to vs SPY
         
-        # Detect choppy market (adjust weighting)
-        spy_roc_20d = (spy_closes[-1] / spy_closes[-21] - 1) * 100 if len(spy_closes) > 20 else 0
-        spy_highs = np.array([d['high'] for d in spy_hist])
-        spy_lows = np.array([d['low'] for d in spy_hist])
-        spy_atr = self._calculate_atr(spy_highs, spy_lows, spy_closes, cfg['chop_atr_period'])
-        
-        # Check if market is choppy (low ROC + rising ATR)
-        is_choppy = (abs(spy_roc_20d) < cfg['chop_threshold'] * 100 and 
-                    len(spy_atr) > 10 and spy_atr[-1] > spy_atr[-11])
-        
-        adj = cfg['breadth_adjustment']['choppy'] if is_choppy else cfg['breadth_adjustment']['normal']
+        # Choppy market (adjust weighting)
+        adj = cfg['breadth_adjustment']['choppy'] if spy['is_choppy'] else cfg['breadth_adjustment']['normal']
         
         # Calculate relative strength with adjustment
         w = cfg['weights']
@@ -335,7 +520,7 @@ class StockAnalyzer:
             (1 - adj) * 0.5 * (vs_spy_pct + vs_sector_pct)
         )
         
-        return np.clip(rs_score / 10, 0, 10)
+        return _clip10(rs_score / 10)
     
     # ========================================================================
     # 6. CATALYST SCORE (10.5%)
@@ -345,13 +530,18 @@ class StockAnalyzer:
         """
         Catalyst = News sentiment with earnings window, PR bonuses, and negative flags
         """
-        news = data.get('news', [])
         profile = data.get('profile', {})
         
         cfg = self.config['catalyst']
         
+        # Scan each article once for every keyword bucket
+        texts = data.get('_news_lower')
+        if texts is None:
+            texts = self._lower_news(data.get('news'))
+        matches = self._scan_news(texts)
+        
         # 1. Base news sentiment
-        sentiment_score = self._calculate_news_sentiment(news, cfg)
+        sentiment_score = self._calculate_news_sentiment(matches)
         
         # 2. Earnings window boost
         earnings_date = profile.get('next_earnings_date')
@@ -361,16 +551,16 @@ class StockAnalyzer:
                 sentiment_score = max(sentiment_score, cfg['earnings_boost'])
         
         # 3. Major PR bonus
-        has_major_pr = self._check_major_news(news, cfg['sentiment_keywords']['major_positive'])
+        has_major_pr = self._check_major_news(matches, 'major_positive')
         if has_major_pr:
             sentiment_score = min(sentiment_score + cfg['pr_bonus'], 100)
         
         # 4. Negative flags (cap score)
-        has_negative = self._check_major_news(news, cfg['sentiment_keywords']['major_negative'])
+        has_negative = self._check_major_news(matches, 'major_negative')
         if has_negative:
             sentiment_score = min(sentiment_score, cfg['negative_cap'])
         
-        return np.clip(sentiment_score / 10, 0, 10)
+        return _clip10(sentiment_score / 10)
     
     # ========================================================================
     # 7. FUNDAMENTAL QUALITY SCORE (10%)
@@ -385,36 +575,29 @@ class StockAnalyzer:
         if not financials:
             return 5.0  # Neutral if no data
         
-        cfg = self.config['fundamental_quality']
-        weights = cfg['metrics']
-        
         # 1. ROIC (Return on Invested Capital) - higher is better
         roic = financials.get('roic', 0)
-        roic_pct = self._to_percentile(roic, cfg['roic_percentile_refs'])
+        roic_pct = self._to_percentile(roic, self._refs['roic_percentile_refs'])
         
         # 2. FCF Yield (Free Cash Flow / Market Cap) - higher is better
         fcf_yield = financials.get('fcf_yield', 0)
-        fcf_pct = self._to_percentile(fcf_yield, cfg['fcf_yield_percentile_refs'])
+        fcf_pct = self._to_percentile(fcf_yield, self._refs['fcf_yield_percentile_refs'])
         
         # 3. Debt-to-Equity - lower is better (inverse percentile)
         debt_to_equity = financials.get('debt_to_equity', 1.0)
-        debt_pct = self._to_percentile(debt_to_equity, cfg['debt_to_equity_percentile_refs'])
+        debt_pct = self._to_percentile(debt_to_equity, self._refs['debt_to_equity_percentile_refs'])
         debt_score = 100 - debt_pct  # Inverse (lower debt = higher score)
         
         # 4. EPS Stability (stdev of TTM EPS growth) - lower volatility is better
         eps_stdev = financials.get('eps_stability', 50)
-        eps_stdev_pct = self._to_percentile(eps_stdev, cfg['eps_stdev_percentile_refs'])
+        eps_stdev_pct = self._to_percentile(eps_stdev, self._refs['eps_stdev_percentile_refs'])
         eps_stability_score = 100 - eps_stdev_pct  # Inverse (lower stdev = higher score)
         
         # Combine with weights
-        fund_quality = (
-            weights['roic'] * roic_pct +
-            weights['fcf_yield'] * fcf_pct +
-            weights['debt_to_equity'] * debt_score +
-            weights['eps_stability'] * eps_stability_score
-        )
+        fund_quality = float(self._w['fundamental_quality'] @ np.array(
+            [roic_pct, fcf_pct, debt_score, eps_stability_score]))
         
-        return np.clip(fund_quality / 10, 0, 10)
+        return _clip10(fund_quality / 10)
     
     # ========================================================================
     # 8. SHORT INTEREST SCORE (5%)
@@ -430,32 +613,25 @@ class StockAnalyzer:
         if not short_data:
             return 5.0  # Neutral if no data
         
-        cfg = self.config['short_interest']
-        weights = cfg['metrics']
-        
         # 1. Days to Cover (Short Interest / Avg Daily Volume) - lower is better
         days_to_cover = short_data.get('days_to_cover', 3)
-        dtc_pct = self._to_percentile(days_to_cover, cfg['days_to_cover_percentile_refs'])
+        dtc_pct = self._to_percentile(days_to_cover, self._refs['days_to_cover_percentile_refs'])
         dtc_score = 100 - dtc_pct  # Inverse (lower = less pressure = higher score)
         
         # 2. Short Float % - lower is better (less bearish pressure)
         short_float = short_data.get('short_float_percent', 10)
-        sf_pct = self._to_percentile(short_float, cfg['short_float_percentile_refs'])
+        sf_pct = self._to_percentile(short_float, self._refs['short_float_percentile_refs'])
         sf_score = 100 - sf_pct  # Inverse
         
         # 3. Change in Short Interest (1 month) - decreasing shorts = bullish
         short_change = short_data.get('short_change_1m', 0)
-        sc_pct = self._to_percentile(short_change, cfg['short_change_percentile_refs'])
+        sc_pct = self._to_percentile(short_change, self._refs['short_change_percentile_refs'])
         sc_score = 100 - sc_pct  # Inverse (decreasing shorts = higher score)
         
         # Combine with weights
-        short_score = (
-            weights['days_to_cover'] * dtc_score +
-            weights['short_float'] * sf_score +
-            weights['short_change'] * sc_score
-        )
+        short_score = float(self._w['short_interest'] @ np.array([dtc_score, sf_score, sc_score]))
         
-        return np.clip(short_score / 10, 0, 10)
+        return _clip10(short_score / 10)
     
     # ========================================================================
     # 9. GROWTH SCORE (5%)
@@ -470,29 +646,22 @@ class StockAnalyzer:
         if not growth_data:
             return 5.0  # Neutral if no data
         
-        cfg = self.config['growth']
-        weights = cfg['metrics']
-        
         # 1. Revenue Growth (1 year) - higher is better
         rev_growth = growth_data.get('revenue_growth_1y', 0)
-        rev_pct = self._to_percentile(rev_growth, cfg['revenue_growth_percentile_refs'])
+        rev_pct = self._to_percentile(rev_growth, self._refs['revenue_growth_percentile_refs'])
         
         # 2. EPS Growth (1 year) - higher is better
         eps_growth = growth_data.get('eps_growth_1y', 0)
-        eps_pct = self._to_percentile(eps_growth, cfg['eps_growth_percentile_refs'])
+        eps_pct = self._to_percentile(eps_growth, self._refs['eps_growth_percentile_refs'])
         
         # 3. 5-Year CAGR (if available) - higher is better
         cagr = growth_data.get('cagr_5y', 0)
-        cagr_pct = self._to_percentile(cagr, cfg['cagr_percentile_refs'])
+        cagr_pct = self._to_percentile(cagr, self._refs['cagr_percentile_refs'])
         
         # Combine with weights
-        growth_score = (
-            weights['revenue_growth'] * rev_pct +
-            weights['eps_growth'] * eps_pct +
-            weights['cagr_5y'] * cagr_pct
-        )
+        growth_score = float(self._w['growth'] @ np.array([rev_pct, eps_pct, cagr_pct]))
         
-        return np.clip(growth_score / 10, 0, 10)
+        return _clip10(growth_score / 10)
     
     # ========================================================================
     # TECHNICAL INDICATOR CALCULATIONS
@@ -503,17 +672,13 @@ class StockAnalyzer:
         if len(data) < period:
             return np.array([])
         
-        ema = np.zeros(len(data))
-        multiplier = 2 / (period + 1)
-        
-        # Start with SMA
-        ema[period-1] = np.mean(data[:period])
-        
-        # Calculate EMA
-        for i in range(period, len(data)):
-            ema[i] = (data[i] - ema[i-1]) * multiplier + ema[i-1]
-        
-        return ema[period-1:]
+        return ema_loop(data, period)
+    
+    def _calculate_emas(self, data: np.ndarray, periods: Tuple[int, ...]) -> List[np.ndarray]:
+        """Calculate several EMAs in one pass over the data"""
+        rows = ema_multi(data, np.array(periods, dtype=np.int64))
+        return [rows[k, p-1:] if len(data) >= p else np.array([])
+                for k, p in enumerate(periods)]
     
     def _calculate_rsi(self, closes: np.ndarray, period: int = 14) -> np.ndarray:
         """Calculate Relative Strength Index"""
@@ -521,26 +686,10 @@ class StockAnalyzer:
             return np.array([50])
         
         deltas = np.diff(closes)
-        gains = np.where(deltas > 0, deltas, 0)
-        losses = np.where(deltas < 0, -deltas, 0)
-        
-        avg_gain = np.mean(gains[:period])
-        avg_loss = np.mean(losses[:period])
-        
-        rsi = np.zeros(len(closes))
-        rsi[:period] = 50  # Default value
+        gains = np.where(deltas > 0, deltas, 0.0)
+        losses = np.where(deltas < 0, -deltas, 0.0)
         
-        for i in range(period, len(deltas)):
-            avg_gain = (avg_gain * (period - 1) + gains[i]) / period
-            avg_loss = (avg_loss * (period - 1) + losses[i]) / period
-            
-            if avg_loss == 0:
-                rsi[i+1] = 100
-            else:
-                rs = avg_gain / avg_loss
-                rsi[i+1] = 100 - (100 / (1 + rs))
-        
-        return rsi
+        return rsi_loop(gains, losses, period)
     
     def _calculate_atr(self, highs: np.ndarray, lows: np.ndarray, 
                        closes: np.ndarray, period: int = 14) -> np.ndarray:
@@ -548,24 +697,20 @@ class StockAnalyzer:
         if len(closes) < period + 1:
             return np.array([])
         
-        tr = np.maximum(highs[1:] - lows[1:],
-                       np.maximum(abs(highs[1:] - closes[:-1]),
-                                 abs(lows[1:] - closes[:-1])))
-        
-        atr = np.zeros(len(tr))
-        atr[period-1] = np.mean(tr[:period])
-        
-        for i in range(period, len(tr)):
-            atr[i] = (atr[i-1] * (period - 1) + tr[i]) / period
-        
-        return atr[period-1:]
+        # Without numba the scalar kernel is slow; use the in-place NumPy path
+        if not NUMBA_AVAILABLE:
+            return atr_numpy(highs, lows, closes, period)
+        return atr_loop(highs, lows, closes, period)
     
     def _calculate_vwap(self, highs: np.ndarray, lows: np.ndarray, 
                        closes: np.ndarray, volumes: np.ndarray) -> float:
         """Calculate Volume Weighted Average Price (last 20 days)"""
-        period = min(20, len(closes))
+        period = min(self.VWAP_PERIOD, len(closes))
         typical_price = (highs[-period:] + lows[-period:] + closes[-period:]) / 3
-        vwap = np.sum(typical_price * volumes[-period:]) / np.sum(volumes[-period:])
+        
+        # Price * volume sums lose float32 precision quickly; accumulate in float64
+        pv = np.multiply(typical_price, volumes[-period:], dtype=np.float64)
+        vwap = np.sum(pv) / np.sum(volumes[-period:], dtype=np.float64)
         return vwap
     
     def _calculate_bb_width(self, closes: np.ndarray, period: int = 20, 
@@ -574,17 +719,13 @@ class StockAnalyzer:
         if len(closes) < period:
             return np.array([])
         
-        bb_width = np.zeros(len(closes) - period + 1)
-        
-        for i in range(period - 1, len(closes)):
-            window = closes[i-period+1:i+1]
-            sma = np.mean(window)
-            std = np.std(window)
-            upper = sma + (std * num_std)
-            lower = sma - (std * num_std)
-            bb_width[i-period+1] = ((upper - lower) / sma) * 100 if sma > 0 else 0
+        windows = np.lib.stride_tricks.sliding_window_view(closes, period)
+        sma = windows.mean(axis=1)
+        std = windows.std(axis=1)
         
-        return bb_width
+        # Band width = (upper - lower) / middle = 2 * num_std * std / sma
+        safe_sma = np.where(sma > 0, sma, 1.0)
+        return np.where(sma > 0, (2 * num_std * std / safe_sma) * 100, 0.0)
     
     # ========================================================================
     # PATTERN DETECTION
@@ -629,13 +770,11 @@ class StockAnalyzer:
         100: Bullish stack (price > EMA20 > EMA50 > EMA200)
         0: Bearish stack (reverse)
         50: Mixed
+        Branchless, so it also works element-wise on per-ticker arrays
         """
-        if price > ema20 > ema50 > ema200:
-            return 100
-        elif price < ema20 < ema50 < ema200:
-            return 0
-        else:
-            return 50
+        bull = (price > ema20) & (ema20 > ema50) & (ema50 > ema200)
+        bear = (price < ema20) & (ema20 < ema50) & (ema50 < ema200)
+        return 100.0 * bull + 50.0 * np.logical_not(bull | bear)
     
     def _calculate_breakout_proximity(self, closes: np.ndarray, 
                                      highs: np.ndarray, lows: np.ndarray, 
@@ -670,22 +809,25 @@ class StockAnalyzer:
     # NEWS AND SENTIMENT
     # ========================================================================
     
-    def _calculate_news_sentiment(self, news: List[Dict], cfg: Dict) -> float:
+    def _lower_news(self, news: List[Dict]) -> List[str]:
+        """Lower-cased title + text of each article"""
+        return [(article.get('title', '') + ' ' + article.get('text', '')).lower()
+                for article in news or []]
+    
+    def _scan_news(self, texts: List[str]) -> List[Dict]:
+        """Keyword bucket matches for each lower-cased article text"""
+        return [self._news_scanner.scan(text) for text in texts]
+    
+    def _calculate_news_sentiment(self, matches: List[Dict]) -> float:
         """Calculate news sentiment score (0-100)"""
-        if not news:
+        if not matches:
             return 50  # Neutral
         
-        keywords = cfg['sentiment_keywords']
-        positive_words = keywords['positive']
-        negative_words = keywords['negative']
-        
         sentiment_scores = []
         
-        for article in news:
-            text = (article.get('title', '') + ' ' + article.get('text', '')).lower()
-            
-            pos_count = sum(1 for word in positive_words if word in text)
-            neg_count = sum(1 for word in negative_words if word in text)
+        for found in matches:
+            pos_count = len(found['positive'])
+            neg_count = len(found['negative'])
             
             if pos_count + neg_count == 0:
                 sentiment = 50
@@ -696,18 +838,9 @@ class StockAnalyzer:
         
         return np.mean(sentiment_scores) if sentiment_scores else 50
     
-    def _check_major_news(self, news: List[Dict], keywords: List[str]) -> bool:
-        """Check for major news based on keywords"""
-        if not news:
-            return False
-        
-        for article in news:
-            text = (article.get('title', '') + ' ' + article.get('text', '')).lower()
-            for keyword in keywords:
-                if keyword.lower() in text:
-                    return True
-        
-        return False
+    def _check_major_news(self, matches: List[Dict], bucket: str) -> bool:
+        """Check whether any article matched a keyword in the given bucket"""
+        return any(found[bucket] for found in matches)
     
 
     def calculate_options_score(self, data: Dict) -> float:
@@ -721,122 +854,568 @@ class StockAnalyzer:
         # Put/Call Ratio (4 points)
         put_call = options_data.get('put_call_ratio')
         if put_call is not None:
-            if put_call < 0.7: score += 4.0
-            elif put_call < 0.85: score += 3.0
-            elif put_call < 1.0: score += 2.0
-            elif put_call < 1.2: score += 1.5
-            elif put_call < 1.5: score += 1.0
+            score += self._ladder(self._PC_THRESH, self._PC_PTS, put_call, 'right')
         
         # IV (3 points)
         atm_iv = options_data.get('atm_implied_volatility')
         if atm_iv is not None:
             iv_pct = atm_iv * 100 if atm_iv < 1 else atm_iv
-            if 20 <= iv_pct <= 40: score += 3.0
-            elif 40 < iv_pct <= 50: score += 2.0
-            elif 15 <= iv_pct < 20 or 50 < iv_pct <= 60: score += 1.0
-            else: score += 0.5
+            score += self._ladder(self._IV_THRESH, self._IV_PTS, iv_pct, 'right')
         
         # Volume (2 points)
         total_vol = options_data.get('total_call_volume', 0) + options_data.get('total_put_volume', 0)
-        if total_vol > 10000: score += 2.0
-        elif total_vol > 5000: score += 1.5
-        elif total_vol > 1000: score += 1.0
-        elif total_vol > 100: score += 0.5
+        score += self._ladder(self._VOL_THRESH, self._VOL_PTS, total_vol, 'left')
         
         # Net Delta (1 point)
         net_delta = options_data.get('net_delta', 0)
-        if net_delta > 100: score += 1.0
-        elif net_delta > 0: score += 0.7
-        elif net_delta > -100: score += 0.3
+        score += self._ladder(self._DELTA_THRESH, self._DELTA_PTS, net_delta, 'left')
         
-        return min(score, 10.0)    # ========================================================================
+        return min(score, 10.0)
+    
+    def _ladder(self, thresholds: np.ndarray, points: np.ndarray, value, side: str):
+        """
+        Points for value on a threshold ladder; also takes an array of values
+        NaN scores the lowest rung, as it matched no branch of the old if/elif chains
+        """
+        if np.ndim(value) == 0:
+            if value != value:
+                return points.min()
+            return points[np.searchsorted(thresholds, value, side=side)]
+        return np.where(np.isnan(value), points.min(),
+                        points[np.searchsorted(thresholds, value, side=side)])
+    
+    # ========================================================================
     # UTILITY FUNCTIONS
     # ========================================================================
     
-    def _to_percentile(self, value: float, reference_points: List[float]) -> float:
+    def _build_percentile_refs(self) -> Dict[str, np.ndarray]:
+        """Sorted float64 reference arrays for every percentile conversion"""
+        refs = dict(self.PERCENTILE_REFS)
+        for section in self.config.values():
+            if isinstance(section, dict):
+                refs.update({k: v for k, v in section.items() if k.endswith('_percentile_refs')})
+        return {k: np.sort(np.asarray(v, dtype=np.float64)) for k, v in refs.items()}
+    
+    def _build_weight_vectors(self) -> Dict[str, np.ndarray]:
+        """Flatten the per-score weight dicts into vectors (see WEIGHT_ORDER)"""
+        self._score_keys = list(self.weights.keys())
+        self._composite_w = np.array([self.weights[k] for k in self._score_keys], dtype=np.float64)
+        
+        return {name: np.array([self.config[section][key][c] for c in components], dtype=np.float64)
+                for name, (section, key, components) in self.WEIGHT_ORDER.items()}
+    
+    def _to_percentile(self, value: float, reference_points: np.ndarray) -> float:
         """
         Convert a value to percentile score (0-100) using reference points
-        Reference points should be sorted from low to high
+        Reference points should be a sorted float64 array (see self._refs)
         """
-        reference_points = sorted(reference_points)
+        if not isinstance(reference_points, np.ndarray):
+            reference_points = np.sort(np.asarray(reference_points, dtype=np.float64))
         
-        if value <= reference_points[0]:
-            return 0
-        elif value >= reference_points[-1]:
-            return 100
-        else:
-            # Linear interpolation between reference points
-            for i in range(len(reference_points) - 1):
-                if reference_points[i] <= value <= reference_points[i+1]:
-                    lower = reference_points[i]
-                    upper = reference_points[i+1]
-                    pct_lower = (i / (len(reference_points) - 1)) * 100
-                    pct_upper = ((i + 1) / (len(reference_points) - 1)) * 100
-                    
-                    # Interpolate
-                    ratio = (value - lower) / (upper - lower)
-                    return pct_lower + (pct_upper - pct_lower) * ratio
-        
-        return 50  # Default
+        # Binary search + linear interpolation, JIT-compiled when numba is available
+        return percentile_lookup(float(value), reference_points)
+    
+    def _to_percentiles(self, values: np.ndarray, reference_points: np.ndarray) -> np.ndarray:
+        """Vectorized _to_percentile over an array of values (refs strictly increasing)"""
+        pcts = np.interp(values, reference_points, np.linspace(0.0, 100.0, len(reference_points)))
+        return np.where(np.isnan(values), 50.0, pcts)
+    
+    def _to_soa(self, hist: List[Dict]) -> PriceSeries:
+        """Convert a list of OHLCV bar dicts into contiguous column arrays"""
+        opens = np.fromiter((d.get('open', d['close']) for d in hist),
+                            dtype=PRICE_DTYPE, count=len(hist))
+        return PriceSeries(opens, _column(hist, _get_high), _column(hist, _get_low),
+                           _column(hist, _get_close), _column(hist, _get_volume))
+    
+    def _get_series(self, data: Dict) -> PriceSeries:
+        """Return the SoA series cached by analyze_stock, building it if absent"""
+        series = data.get('_series')
+        if series is None:
+            series = self._series_for(data['historical'])
+        return series
+    
+    def _series_for(self, hist: List[Dict]) -> PriceSeries:
+        """
+        _to_soa memoized per history list, so repeat passes skip the conversion
+        Rebuilt if the list has grown or its last bar has changed since
+        """
+        last = hist[-1]
+        entry = self._series_memo.get(id(hist))
+        if (entry is not None and entry[0] is hist and entry[1] == len(hist)
+                and entry[2] == (last.get('date'), last.get('close'), last.get('volume'))):
+            return entry[3]
+        
+        series = self._to_soa(hist)
+        if len(self._series_memo) >= self.SERIES_MEMO_SIZE:
+            self._series_memo.clear()
+        self._series_memo[id(hist)] = (hist, len(hist),
+                                       (last.get('date'), last.get('close'), last.get('volume')),
+                                       series)
+        return series
+    
+    def _indicator_params(self) -> Tuple:
+        """Config parameters for compute_indicators / universe_indicators, in order"""
+        technical = self.config['technical']
+        volatility = self.config['volatility']
+        return (np.array(self.EMA_PERIODS, dtype=np.int64), technical['rsi_period'],
+                technical['atr_period'], volatility['bb_period'], volatility['bb_std'],
+                self.VWAP_PERIOD)
+    
+    def _prime_indicators(self, cache: IndicatorCache, series: PriceSeries, bundle: Tuple):
+        """Seed a ticker's indicator cache with the outputs of compute_indicators"""
+        emas, rsi, atr, bb_width, vwap = bundle
+        _, rsi_period, atr_period, bb_period, bb_std, _ = self._indicator_params()
+        highs, lows, closes, volumes = series.highs, series.lows, series.closes, series.volumes
+        n = len(closes)
+        
+        cache.put([emas[k, p-1:] if n >= p else np.array([]) for k, p in enumerate(self.EMA_PERIODS)],
+                  self._calculate_emas, (closes,), self.EMA_PERIODS)
+        if n >= rsi_period + 1:
+            cache.put(rsi, self._calculate_rsi, (closes,), rsi_period)
+        if n >= atr_period + 1:
+            cache.put(atr, self._calculate_atr, (highs, lows, closes), atr_period)
+        if n >= bb_period:
+            cache.put(bb_width, self._calculate_bb_width, (closes,), bb_period, bb_std)
+        cache.put(vwap, self._calculate_vwap, (highs, lows, closes, volumes))
+    
+    def _cached(self, data: Dict, fn, arrays: Tuple, *params):
+        """Look fn up in the per-call indicator cache, or just call it outside analyze_stock"""
+        cache = data.get('_cache')
+        if cache is None:
+            return fn(*arrays, *params)
+        return cache.get(fn, arrays, *params)
+    
+    def _benchmark_stats(self, hist: List[Dict]) -> Dict:
+        """
+        ROC and choppiness for a benchmark series (SPY or a sector ETF)
+        Cached by content signature, since every ticker in a run shares them
+        """
+        last = hist[-1]
+        key = (len(hist), hist[0].get('date'), last.get('date'), last['close'])
+        stats = self._benchmark_cache.get(key)
+        if stats is not None:
+            return stats
+        
+        cfg = self.config['relative_strength']
+        period = cfg['comparison_period']
+        series = self._to_soa(hist)
+        closes = series.closes
+        
+        # Detect choppy market (low ROC + rising ATR)
+        roc_20d = (closes[-1] / closes[-21] - 1) * 100 if len(closes) > 20 else 0
+        atr = self._calculate_atr(series.highs, series.lows, closes, cfg['chop_atr_period'])
+        is_choppy = (abs(roc_20d) < cfg['chop_threshold'] * 100 and
+                     len(atr) > 10 and atr[-1] > atr[-11])
+        
+        stats = {
+            'roc': (closes[-1] / closes[-period-1] - 1) * 100,
+            'is_choppy': is_choppy,
+        }
+        
+        if len(self._benchmark_cache) >= 64:
+            self._benchmark_cache.clear()
+        self._benchmark_cache[key] = stats
+        return stats
+    
+    def _cached_scores(self, data: Dict, key: Optional[int]) -> Optional[Dict]:
+        """Scores for key from the persistent cache, with fresh metrics; None on a miss"""
+        if key is None:
+            return None
+        scores = self._score_cache.get(key)
+        if scores is None:
+            return None
+        scores['metrics'] = self._extract_metrics(data)
+        return scores
+    
+    def _sorted_volume_window(self, data: Dict, volumes: np.ndarray, lookback: int) -> List[float]:
+        """
+        The last `lookback` volumes in sorted order, kept per ticker
+        When the history has advanced by one bar since the previous call the
+        window is updated in place (drop the oldest bar, insort the newest).
+        The stored last and oldest volumes must still match the history, so a
+        revised bar (e.g. a refreshed partial day) forces a full re-sort
+        """
+        hist = data['historical']
+        symbol = data.get('symbol')
+        last_date = hist[-1].get('date')
+        last_vol = float(volumes[-1])
+        oldest_vol = float(volumes[-lookback])
+        state = self._volume_windows.get(symbol) if symbol else None
+        
+        if state is not None and state[1] == lookback and last_date is not None:
+            prev_date, _, prev_last, prev_oldest, sorted_vols = state
+            if prev_date == last_date and prev_last == last_vol and prev_oldest == oldest_vol:
+                return sorted_vols
+            if (prev_date == hist[-2].get('date') and len(volumes) > lookback
+                    and prev_last == float(volumes[-2]) and prev_oldest == float(volumes[-lookback-1])):
+                i = bisect_left(sorted_vols, prev_oldest)
+                if i < len(sorted_vols) and sorted_vols[i] == prev_oldest:
+                    del sorted_vols[i]
+                    insort(sorted_vols, last_vol)
+                    self._volume_windows[symbol] = (last_date, lookback, last_vol, oldest_vol, sorted_vols)
+                    return sorted_vols
+        
+        sorted_vols = sorted(volumes[-lookback:].tolist())
+        if symbol:
+            if symbol not in self._volume_windows and len(self._volume_windows) >= self.VOLUME_WINDOWS_SIZE:
+                self._volume_windows.clear()
+            self._volume_windows[symbol] = (last_date, lookback, last_vol, oldest_vol, sorted_vols)
+        return sorted_vols
     
     def _validate_data(self, data: Dict) -> bool:
         """Validate that required data is present"""
         if not data or 'historical' not in data:
             return False
         
-        if len(data['historical']) < self.config['filters']['min_data_points']:
+        if len(data['historical']) < self.filters.min_data_points:
             return False
         
         return True
     
     def _extract_metrics(self, data: Dict) -> Dict:
         """Extract key metrics for reporting"""
-        hist = data['historical']
-        closes = np.array([d['close'] for d in hist])
-        volumes = np.array([d['volume'] for d in hist])
+        return dict(self._cached(data, self._window_stats, (data['historical'],)))
+    
+    def _window_stats(self, hist: List[Dict]) -> Dict:
+        """
+        Trailing price/volume statistics, computed once per ticker and shared by the scorers
+        Read from the bar dicts in float64: the float32 columns are for the kernels only
+        """
+        window = hist[-21:]
+        closes = [float(c) for c in map(_get_close, window)]
+        volumes = [float(v) for v in map(_get_volume, window[-20:])]
+        price = closes[-1]
         
+        # Plain floats: these go straight into SQLite and the reports
         return {
-            'current_price': closes[-1],
-            'daily_change': (closes[-1] / closes[-2] - 1) * 100 if len(closes) > 1 else 0,
+            'current_price': price,
+            'daily_change': (price / closes[-2] - 1) * 100 if len(closes) > 1 else 0,
             'volume': volumes[-1],
-            'avg_volume': np.mean(volumes[-20:]) if len(volumes) >= 20 else np.mean(volumes),
-            'roc_5d': (closes[-1] / closes[-6] - 1) * 100 if len(closes) > 5 else 0,
-            'roc_20d': (closes[-1] / closes[-21] - 1) * 100 if len(closes) > 20 else 0,
+            'avg_volume': sum(volumes) / len(volumes),
+            'roc_5d': (price / closes[-6] - 1) * 100 if len(closes) > 5 else 0,
+            'roc_20d': (price / closes[-21] - 1) * 100 if len(closes) > 20 else 0,
         }
     
     def _days_until(self, date_str: str) -> int:
-        """Calculate days until a date (simplified)"""
-        from datetime import datetime
+        """Calculate days until a YYYY-MM-DD date (simplified)"""
         try:
-            target = datetime.strptime(date_str, '%Y-%m-%d')
-            today = datetime.now()
-            return (target - today).days
-        except:
-            return 999  # Far future if can't parse
+            target = date(int(date_str[:4]), int(date_str[5:7]), int(date_str[8:10])).toordinal()
+        except (TypeError, ValueError):
+            # Slicing assumes zero padding; strptime also takes dates like 2025-3-7
+            try:
+                target = datetime.strptime(date_str, '%Y-%m-%d').toordinal()
+            except (TypeError, ValueError):
+                return 999  # Far future if can't parse
+        # Matches the old (midnight target - now).days, which floors to one day less
+        return target - self._today_ord - 1
     
     # ========================================================================
     # BATCH ANALYSIS
     # ========================================================================
     
-    def analyze_batch(self, stocks_data: List[Dict]) -> List[Dict]:
-        """Analyze multiple stocks and return sorted results"""
+    def analyze_batch(self, stocks_data: List[Dict], max_workers: Optional[int] = None,
+                      top_n: Optional[int] = None) -> List[Dict]:
+        """
+        Analyze multiple stocks and return sorted results (only the best top_n if given)
+        Large batches are spread over a process pool (max_workers=1 forces serial)
+        """
+        if max_workers == 1 or len(stocks_data) < self.PARALLEL_MIN_BATCH:
+            outcomes = [self._try_analyze(stock_data) for stock_data in stocks_data]
+        else:
+            outcomes = self._analyze_in_pool(stocks_data, max_workers)
+        
         results = []
+        for stock_data, (scores, error) in zip(stocks_data, outcomes):
+            if error is not None:
+                logger.error("Error analyzing %s: %s", stock_data.get('symbol', 'unknown'), error)
+                continue
+            if scores:
+                scores['symbol'] = stock_data.get('symbol', 'N/A')
+                scores['company'] = stock_data.get('profile', {}).get('companyName', 'N/A')
+                results.append(scores)
+        
+        # Sort by composite score
+        return _rank(results, top_n)
+    
+    def _analyze_in_pool(self, stocks_data: List[Dict],
+                         max_workers: Optional[int]) -> List[Tuple[Optional[Dict], Optional[str]]]:
+        """
+        (scores, error) per stock, scoring cache misses on a process pool
+        The score cache is read and written only here: workers run without one,
+        so concurrent processes never append to or compact the same file
+        """
+        outcomes, keys, misses = [], [], []
+        for i, stock_data in enumerate(stocks_data):
+            key = (score_key(stock_data, self._config_digest)
+                   if self._score_cache is not None and self._validate_data(stock_data) else None)
+            cached = self._cached_scores(stock_data, key)
+            outcomes.append((cached, None) if cached is not None else None)
+            keys.append(key)
+            if cached is None:
+                misses.append(i)
+        if not misses:
+            return outcomes
+        
+        # Ship only the keys the scorers read to keep pickling cheap
+        payloads = [{k: stocks_data[i][k] for k in self.INPUT_KEYS if k in stocks_data[i]}
+                    for i in misses]
+        with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count()) as executor:
+            for i, outcome in zip(misses, executor.map(_analyze_one, payloads, chunksize=8)):
+                outcomes[i] = outcome
+                if outcome[0] and keys[i] is not None:
+                    self._score_cache.put(keys[i], outcome[0])
+        return outcomes
+    
+    def _try_analyze(self, stock_data: Dict) -> Tuple[Optional[Dict], Optional[str]]:
+        """analyze_stock, returning (scores, error message) instead of raising"""
+        try:
+            return self.analyze_stock(stock_data), None
+        except Exception as e:
+            return None, str(e)
+    
+    def analyze_batch_vectorized(self, stocks_data: List[Dict],
+                                 top_n: Optional[int] = None) -> List[Dict]:
+        """
+        Analyze multiple stocks, scoring the table-driven components in bulk
+        
+        The price and news scorers still run per stock. The fundamental, short
+        interest, growth and options scores and the composite are computed as
+        column operations over the whole batch (percentiles via np.interp,
+        ladders via searchsorted). Returns the same results as analyze_batch.
+        """
+        self._today_ord = date.today().toordinal()
         
+        results, pending, rows = [], [], []
         for stock_data in stocks_data:
+            if not self._validate_data(stock_data):
+                continue
             try:
-                scores = self.analyze_stock(stock_data)
-                if scores:
-                    scores['symbol'] = stock_data.get('symbol', 'N/A')
-                    scores['company'] = stock_data.get('profile', {}).get('companyName', 'N/A')
-                    results.append(scores)
+                key = score_key(stock_data, self._config_digest) if self._score_cache is not None else None
+                cached = self._cached_scores(stock_data, key)
+                if cached is not None:
+                    results.append(self._label(cached, stock_data))
+                    continue
+                
+                self._prepare(stock_data)
+                try:
+                    scores = self._technical_scores(stock_data)
+                    scores['metrics'] = self._extract_metrics(stock_data)
+                finally:
+                    self._release(stock_data)
+                rows.append(self._table_inputs(stock_data))
             except Exception as e:
-                print(f"Error analyzing {stock_data.get('symbol', 'unknown')}: {e}")
+                logger.error("Error analyzing %s: %s", stock_data.get('symbol', 'unknown'), e)
                 continue
+            pending.append((stock_data, key, scores))
+        
+        if pending:
+            table = self._table_scores(np.array(rows, dtype=np.float64))
+            matrix = np.column_stack([table[k] if k in table else [p[2][k] for p in pending]
+                                      for k in self._score_keys])
+            table['composite_score'] = matrix @ self._composite_w
+            table = {k: v.tolist() for k, v in table.items()}
+            
+            for i, (stock_data, key, technical) in enumerate(pending):
+                scores = {k: v for k, v in technical.items() if k != 'metrics'}
+                for k in self.TABLE_SCORES:
+                    scores[k] = table[k][i]
+                scores['composite_score'] = table['composite_score'][i]
+                scores['metrics'] = technical['metrics']
+                if key is not None:
+                    self._score_cache.put(key, scores)
+                results.append(self._label(scores, stock_data))
+        
+        return _rank(results, top_n)
+    
+    def _label(self, scores: Dict, stock_data: Dict) -> Dict:
+        """Add the symbol and company name to a result dict"""
+        scores['symbol'] = stock_data.get('symbol', 'N/A')
+        scores['company'] = stock_data.get('profile', {}).get('companyName', 'N/A')
+        return scores
+    
+    def _table_inputs(self, data: Dict) -> Tuple[float, ...]:
+        """
+        One row of raw inputs for _table_scores (see TABLE_COLUMNS)
+        Missing sections get a 0 flag; absent put/call or IV values get a 0 flag too
+        """
+        financials = data.get('financials', {})
+        short_data = data.get('short_interest', {})
+        growth_data = data.get('growth_metrics', {})
+        options_data = data.get('options_analysis') or {}
         
-        # Sort by composite score
-        results.sort(key=lambda x: x['composite_score'], reverse=True)
+        put_call = options_data.get('put_call_ratio')
+        atm_iv = options_data.get('atm_implied_volatility')
+        total_vol = options_data.get('total_call_volume', 0) + options_data.get('total_put_volume', 0)
+        
+        row = (
+            bool(financials),
+            financials.get('roic', 0) if financials else 0,
+            financials.get('fcf_yield', 0) if financials else 0,
+            financials.get('debt_to_equity', 1.0) if financials else 0,
+            financials.get('eps_stability', 50) if financials else 0,
+            bool(short_data),
+            short_data.get('days_to_cover', 3) if short_data else 0,
+            short_data.get('short_float_percent', 10) if short_data else 0,
+            short_data.get('short_change_1m', 0) if short_data else 0,
+            bool(growth_data),
+            growth_data.get('revenue_growth_1y', 0) if growth_data else 0,
+            growth_data.get('eps_growth_1y', 0) if growth_data else 0,
+            growth_data.get('cagr_5y', 0) if growth_data else 0,
+            bool(options_data),
+            put_call is not None,
+            put_call if put_call is not None else 0,
+            atm_iv is not None,
+            atm_iv if atm_iv is not None else 0,
+            total_vol,
+            options_data.get('net_delta', 0),
+        )
+        return tuple(float(v) for v in row)
+    
+    def _table_scores(self, table: np.ndarray) -> Dict[str, np.ndarray]:
+        """Column-wise fundamental, short interest, growth and options scores"""
+        c = dict(zip(self.TABLE_COLUMNS, table.T))
+        refs = self._refs
+        pct = self._to_percentiles
+        out = {}
+        
+        fund = np.column_stack([
+            pct(c['roic'], refs['roic_percentile_refs']),
+            pct(c['fcf_yield'], refs['fcf_yield_percentile_refs']),
+            100 - pct(c['debt_to_equity'], refs['debt_to_equity_percentile_refs']),
+            100 - pct(c['eps_stability'], refs['eps_stdev_percentile_refs']),
+        ]) @ self._w['fundamental_quality']
+        out['fundamental_quality_score'] = np.where(c['has_financials'] > 0,
+                                                    np.clip(fund / 10, 0, 10), 5.0)
+        
+        short = np.column_stack([
+            100 - pct(c['days_to_cover'], refs['days_to_cover_percentile_refs']),
+            100 - pct(c['short_float'], refs['short_float_percentile_refs']),
+            100 - pct(c['short_change'], refs['short_change_percentile_refs']),
+        ]) @ self._w['short_interest']
+        out['short_interest_score'] = np.where(c['has_short'] > 0,
+                                               np.clip(short / 10, 0, 10), 5.0)
+        
+        growth = np.column_stack([
+            pct(c['revenue_growth'], refs['revenue_growth_percentile_refs']),
+            pct(c['eps_growth'], refs['eps_growth_percentile_refs']),
+            pct(c['cagr'], refs['cagr_percentile_refs']),
+        ]) @ self._w['growth']
+        out['growth_score'] = np.where(c['has_growth'] > 0, np.clip(growth / 10, 0, 10), 5.0)
+        
+        atm_iv = c['atm_iv']
+        iv_pct = np.where(atm_iv < 1, atm_iv * 100, atm_iv)
+        options = (
+            np.where(c['has_put_call'] > 0,
+                     self._ladder(self._PC_THRESH, self._PC_PTS, c['put_call'], 'right'), 0.0)
+            + np.where(c['has_iv'] > 0,
+                       self._ladder(self._IV_THRESH, self._IV_PTS, iv_pct, 'right'), 0.0)
+            + self._ladder(self._VOL_THRESH, self._VOL_PTS, c['options_volume'], 'left')
+            + self._ladder(self._DELTA_THRESH, self._DELTA_PTS, c['net_delta'], 'left')
+        )
+        out['options_score'] = np.where(c['has_options'] > 0, np.minimum(options, 10.0), 0.0)
+        
+        return out
+    
+    def _universe_caches(self, stocks: List[Dict]) -> List[Tuple[PriceSeries, IndicatorCache]]:
+        """
+        Column arrays and a primed indicator cache per stock, from one universe_indicators pass
+        OHLCV series are packed into a padded (n_tickers, max_bars) matrix so the fused
+        kernel runs across tickers in a single prange loop
+        """
+        series = [self._series_for(d['historical']) for d in stocks]
+        bar_counts = np.array([len(s.closes) for s in series], dtype=np.int64)
+        highs, lows, closes, volumes = (np.zeros((len(series), bar_counts.max()), dtype=PRICE_DTYPE)
+                                        for _ in range(4))
+        for t, s in enumerate(series):
+            highs[t, :bar_counts[t]] = s.highs
+            lows[t, :bar_counts[t]] = s.lows
+            closes[t, :bar_counts[t]] = s.closes
+            volumes[t, :bar_counts[t]] = s.volumes
+        
+        params = self._indicator_params()
+        _, _, atr_period, bb_period = params[:4]
+        emas, rsis, atrs, bb_widths, vwaps = universe_indicators(highs, lows, closes, volumes,
+                                                                 bar_counts, *params)
+        
+        primed = []
+        for t, s in enumerate(series):
+            n = bar_counts[t]
+            cache = IndicatorCache()
+            self._prime_indicators(cache, s, (emas[t, :, :n], rsis[t, :n],
+                                              atrs[t, :max(n - atr_period, 0)],
+                                              bb_widths[t, :max(n - bb_period + 1, 0)],
+                                              vwaps[t]))
+            primed.append((s, cache))
+        return primed
+    
+    @classmethod
+    def analyze_universe(cls, tickers_data_list: List[Dict], top_n: Optional[int] = None) -> List[Dict]:
+        """
+        Analyze a whole ticker universe with one parallel indicator pass
+        
+        With numba, the fused indicator kernel runs across all tickers at once
+        (see _universe_caches) and its results prime each ticker's indicator
+        cache; without it, each ticker is prepared on its own as in
+        analyze_stock. The remaining scoring (news, profile, fundamentals)
+        stays in Python. Returns sorted results (only the best top_n if given)
+        in the same shape as analyze_batch.
+        """
+        analyzer = cls()
+        results = []
+        valid, keys = [], []
+        for stock_data in tickers_data_list:
+            if not analyzer._validate_data(stock_data):
+                continue
+            key = score_key(stock_data, analyzer._config_digest) if analyzer._score_cache is not None else None
+            cached = analyzer._cached_scores(stock_data, key)
+            if cached is not None:
+                cached['symbol'] = stock_data.get('symbol', 'N/A')
+                cached['company'] = stock_data.get('profile', {}).get('companyName', 'N/A')
+                results.append(cached)
+            else:
+                valid.append(stock_data)
+                keys.append(key)
+        if not valid:
+            return _rank(results, top_n)
+        
+        # Without numba the padded kernel would run as plain Python; use the per-ticker path
+        primed = analyzer._universe_caches(valid) if NUMBA_AVAILABLE else None
+        
+        for t, stock_data in enumerate(valid):
+            if primed is None:
+                analyzer._prepare(stock_data)
+            else:
+                stock_data['_series'], stock_data['_cache'] = primed[t]
+                stock_data['_news_lower'] = analyzer._lower_news(stock_data.get('news'))
+            try:
+                scores = analyzer._score(stock_data)
+                if keys[t] is not None:
+                    analyzer._score_cache.put(keys[t], scores)
+                scores['symbol'] = stock_data.get('symbol', 'N/A')
+                scores['company'] = stock_data.get('profile', {}).get('companyName', 'N/A')
+                results.append(scores)
+            except Exception as e:
+                logger.error("Error analyzing %s: %s", stock_data.get('symbol', 'unknown'), e)
+                continue
+            finally:
+                analyzer._release(stock_data)
         
-        return results
+        return _rank(results, top_n)
+
+# Per-process analyzer for analyze_batch workers, created on first use
+_worker_analyzer = None
+
+
+def _analyze_one(stock_data: Dict) -> Tuple[Optional[Dict], Optional[str]]:
+    """Process-pool entry point: score one stock with this worker's analyzer"""
+    global _worker_analyzer
+    try:
+        if _worker_analyzer is None:
+            # The parent process owns the score cache (see _analyze_in_pool)
+            _worker_analyzer = StockAnalyzer(score_cache=False)
+    except Exception as e:
+        return None, str(e)
+    return _worker_analyzer._try_analyze(stock_data)
 
 # ============================================================================
 # TESTING
@@ -4,15 +4,185 @@ Performs qualitative analysis on top-ranked stocks
 """
 
 import anthropic
+import httpx
 import time
 import re
+import textwrap
+from concurrent.futures import ThreadPoolExecutor
+from tenacity import retry, retry_if_exception, stop_after_attempt, wait_exponential
 from typing import List, Dict, Optional
 import json
+import config
+from llm_cache import ResultCache
+from log_utils import get_logger
+from rate_limiter import TokenBucket
+
+# orjson parses 2-5x faster; its JSONDecodeError subclasses json.JSONDecodeError
+try:
+    from orjson import loads as _loads
+except ImportError:
+    _loads = json.loads
+
+
+logger = get_logger('claude_analyzer')
+
+# HTTP/2 lets the concurrent calls share one connection; httpx needs the h2 package for it
+try:
+    import h2  # noqa: F401
+    _HTTP2 = True
+except ImportError:
+    _HTTP2 = False
+
+# One token budget for every Claude call in the process (the API limit is per account)
+_TOKEN_BUCKET = TokenBucket(config.CLAUDE_RATE_LIMIT['tokens_per_minute'],
+                            config.CLAUDE_RATE_LIMIT['burst_tokens'])
+
+# Shared pool for the independent per-stock API calls (I/O-bound, so threads are enough)
+_EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix='claude')
+
+# JSON in a markdown code block, or the outermost braces of a raw response
+_JSON_FENCED = re.compile(r'```(?:json)?\s*(\{.*?\})\s*```', re.DOTALL)
+_JSON_RAW = re.compile(r'\{.*\}', re.DOTALL)
+
+
+def _is_transient(exc: BaseException) -> bool:
+    """Rate limits, overload (529), 5xx responses and dropped connections are worth retrying"""
+    if isinstance(exc, (anthropic.RateLimitError, anthropic.APIConnectionError)):
+        return True
+    return isinstance(exc, anthropic.APIStatusError) and exc.status_code >= 500
+
+
+# Shared rubric for the per-stock calls. It is identical on every call, so it is
+# sent once as a cached system prompt and each user message only names its task.
+SYSTEM_PROMPT = textwrap.dedent("""\
+    You are a market analyst evaluating a stock for SHORT-TERM trading (< 2 months).
+    Each request gives the stock's context followed by one TASK from the list below.
+    Respond with only the JSON object for that task, in exactly the format shown.
+
+    TASK sentiment - analyze the sentiment of the recent news:
+    1. Overall sentiment score (0-10, where 0=very negative, 5=neutral, 10=very positive)
+    2. Sentiment label (Very Negative, Negative, Neutral, Positive, Very Positive)
+    3. Brief summary (2-3 sentences) of the overall news tone
+    4. Key themes in the news (list 3-5 main topics being discussed)
+    {"score": <0-10>, "label": "<sentiment label>", "summary": "<your summary>",
+     "key_themes": ["theme1", "theme2", "theme3"]}
+
+    TASK catalysts - identify events (positive or negative) that could drive price movement:
+    1. Upcoming catalysts (earnings, product launches, regulatory decisions, etc.)
+    2. Recent catalysts that already occurred
+    3. Potential catalysts on the horizon
+    4. Rate each catalyst's potential impact (High/Medium/Low)
+    5. Expected timeframe for each catalyst
+    {"upcoming_catalysts": [{"event": "<description>", "impact": "<High/Medium/Low>",
+                             "timeframe": "<when>", "type": "<positive/negative>"}],
+     "recent_catalysts": [{"event": "<description>", "impact": "<High/Medium/Low>",
+                           "timing": "<when it happened>"}],
+     "catalyst_score": <0-10, how catalyst-rich is this stock?>,
+     "summary": "<brief overview of catalyst situation>"}
+
+    TASK risks - assess the risks of a short-term trade:
+    1. Key risks (regulatory, competitive, market, operational, etc.)
+    2. Risk level for each (High/Medium/Low)
+    3. Likelihood of each risk materializing (High/Medium/Low)
+    4. Overall risk score for short-term trading
+    5. Any red flags that would make this a "avoid" situation
+    {"risks": [{"risk": "<description>", "severity": "<High/Medium/Low>",
+                "likelihood": "<High/Medium/Low>", "category": "<type>"}],
+     "overall_risk_score": <0-10, where 0=very risky, 10=very safe>,
+     "risk_label": "<Very High/High/Moderate/Low/Very Low>",
+     "red_flags": ["<flag1>", "<flag2>"], "summary": "<brief risk assessment>"}
+
+    TASK thesis - create a concise bull case and bear case for a short-term trade:
+    1. Bull Case: 3-5 key reasons why this could move UP in the short term
+    2. Bear Case: 3-5 key reasons why this could move DOWN in the short term
+    3. Which case is stronger based on current conditions?
+    4. Expected risk/reward ratio
+    5. Ideal entry and exit strategy
+    {"bull_case": ["reason 1", "reason 2", "reason 3"],
+     "bear_case": ["reason 1", "reason 2", "reason 3"],
+     "stronger_case": "<bull/bear/neutral>", "conviction_level": "<High/Medium/Low>",
+     "risk_reward": "<ratio like 1:3>", "entry_strategy": "<suggestion>",
+     "exit_strategy": "<suggestion>", "summary": "<2-3 sentence overall thesis>"}
+
+    TASK recommendation - final trading recommendation, given the analysis summary:
+    1. Clear recommendation: Strong Buy / Buy / Hold / Avoid
+    2. Confidence level: High / Medium / Low
+    3. Suggested position size: Small / Medium / Large
+    4. Key reasons (3-5 bullet points)
+    5. Watch points (what to monitor)
+    6. Exit conditions (when to sell)
+    7. Time horizon for this trade
+    {"recommendation": "<Strong Buy/Buy/Hold/Avoid>", "confidence": "<High/Medium/Low>",
+     "position_size": "<Small/Medium/Large>", "key_reasons": ["reason1", "reason2", "reason3"],
+     "watch_points": ["point1", "point2"], "exit_conditions": ["condition1", "condition2"],
+     "time_horizon": "<days/weeks>", "summary": "<2-3 sentence final recommendation>"}
+    """)
+
+
+class _Fallback(dict):
+    """Default result returned when an API call fails (never cached)"""
+
+
+class _BraceTracker:
+    """Tracks JSON brace depth across streamed chunks, ignoring braces in strings"""
+    
+    def __init__(self):
+        self.depth = 0
+        self.started = False
+        self._in_string = False
+        self._escaped = False
+    
+    def feed(self, chunk: str) -> bool:
+        """Consume a chunk; True once the first top-level object has closed"""
+        for ch in chunk:
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif ch == '\\':
+                    self._escaped = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = self.started
+            elif ch == '{':
+                self.depth += 1
+                self.started = True
+            elif ch == '}' and self.started:
+                self.depth -= 1
+                if self.depth == 0:
+                    return True
+        return False
 
 
 class ClaudeAnalyzer:
     """Deep analysis using Claude API"""
     
+    # Stock context shared by every per-stock prompt, filled by _prepare_stock_context
+    _CONTEXT_TEMPLATE = """
+Stock: {symbol} - {company_name}
+Sector: {sector}
+Price: ${price:.2f}
+Market Cap: ${market_cap:,.0f}
+
+Technical Metrics:
+- Composite Score: {total_score:.2f}/10
+- Momentum Score: {momentum_score:.2f}/10
+- Volume Score: {volume_score:.2f}/10
+- Technical Score: {technical_score:.2f}/10
+- Catalyst Score: {catalyst_score:.2f}/10
+
+Price Performance:
+- Day Change: {day_change_pct:.2f}%
+- Week Change: {week_change_pct:.2f}%
+- Month Change: {month_change_pct:.2f}%
+
+Technical Indicators:
+- RSI (14): {rsi_14:.1f}
+- Volume Ratio: {volume_ratio:.2f}x average
+
+Recent News Headlines:
+"""
+    
     def __init__(self, api_key: str, model: str = "claude-sonnet-4-20250514"):
         """
         Initialize Claude API client
@@ -21,8 +191,62 @@ class ClaudeAnalyzer:
             api_key: Anthropic API key
             model: Claude model to use (default: claude-sonnet-4)
         """
-        self.client = anthropic.Anthropic(api_key=api_key)
+        # One pooled keep-alive client, so calls reuse the TLS session instead of reconnecting
+        http_client = httpx.Client(
+            http2=_HTTP2,
+            limits=httpx.Limits(max_keepalive_connections=32, max_connections=64),
+            timeout=60.0
+        )
+        # Retries are handled by the backoff on _complete, not inside the SDK
+        self.client = anthropic.Anthropic(api_key=api_key, http_client=http_client, max_retries=0)
         self.model = model
+        self.cache = ResultCache() if config.CLAUDE_CACHE_CONFIG['enabled'] else None
+    
+    @retry(retry=retry_if_exception(_is_transient),
+           wait=wait_exponential(multiplier=1, max=30), stop=stop_after_attempt(5), reraise=True)
+    def _complete(self, prompt: str, max_tokens: int, context: Optional[str] = None) -> str:
+        """
+        Stream a single-prompt completion and return its text
+        
+        Stops reading as soon as the first JSON object in the reply closes,
+        so trailing commentary is never generated or waited for. Calls with a
+        stock context get SYSTEM_PROMPT, and both are marked for prompt
+        caching so the per-stock calls can reuse them server-side.
+        
+        Each attempt first takes its estimated tokens (max_tokens plus ~4
+        characters per input token) from the shared token bucket. Rate limits,
+        overloaded/5xx responses and connection errors are retried with
+        exponential backoff (up to 5 attempts) on the calling pool thread.
+        """
+        request = {}
+        input_chars = len(prompt)
+        if context is None:
+            content = prompt
+        else:
+            input_chars += len(SYSTEM_PROMPT) + len(context)
+            request['system'] = [
+                {"type": "text", "text": SYSTEM_PROMPT, "cache_control": {"type": "ephemeral"}},
+            ]
+            content = [
+                {"type": "text", "text": context, "cache_control": {"type": "ephemeral"}},
+                {"type": "text", "text": prompt},
+            ]
+        
+        _TOKEN_BUCKET.acquire(max_tokens + input_chars // 4)
+        
+        parts = []
+        tracker = _BraceTracker()
+        with self.client.messages.stream(
+            model=self.model,
+            max_tokens=max_tokens,
+            messages=[{"role": "user", "content": content}],
+            **request
+        ) as stream:
+            for chunk in stream.text_stream:
+                parts.append(chunk)
+                if tracker.feed(chunk):
+                    break
+        return ''.join(parts)
     
     def _extract_json(self, text: str) -> Dict:
         """
@@ -35,22 +259,22 @@ class ClaudeAnalyzer:
             Parsed JSON dict
         """
         # Try to extract JSON from markdown code blocks
-        json_match = re.search(r'```(?:json)?\s*(\{.*?\})\s*```', text, re.DOTALL)
+        json_match = _JSON_FENCED.search(text)
         if json_match:
             json_str = json_match.group(1)
         else:
             # Try to find raw JSON
-            json_match = re.search(r'\{.*\}', text, re.DOTALL)
+            json_match = _JSON_RAW.search(text)
             if json_match:
                 json_str = json_match.group(0)
             else:
                 json_str = text
         
         try:
-            return json.loads(json_str)
+            return _loads(json_str)
         except json.JSONDecodeError as e:
-            print(f"      JSON parse error: {e}")
-            print(f"      Response preview: {text[:200]}...")
+            logger.warning("      JSON parse error: %s", e)
+            logger.warning("      Response preview: %s...", text[:200])
             return None
         
     def analyze_stock_deep(self, stock_data: Dict, news_articles: List[Dict]) -> Dict:
@@ -64,65 +288,65 @@ class ClaudeAnalyzer:
         Returns:
             Dict with Claude's analysis
         """
-        print(f"  🤖 Claude analyzing {stock_data['symbol']}...")
+        logger.info("  🤖 Claude analyzing %s...", stock_data['symbol'])
         
         # Prepare context for Claude
         context = self._prepare_stock_context(stock_data, news_articles)
         
-        # Get multiple analyses
-        analyses = {}
-        
-        # 1. News Sentiment Analysis
-        analyses['sentiment'] = self._analyze_sentiment(context, news_articles)
+        # The context is exactly what the prompts see, so it keys the cache
+        cache_key = None
+        if self.cache is not None:
+            cache_key = ResultCache.make_key('analyze_stock_deep', self.model, context, bool(news_articles))
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                logger.info("    Using cached analysis for %s", stock_data['symbol'])
+                return cached
         
-        # 2. Catalyst Identification
-        analyses['catalysts'] = self._identify_catalysts(context, news_articles)
+        # Get multiple analyses - the first four are independent, so run them concurrently
+        futures = {
+            # 1. News Sentiment Analysis
+            'sentiment': _EXECUTOR.submit(self._analyze_sentiment, context, news_articles),
+            # 2. Catalyst Identification
+            'catalysts': _EXECUTOR.submit(self._identify_catalysts, context, news_articles),
+            # 3. Risk Assessment
+            'risks': _EXECUTOR.submit(self._assess_risks, context, news_articles),
+            # 4. Bull/Bear Case
+            'thesis': _EXECUTOR.submit(self._generate_thesis, context, stock_data),
+        }
+        analyses = {name: future.result() for name, future in futures.items()}
         
-        # 3. Risk Assessment
-        analyses['risks'] = self._assess_risks(context, news_articles)
-        
-        # 4. Bull/Bear Case
-        analyses['thesis'] = self._generate_thesis(context, stock_data)
-        
-        # 5. Trading Recommendation
+        # 5. Trading Recommendation (depends on the four above)
         analyses['recommendation'] = self._generate_recommendation(context, stock_data, analyses)
         
+        # Only cache complete results; failed calls should be retried next run
+        if cache_key is not None and not any(r is None or isinstance(r, _Fallback)
+                                             for r in analyses.values()):
+            self.cache.set(cache_key, analyses)
+        
         return analyses
     
     def _prepare_stock_context(self, stock_data: Dict, news_articles: List[Dict]) -> str:
         """Prepare stock context for Claude"""
+        context = self._CONTEXT_TEMPLATE.format_map({
+            **stock_data['metrics'],
+            'symbol': stock_data['symbol'],
+            'company_name': stock_data['company_name'],
+            'sector': stock_data['sector'],
+            'price': stock_data['price'],
+            'market_cap': stock_data.get('market_cap', 0),
+            'total_score': stock_data['total_score'],
+            'momentum_score': stock_data['momentum_score'],
+            'volume_score': stock_data['volume_score'],
+            'technical_score': stock_data['technical_score'],
+            'catalyst_score': stock_data['catalyst_score'],
+        })
         
-        context = f"""
-Stock: {stock_data['symbol']} - {stock_data['company_name']}
-Sector: {stock_data['sector']}
-Price: ${stock_data['price']:.2f}
-Market Cap: ${stock_data.get('market_cap', 0):,.0f}
-
-Technical Metrics:
-- Composite Score: {stock_data['total_score']:.2f}/10
-- Momentum Score: {stock_data['momentum_score']:.2f}/10
-- Volume Score: {stock_data['volume_score']:.2f}/10
-- Technical Score: {stock_data['technical_score']:.2f}/10
-- Catalyst Score: {stock_data['catalyst_score']:.2f}/10
-
-Price Performance:
-- Day Change: {stock_data['metrics']['day_change_pct']:.2f}%
-- Week Change: {stock_data['metrics']['week_change_pct']:.2f}%
-- Month Change: {stock_data['metrics']['month_change_pct']:.2f}%
-
-Technical Indicators:
-- RSI (14): {stock_data['metrics']['rsi_14']:.1f}
-- Volume Ratio: {stock_data['metrics']['volume_ratio']:.2f}x average
-
-Recent News Headlines:
-"""
-        
-        for i, article in enumerate(news_articles[:5], 1):
-            context += f"\n{i}. {article.get('title', 'No title')}"
-            if article.get('publishedDate'):
-                context += f" ({article['publishedDate']})"
-        
-        return context
+        headlines = ''.join(
+            f"\n{i}. {article.get('title', 'No title')}"
+            + (f" ({article['publishedDate']})" if article.get('publishedDate') else '')
+            for i, article in enumerate(news_articles[:5], 1)
+        )
+        return context + headlines
     
     def _analyze_sentiment(self, context: str, news_articles: List[Dict]) -> Dict:
         """Analyze news sentiment in depth"""
@@ -135,191 +359,88 @@ Recent News Headlines:
                 'key_themes': []
             }
         
-        prompt = f"""Analyze the sentiment of recent news for this stock.
-
-{context}
-
-Provide a detailed sentiment analysis:
-1. Overall sentiment score (0-10, where 0=very negative, 5=neutral, 10=very positive)
-2. Sentiment label (Very Negative, Negative, Neutral, Positive, Very Positive)
-3. Brief summary (2-3 sentences) of the overall news tone
-4. Key themes in the news (list 3-5 main topics being discussed)
-
-Format your response as JSON:
-{{
-  "score": <0-10>,
-  "label": "<sentiment label>",
-  "summary": "<your summary>",
-  "key_themes": ["theme1", "theme2", "theme3"]
-}}"""
+        prompt = "TASK sentiment"
 
         try:
-            response = self.client.messages.create(
-                model=self.model,
-                max_tokens=1000,
-                messages=[{"role": "user", "content": prompt}]
-            )
+            text = self._complete(prompt, max_tokens=1000, context=context)
             
             # Extract JSON from response (handle markdown code blocks)
-            text = response.content[0].text
             result = self._extract_json(text)
             return result
             
         except Exception as e:
-            print(f"    ⚠ Sentiment analysis error: {e}")
-            return {
+            logger.error("    ⚠ Sentiment analysis error: %s", e)
+            return _Fallback({
                 'score': 5,
                 'label': 'Neutral',
                 'summary': 'Error analyzing sentiment.',
                 'key_themes': []
-            }
+            })
     
     def _identify_catalysts(self, context: str, news_articles: List[Dict]) -> Dict:
         """Identify potential catalysts"""
         
-        prompt = f"""Identify potential catalysts (positive or negative events that could drive price movement) for this stock.
-
-{context}
-
-Analyze and identify:
-1. Upcoming catalysts (earnings, product launches, regulatory decisions, etc.)
-2. Recent catalysts that already occurred
-3. Potential catalysts on the horizon
-4. Rate each catalyst's potential impact (High/Medium/Low)
-5. Expected timeframe for each catalyst
-
-Format as JSON:
-{{
-  "upcoming_catalysts": [
-    {{"event": "<description>", "impact": "<High/Medium/Low>", "timeframe": "<when>", "type": "<positive/negative>"}}
-  ],
-  "recent_catalysts": [
-    {{"event": "<description>", "impact": "<High/Medium/Low>", "timing": "<when it happened>"}}
-  ],
-  "catalyst_score": <0-10, how catalyst-rich is this stock?>,
-  "summary": "<brief overview of catalyst situation>"
-}}"""
+        prompt = "TASK catalysts"
 
         try:
-            response = self.client.messages.create(
-                model=self.model,
-                max_tokens=1500,
-                messages=[{"role": "user", "content": prompt}]
-            )
+            text = self._complete(prompt, max_tokens=1500, context=context)
             
-            result = self._extract_json(response.content[0].text)
+            result = self._extract_json(text)
             if result:
                 return result
             else:
                 raise ValueError("Failed to parse JSON response")
             
         except Exception as e:
-            print(f"    ⚠ Catalyst analysis error: {e}")
-            return {
+            logger.error("    ⚠ Catalyst analysis error: %s", e)
+            return _Fallback({
                 'upcoming_catalysts': [],
                 'recent_catalysts': [],
                 'catalyst_score': 5,
                 'summary': 'Unable to identify catalysts.'
-            }
+            })
     
     def _assess_risks(self, context: str, news_articles: List[Dict]) -> Dict:
         """Assess potential risks"""
         
-        prompt = f"""Assess the risks associated with this stock for short-term trading (< 2 months).
-
-{context}
-
-Identify and analyze:
-1. Key risks (regulatory, competitive, market, operational, etc.)
-2. Risk level for each (High/Medium/Low)
-3. Likelihood of each risk materializing (High/Medium/Low)
-4. Overall risk score for short-term trading
-5. Any red flags that would make this a "avoid" situation
-
-Format as JSON:
-{{
-  "risks": [
-    {{"risk": "<description>", "severity": "<High/Medium/Low>", "likelihood": "<High/Medium/Low>", "category": "<type>"}}
-  ],
-  "overall_risk_score": <0-10, where 0=very risky, 10=very safe>,
-  "risk_label": "<Very High/High/Moderate/Low/Very Low>",
-  "red_flags": ["<flag1>", "<flag2>"],
-  "summary": "<brief risk assessment>"
-}}"""
+        prompt = "TASK risks"
 
         try:
-            response = self.client.messages.create(
-                model=self.model,
-                max_tokens=1500,
-                messages=[{"role": "user", "content": prompt}]
-            )
+            text = self._complete(prompt, max_tokens=1500, context=context)
             
-            result = self._extract_json(response.content[0].text)
+            result = self._extract_json(text)
             if result:
                 return result
             else:
                 raise ValueError("Failed to parse JSON response")
             
         except Exception as e:
-            print(f"    ⚠ Risk analysis error: {e}")
-            return {
+            logger.error("    ⚠ Risk analysis error: %s", e)
+            return _Fallback({
                 'risks': [],
                 'overall_risk_score': 5,
                 'risk_label': 'Unknown',
                 'red_flags': [],
                 'summary': 'Unable to assess risks.'
-            }
+            })
     
     def _generate_thesis(self, context: str, stock_data: Dict) -> Dict:
         """Generate bull and bear thesis"""
         
-        prompt = f"""Create a concise bull case and bear case for this stock as a SHORT-TERM trade (< 2 months).
-
-{context}
-
-Provide:
-1. Bull Case: 3-5 key reasons why this could move UP in the short term
-2. Bear Case: 3-5 key reasons why this could move DOWN in the short term
-3. Which case is stronger based on current conditions?
-4. Expected risk/reward ratio
-5. Ideal entry and exit strategy
-
-Format as JSON:
-{{
-  "bull_case": [
-    "reason 1",
-    "reason 2",
-    "reason 3"
-  ],
-  "bear_case": [
-    "reason 1",
-    "reason 2",
-    "reason 3"
-  ],
-  "stronger_case": "<bull/bear/neutral>",
-  "conviction_level": "<High/Medium/Low>",
-  "risk_reward": "<ratio like 1:3>",
-  "entry_strategy": "<suggestion>",
-  "exit_strategy": "<suggestion>",
-  "summary": "<2-3 sentence overall thesis>"
-}}"""
+        prompt = "TASK thesis"
 
         try:
-            response = self.client.messages.create(
-                model=self.model,
-                max_tokens=2000,
-                messages=[{"role": "user", "content": prompt}]
-            )
+            text = self._complete(prompt, max_tokens=2000, context=context)
             
-            result = self._extract_json(response.content[0].text)
+            result = self._extract_json(text)
             if result:
                 return result
             else:
                 raise ValueError("Failed to parse JSON response")
             
         except Exception as e:
-            print(f"    ⚠ Thesis generation error: {e}")
-            return {
+            logger.error("    ⚠ Thesis generation error: %s", e)
+            return _Fallback({
                 'bull_case': [],
                 'bear_case': [],
                 'stronger_case': 'neutral',
@@ -328,7 +449,7 @@ Format as JSON:
                 'entry_strategy': 'Unable to generate',
                 'exit_strategy': 'Unable to generate',
                 'summary': 'Unable to generate thesis.'
-            }
+            })
     
     def _generate_recommendation(self, context: str, stock_data: Dict, analyses: Dict) -> Dict:
         """Generate final trading recommendation"""
@@ -338,54 +459,27 @@ Format as JSON:
         risks = analyses.get('risks', {})
         thesis = analyses.get('thesis', {})
         
-        prompt = f"""Based on the comprehensive analysis, provide a final trading recommendation for this stock.
-
-{context}
+        prompt = f"""TASK recommendation
 
 Analysis Summary:
 - Sentiment Score: {sentiment.get('score', 5)}/10 ({sentiment.get('label', 'Unknown')})
 - Catalyst Score: {catalysts.get('catalyst_score', 5)}/10
 - Risk Score: {risks.get('overall_risk_score', 5)}/10 ({risks.get('risk_label', 'Unknown')})
 - Stronger Case: {thesis.get('stronger_case', 'unknown')}
-- Conviction: {thesis.get('conviction_level', 'Unknown')}
-
-Provide:
-1. Clear recommendation: Strong Buy / Buy / Hold / Avoid
-2. Confidence level: High / Medium / Low
-3. Suggested position size: Small / Medium / Large
-4. Key reasons (3-5 bullet points)
-5. Watch points (what to monitor)
-6. Exit conditions (when to sell)
-7. Time horizon for this trade
-
-Format as JSON:
-{{
-  "recommendation": "<Strong Buy/Buy/Hold/Avoid>",
-  "confidence": "<High/Medium/Low>",
-  "position_size": "<Small/Medium/Large>",
-  "key_reasons": ["reason1", "reason2", "reason3"],
-  "watch_points": ["point1", "point2"],
-  "exit_conditions": ["condition1", "condition2"],
-  "time_horizon": "<days/weeks>",
-  "summary": "<2-3 sentence final recommendation>"
-}}"""
+- Conviction: {thesis.get('conviction_level', 'Unknown')}"""
 
         try:
-            response = self.client.messages.create(
-                model=self.model,
-                max_tokens=1500,
-                messages=[{"role": "user", "content": prompt}]
-            )
+            text = self._complete(prompt, max_tokens=1500, context=context)
             
-            result = self._extract_json(response.content[0].text)
+            result = self._extract_json(text)
             if result:
                 return result
             else:
                 raise ValueError("Failed to parse JSON response")
             
         except Exception as e:
-            print(f"    ⚠ Recommendation generation error: {e}")
-            return {
+            logger.error("    ⚠ Recommendation generation error: %s", e)
+            return _Fallback({
                 'recommendation': 'Hold',
                 'confidence': 'Low',
                 'position_size': 'Small',
@@ -394,7 +488,7 @@ Format as JSON:
                 'exit_conditions': [],
                 'time_horizon': 'Unknown',
                 'summary': 'Unable to generate recommendation.'
-            }
+            })
     
     def comparative_ranking(self, stocks_data: List[Dict]) -> Dict:
         """
@@ -406,7 +500,7 @@ Format as JSON:
         Returns:
             Re-ranked list with reasoning
         """
-        print(f"\n🤖 Claude performing comparative analysis on {len(stocks_data)} stocks...")
+        logger.info("\n🤖 Claude performing comparative analysis on %d stocks...", len(stocks_data))
         
         # Prepare summary of all stocks
         stocks_summary = []
@@ -459,20 +553,16 @@ Format as JSON:
 }}"""
 
         try:
-            response = self.client.messages.create(
-                model=self.model,
-                max_tokens=3000,
-                messages=[{"role": "user", "content": prompt}]
-            )
+            text = self._complete(prompt, max_tokens=3000)
             
-            result = self._extract_json(response.content[0].text)
+            result = self._extract_json(text)
             if result:
                 return result
             else:
                 raise ValueError("Failed to parse JSON response")
             
         except Exception as e:
-            print(f"  ⚠ Comparative analysis error: {e}")
+            logger.error("  ⚠ Comparative analysis error: %s", e)
             return {
                 'top_5': [],
                 'avoid': [],
@@ -4,168 +4,130 @@ Optimized prompts + Options strategies for short-term trading
 """
 
 import anthropic
+import hashlib
+import httpx
+import threading
 import time
-import re
-from typing import List, Dict, Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from tenacity import retry, retry_if_exception, stop_after_attempt, wait_random_exponential
+from typing import Callable, List, Dict, Optional
 import json
+import config
+from llm_cache import ResultCache
 
+# orjson parses 2-5x faster; its JSONDecodeError subclasses json.JSONDecodeError
+try:
+    from orjson import loads as _loads
+except ImportError:
+    _loads = json.loads
 
-class ClaudeAnalyzer:
-    """Deep analysis using Claude API with optimized prompts and options strategies"""
+# HTTP/2 lets the concurrent calls share one connection; httpx needs the h2 package for it
+try:
+    import h2  # noqa: F401
+    _HTTP2 = True
+except ImportError:
+    _HTTP2 = False
+
+
+# Shared pool for the independent per-stock API calls (I/O-bound, so threads are enough)
+# Sized for several stocks in flight at once via analyze_many
+_EXECUTOR = ThreadPoolExecutor(max_workers=16, thread_name_prefix='claude-enhanced')
+
+
+class _BraceTracker:
+    """Tracks JSON brace depth across streamed chunks, ignoring braces inside strings"""
     
-    def __init__(self, api_key: str, model: str = "claude-opus-4-20250514"):
-        """Initialize Claude API client"""
-        self.client = anthropic.Anthropic(api_key=api_key)
-        self.model = model
+    def __init__(self):
+        self.depth = 0
+        self._in_string = False
+        self._escaped = False
     
-    def _extract_json(self, text: str) -> Dict:
-        """Extract JSON from Claude's response with improved error handling"""
-        # Try to find JSON in code blocks first
-        json_match = re.search(r'```(?:json)?\s*(\{.*?\})\s*```', text, re.DOTALL)
-        if json_match:
-            json_str = json_match.group(1)
-        else:
-            # Try to find raw JSON
-            json_match = re.search(r'\{.*\}', text, re.DOTALL)
-            if json_match:
-                json_str = json_match.group(0)
-            else:
-                json_str = text
-        
-        try:
-            return json.loads(json_str)
-        except json.JSONDecodeError as e:
-            print(f"      ⚠ JSON parse error: {e}")
-            print(f"      Attempted to parse: {json_str[:200]}...")
-            return None
+    def feed(self, chunk: str) -> Optional[int]:
+        """Consume a chunk; returns the offset just past the brace closing the first object, else None"""
+        for i, ch in enumerate(chunk):
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif ch == '\\':
+                    self._escaped = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = self.depth > 0
+            elif ch == '{':
+                self.depth += 1
+            elif ch == '}' and self.depth > 0:
+                self.depth -= 1
+                if self.depth == 0:
+                    return i + 1
+        return None
+
+
+def _is_transient(exc: BaseException) -> bool:
+    """Rate limits, overload (529), 5xx responses and dropped connections are worth retrying"""
+    if isinstance(exc, (anthropic.RateLimitError, anthropic.APIConnectionError)):
+        return True
+    return isinstance(exc, anthropic.APIStatusError) and exc.status_code >= 500
+
+
+class _CircuitBreaker:
+    """
+    Fails calls fast for a cooldown period after repeated transient failures
+    Once the API is clearly down, the remaining calls return their fallbacks
+    immediately instead of each sitting through a full retry schedule
+    """
     
-    def analyze_stock_deep(self, stock_data: Dict, news_articles: List[Dict]) -> Dict:
-        """Perform comprehensive deep analysis including options strategies"""
-        print(f"  🤖 Claude analyzing {stock_data['symbol']}...")
-        
-        context = self._prepare_stock_context(stock_data, news_articles)
-        
-        analyses = {}
-        
-        # Core analyses
-        analyses['sentiment'] = self._analyze_sentiment(context, news_articles)
-        analyses['catalysts'] = self._identify_catalysts(context, news_articles)
-        analyses['risks'] = self._assess_risks(context, news_articles)
-        analyses['thesis'] = self._generate_thesis(context, stock_data)
-        
-        # NEW: Options trade ideas (if options data available)
-        if stock_data.get('options_analysis'):
-            print(f"  📊 Generating options strategies...")
-            analyses['options_strategies'] = self._generate_options_strategies(
-                context, stock_data, analyses
-            )
-        
-        # Final recommendation
-        analyses['recommendation'] = self._generate_recommendation(
-            context, stock_data, analyses
-        )
-        
-        return analyses
+    def __init__(self, threshold: int = 5, cooldown: float = 60.0):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._failures = 0
+        self._open_until = 0.0
+        self._lock = threading.Lock()
     
-    def _prepare_stock_context(self, stock_data: Dict, news_articles: List[Dict]) -> str:
-        """Prepare comprehensive stock context with enhanced formatting"""
-        lines = []
-        
-        # Header
-        lines.append(f"STOCK: {stock_data['symbol']} - {stock_data['company_name']}")
-        lines.append(f"SECTOR: {stock_data['sector']} | PRICE: ${stock_data['price']:.2f} | CAP: ${stock_data.get('market_cap', 0):,.0f}")
-        
-        # Technical Scores
-        lines.append(f"\nSCORES: Total {stock_data['total_score']:.2f}/10 | Momentum {stock_data['momentum_score']:.2f}/10 | Volume {stock_data['volume_score']:.2f}/10")
-        
-        # Performance
-        metrics = stock_data['metrics']
-        lines.append(f"PERFORMANCE: Day {metrics['day_change_pct']:.2f}% | Week {metrics['week_change_pct']:.2f}% | Month {metrics['month_change_pct']:.2f}%")
-        lines.append(f"INDICATORS: RSI {metrics['rsi_14']:.1f} | Volume {metrics['volume_ratio']:.2f}x avg")
-        
-        # Fundamental data
-        if stock_data.get('financial_ratios'):
-            ratios = stock_data['financial_ratios']
-            pe = ratios.get('priceEarningsRatio', 'N/A')
-            roe = ratios.get('returnOnEquity', 'N/A')
-            if isinstance(roe, (int, float)):
-                roe = f"{roe*100:.1f}%"
-            debt_eq = ratios.get('debtEquityRatio', 'N/A')
-            margin = ratios.get('netProfitMargin', 'N/A')
-            if isinstance(margin, (int, float)):
-                margin = f"{margin*100:.1f}%"
-            
-            lines.append(f"\nFUNDAMENTALS: P/E {pe} | ROE {roe} | Debt/Eq {debt_eq} | Margin {margin}")
-        
-        # Short interest
-        if stock_data.get('short_interest_data'):
-            si = stock_data['short_interest_data']
-            short_pct = si.get('shortPercentOfFloat', 'N/A')
-            days_cover = si.get('daysToCover', 'N/A')
-            lines.append(f"SHORT INTEREST: {short_pct}% float | {days_cover} days to cover")
-        
-        # Growth metrics
-        if stock_data.get('growth_metrics'):
-            growth = stock_data['growth_metrics']
-            rev = growth.get('revenueGrowth', 'N/A')
-            eps = growth.get('epsgrowth', 'N/A')
-            if isinstance(rev, (int, float)):
-                rev = f"{rev*100:.1f}%"
-            if isinstance(eps, (int, float)):
-                eps = f"{eps*100:.1f}%"
-            lines.append(f"GROWTH: Revenue {rev} | EPS {eps}")
-        
-        # Options data (ENHANCED)
-        if stock_data.get('options_analysis'):
-            options = stock_data['options_analysis']
-            put_call = options.get('put_call_ratio', 'N/A')
-            iv = options.get('atm_implied_volatility', 'N/A')
-            if iv != 'N/A' and isinstance(iv, (int, float)):
-                iv_pct = f"{float(iv)*100:.1f}%"
-            else:
-                iv_pct = iv
-            
-            total_vol = options.get('total_call_volume', 0) + options.get('total_put_volume', 0)
-            call_vol = options.get('total_call_volume', 0)
-            put_vol = options.get('total_put_volume', 0)
-            net_delta = options.get('net_delta', 'N/A')
-            
-            lines.append(f"\nOPTIONS DATA:")
-            lines.append(f"  P/C Ratio: {put_call} | ATM IV: {iv_pct}")
-            lines.append(f"  Volume: {total_vol:,} total ({call_vol:,} calls, {put_vol:,} puts)")
-            lines.append(f"  Net Delta: {net_delta} | Contracts: {options.get('total_contracts', 0):,}")
-            
-            # Add expirations available
-            if options.get('near_term_expirations'):
-                exps = options['near_term_expirations'][:3]
-                lines.append(f"  Near expirations: {', '.join(exps)}")
-        
-        # Recent news
-        lines.append("\nRECENT NEWS:")
-        for i, article in enumerate(news_articles[:5], 1):
-            title = article.get('title', 'No title')
-            date = article.get('publishedDate', '')
-            lines.append(f"  {i}. {title} ({date})")
-        
-        return '\n'.join(lines)
+    def check(self):
+        """Raise if the breaker is open"""
+        with self._lock:
+            remaining = self._open_until - time.monotonic()
+        if remaining > 0:
+            raise RuntimeError(f"Claude API unavailable, skipping call for {remaining:.0f}s")
     
-    def _analyze_sentiment(self, context: str, news_articles: List[Dict]) -> Dict:
-        """Analyze sentiment with optimized prompt structure"""
-        
-        if not news_articles:
-            return {
-                'score': 5,
-                'label': 'Neutral',
-                'summary': 'No recent news available.',
-                'key_themes': [],
-                'sentiment_momentum': 'stable'
-            }
-        
-        prompt = f"""<task>Analyze news sentiment for SHORT-TERM trading (2-8 week horizon)</task>
-
-<context>
-{context}
-</context>
+    def record(self, success: bool):
+        """Count a finished call, opening the breaker after `threshold` failures in a row"""
+        with self._lock:
+            if success:
+                self._failures = 0
+                return
+            self._failures += 1
+            if self._failures >= self.threshold:
+                self._open_until = time.monotonic() + self.cooldown
+                self._failures = 0
+
+
+def _find_json_span(text: str) -> Optional[slice]:
+    """Slice of the first balanced {...} object in text, ignoring braces inside strings"""
+    start = text.find('{')
+    if start < 0:
+        return None
+    end = _BraceTracker().feed(text[start:])
+    return None if end is None else slice(start, start + end)
+
+
+def _fmt_pct(value) -> str:
+    """Render a ratio like 0.153 as '15.3%', passing non-numeric values through"""
+    if isinstance(value, (int, float)):
+        return f"{value * 100:.1f}%"
+    return 'N/A' if value is None else value
+
+
+# Static rubric for every per-stock task. It is identical on every call, so it is
+# sent once as a cached system prompt and each user message only names its task
+# (plus any task-specific data) after the shared stock context.
+SYSTEM_PROMPT = """You are an expert market analyst and options trader evaluating stocks for SHORT-TERM trading (2-8 week horizon).
+Each request gives a stock's <context> followed by a <task> naming ONE of the tasks below, plus any data that task needs.
+Return ONLY valid JSON for that task (no additional text), in exactly the output format shown.
+
+<task_definition name="sentiment">
+<goal>Analyze news sentiment for SHORT-TERM trading (2-8 week horizon)</goal>
 
 <instructions>
 1. Focus on NEAR-TERM price impact (next 2-8 weeks)
@@ -185,40 +147,19 @@ Sentiment Scale:
 </instructions>
 
 <output_format>
-Return ONLY valid JSON (no additional text):
-{{
+{
   "score": <0-10>,
   "label": "Extremely Positive|Very Positive|Positive|Neutral|Negative|Very Negative|Extremely Negative",
   "summary": "<2-3 concise sentences on narrative, direction, and trading opportunity>",
   "key_themes": ["theme1", "theme2", "theme3"],
   "sentiment_momentum": "accelerating_positive|reversing_positive|stable|weakening|accelerating_negative",
   "priced_in_assessment": "<brief assessment if sentiment is reflected in price>"
-}}
-</output_format>"""
-
-        try:
-            response = self.client.messages.create(
-                model=self.model,
-                max_tokens=1200,
-                temperature=0.3,
-                messages=[{"role": "user", "content": prompt}]
-            )
-            result = self._extract_json(response.content[0].text)
-            if not result:
-                return {'score': 5, 'label': 'Neutral', 'summary': 'Parse error.', 'key_themes': [], 'sentiment_momentum': 'stable'}
-            return result
-        except Exception as e:
-            print(f"    ⚠ Sentiment error: {e}")
-            return {'score': 5, 'label': 'Neutral', 'summary': f'Error: {str(e)}', 'key_themes': [], 'sentiment_momentum': 'stable'}
-    
-    def _identify_catalysts(self, context: str, news_articles: List[Dict]) -> Dict:
-        """Identify catalysts with enhanced specificity"""
-        
-        prompt = f"""<task>Identify actionable catalysts for SHORT-TERM trading (2-8 weeks)</task>
+}
+</output_format>
+</task_definition>
 
-<context>
-{context}
-</context>
+<task_definition name="catalysts">
+<goal>Identify actionable catalysts for SHORT-TERM trading (2-8 weeks)</goal>
 
 <instructions>
 PRIORITY: Binary events with specific dates within 8 weeks
@@ -249,55 +190,34 @@ Catalyst Quality Score (0-10):
 </instructions>
 
 <output_format>
-Return ONLY valid JSON:
-{{
+{
   "upcoming_catalysts": [
-    {{
+    {
       "event": "<specific event with date>",
       "impact": "High|Medium|Low",
       "timeframe": "<exact date or relative timing>",
       "type": "positive|negative|uncertain",
       "surprise_potential": "high|medium|low",
       "probability": "<% if estimable, else omit>"
-    }}
+    }
   ],
   "recent_catalysts": [
-    {{
+    {
       "event": "<what happened>",
       "impact": "<how it affected price>",
       "timing": "<when it occurred>",
       "priced_in": "fully|partially|not_yet"
-    }}
+    }
   ],
   "catalyst_convergence": "<assessment if multiple catalysts align>",
   "catalyst_score": <0-10>,
   "summary": "<2-3 sentences on catalyst setup and timing>"
-}}
-</output_format>"""
-
-        try:
-            response = self.client.messages.create(
-                model=self.model,
-                max_tokens=2000,
-                temperature=0.3,
-                messages=[{"role": "user", "content": prompt}]
-            )
-            result = self._extract_json(response.content[0].text)
-            if not result:
-                return {'upcoming_catalysts': [], 'catalyst_score': 5, 'summary': 'Parse error.'}
-            return result
-        except Exception as e:
-            print(f"    ⚠ Catalyst error: {e}")
-            return {'upcoming_catalysts': [], 'catalyst_score': 5, 'summary': f'Error: {str(e)}'}
-    
-    def _assess_risks(self, context: str, news_articles: List[Dict]) -> Dict:
-        """Assess risks with enhanced red flag detection"""
-        
-        prompt = f"""<task>Assess downside risks for SHORT-TERM trade (2-8 weeks)</task>
+}
+</output_format>
+</task_definition>
 
-<context>
-{context}
-</context>
+<task_definition name="risks">
+<goal>Assess downside risks for SHORT-TERM trade (2-8 weeks)</goal>
 
 <instructions>
 Focus on IMMINENT risks (next 2 months). Prioritize specific, actionable risks.
@@ -329,17 +249,16 @@ Risk Score (0-10):
 </instructions>
 
 <output_format>
-Return ONLY valid JSON:
-{{
+{
   "risks": [
-    {{
+    {
       "risk": "<specific risk>",
       "severity": "High|Medium|Low",
       "likelihood": "High|Medium|Low",
       "timeframe": "<when>",
       "category": "<category>",
       "mitigation": "<mitigating factors>"
-    }}
+    }
   ],
   "red_flags": ["<flag1>", "<flag2>"],
   "overall_risk_score": <0-10>,
@@ -347,110 +266,12 @@ Return ONLY valid JSON:
   "risk_vs_reward": "<assessment of risk/reward balance>",
   "position_size_guidance": "Large|Standard|Small|Avoid",
   "summary": "<2-3 sentences on risk profile>"
-}}
-</output_format>"""
-
-        try:
-            response = self.client.messages.create(
-                model=self.model,
-                max_tokens=2000,
-                temperature=0.3,
-                messages=[{"role": "user", "content": prompt}]
-            )
-            result = self._extract_json(response.content[0].text)
-            if not result:
-                return {'risks': [], 'overall_risk_score': 5, 'risk_label': 'Unknown', 'summary': 'Parse error.'}
-            return result
-        except Exception as e:
-            print(f"    ⚠ Risk error: {e}")
-            return {'risks': [], 'overall_risk_score': 5, 'risk_label': 'Unknown', 'summary': f'Error: {str(e)}'}
-    
-    def _generate_options_strategies(self, context: str, stock_data: Dict, analyses: Dict) -> Dict:
-        """Generate options strategies using PROVEN SHORT-TERM methodology: Debit spreads over naked calls"""
-        
-        options = stock_data.get('options_analysis', {})
-        sentiment = analyses.get('sentiment', {})
-        catalysts = analyses.get('catalysts', {})
-        risks = analyses.get('risks', {})
-        
-        # Calculate key metrics
-        price = stock_data.get('price', 0)
-        put_call = options.get('put_call_ratio', 'N/A')
-        atm_iv = options.get('atm_implied_volatility', 'N/A')
-        if isinstance(atm_iv, (int, float)):
-            iv_pct = atm_iv * 100 if atm_iv < 1 else atm_iv
-        else:
-            iv_pct = 'N/A'
-        
-        total_vol = options.get('total_call_volume', 0) + options.get('total_put_volume', 0)
-        
-        # Interpret the data
-        pc_signal = "NEUTRAL"
-        direction_rec = "NEUTRAL"
-        if isinstance(put_call, (int, float)):
-            if put_call < 0.7:
-                pc_signal = "VERY BULLISH (heavy call buying)"
-                direction_rec = "BULLISH - Recommend debit call spreads"
-            elif put_call < 0.85:
-                pc_signal = "MODERATELY BULLISH"
-                direction_rec = "BULLISH - Recommend debit call spreads"
-            elif put_call < 1.0:
-                pc_signal = "SLIGHTLY BULLISH"
-                direction_rec = "BULLISH - Recommend debit call spreads"
-            elif put_call < 1.2:
-                pc_signal = "NEUTRAL"
-                direction_rec = "NEUTRAL - Consider iron condors or avoid"
-            elif put_call < 1.5:
-                pc_signal = "SLIGHTLY BEARISH"
-                direction_rec = "BEARISH - Recommend debit put spreads"
-            else:
-                pc_signal = "VERY BEARISH (heavy put buying)"
-                direction_rec = "BEARISH - Recommend debit put spreads"
-        else:
-            direction_rec = "UNKNOWN - Default to debit call spreads if bullish thesis"
-        
-        iv_signal = "NORMAL"
-        if isinstance(iv_pct, (int, float)):
-            if iv_pct > 50:
-                iv_signal = "ELEVATED (still ok for spreads)"
-            elif iv_pct >= 20:
-                iv_signal = "NORMAL RANGE (ideal for buying spreads)"
-            else:
-                iv_signal = "LOW (cheap options, good for buying)"
-        
-        liquidity_signal = "LIQUID" if total_vol > 1000 else "LOW" if total_vol < 100 else "MODERATE"
-        
-        # Build enhanced options context
-        options_context = f"""
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-OPTIONS MARKET DATA - {stock_data.get('symbol')} at ${price:.2f}
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-
-PUT/CALL RATIO: {put_call} → {pc_signal}
-→ {direction_rec}
-
-IMPLIED VOLATILITY: {iv_pct}{'%' if isinstance(iv_pct, (int, float)) else ''} → {iv_signal}
-
-OPTIONS VOLUME: {total_vol:,} ({liquidity_signal})
-
-AVAILABLE EXPIRATIONS: {', '.join(options.get('near_term_expirations', [])[:5])}
-
-FUNDAMENTAL CONTEXT:
-- Sentiment: {sentiment.get('score', 5)}/10 ({sentiment.get('label', 'Unknown')})
-- Upcoming Catalysts: {', '.join(catalysts.get('upcoming', ['None'])[:3])}
-- Risk Level: {risks.get('overall_risk_score', 5)}/10
-"""
-        
-        spread_type = "Debit CALL spread" if "BULLISH" in direction_rec else "Debit PUT spread" if "BEARISH" in direction_rec else "Debit CALL spread"
-        width_suggestion = "$5 width" if price > 100 else "$2.50 width" if price > 50 else "$1 width"
-        
-        prompt = f"""You are an expert options trader specializing in SHORT-TERM (2-8 week) strategies.
+}
+</output_format>
+</task_definition>
 
-<context>
-{context}
-
-{options_context}
-</context>
+<task_definition name="options">
+<goal>Generate 3 DEBIT SPREAD strategies from the <options_data> in the request, using the signals, structure, width and expirations it gives</goal>
 
 <trading_methodology>
 **CRITICAL: TIME HORIZON DETERMINES STRATEGY**
@@ -488,27 +309,21 @@ For INTRADAY → Naked calls/puts
    - Naked call needs BIG move to beat theta
    - Spread profits from moderate moves
    - More realistic targets for 2-8 weeks
-
 </trading_methodology>
 
-<task>
-Based on {pc_signal} P/C ratio and {iv_signal} IV:
-
-Generate 3 DEBIT SPREAD strategies for {stock_data.get('symbol')} at ${price:.2f}:
-
+<instructions>
 Strategy #1 - PRIMARY (Highest conviction, standard width):
-- Structure: {spread_type}
+- Structure: the suggested spread structure
 - Strikes: Buy [ATM or slight OTM] / Sell [1-2 strikes higher/lower]
-  * Spread width typically $2.50-$10 depending on stock price
-  * For ${price:.2f}, suggest {width_suggestion}
-- Expiration: 3-6 weeks from {', '.join(options.get('near_term_expirations', [])[:3])}
+  * Spread width typically $2.50-$10 depending on stock price; start from the suggested width
+- Expiration: 3-6 weeks out, from the available expirations
 - Calculate:
   * Net debit (estimate ~40-60% of spread width)
   * Max risk = net debit × 100
   * Max profit = (spread width - net debit) × 100
   * Breakeven = long strike + net debit (for calls)
   * R:R ratio = max profit / max risk
-  * Required move % from ${price:.2f}
+  * Required move % from the current price
 - Rationale: MUST explain why debit spread > naked call for this timeframe
 
 Strategy #2 - AGGRESSIVE (Wider spread or further OTM):
@@ -523,7 +338,7 @@ Strategy #3 - CONSERVATIVE (Tighter spread OR longer dated):
 - Consider LEAPS ONLY if 6+ month conviction
 
 **REQUIRED CALCULATIONS FOR EACH:**
-✓ Exact strikes based on ${price:.2f}
+✓ Exact strikes based on the current price
 ✓ Specific expiration from available dates
 ✓ Spread width in dollars
 ✓ Estimated net debit (be realistic)
@@ -535,25 +350,24 @@ Strategy #3 - CONSERVATIVE (Tighter spread OR longer dated):
 ✓ Estimated win probability
 
 **RATIONALE MUST INCLUDE:**
-- Why P/C of {put_call} supports this direction
-- Why IV of {iv_pct}% makes this a good entry
+- Why the P/C ratio supports this direction
+- Why the IV level makes this a good entry
 - Why debit spread beats naked call for 2-8 weeks
 - Reference the 5 advantages (lower BE, better R:R, theta protection, defined risk, smaller moves)
-</task>
+</instructions>
 
 <output_format>
-Return ONLY valid JSON:
-{{
-  "market_assessment": {{
-    "put_call": "{put_call}",
-    "pc_interpretation": "{pc_signal}",
-    "recommended_direction": "{direction_rec}",
-    "iv_level": "{iv_pct}{'%' if isinstance(iv_pct, (int, float)) else ''}",
-    "iv_interpretation": "{iv_signal}",
+{
+  "market_assessment": {
+    "put_call": "<P/C ratio>",
+    "pc_interpretation": "<P/C signal>",
+    "recommended_direction": "<recommended direction>",
+    "iv_level": "<ATM IV>",
+    "iv_interpretation": "<IV signal>",
     "primary_strategy_type": "Debit Call Spread | Debit Put Spread"
-  }},
+  },
   "strategies": [
-    {{
+    {
       "rank": 1,
       "name": "Primary Bullish/Bearish Debit Spread",
       "strategy_name": "Debit Call Spread",
@@ -570,39 +384,19 @@ Return ONLY valid JSON:
       "required_move": "X.X% from current",
       "win_probability": "XX%",
       "position_size": "X contracts = $XXX total risk",
-      "rationale": "The {put_call} P/C ratio shows {pc_signal}, and {iv_pct}% IV is {iv_signal}. A debit spread is superior to naked call for this 2-8 week timeframe because: (1) Lower breakeven of $XXX vs $XXX for naked call, (2) Theta protection from short call offsetting decay, (3) Only needs X% move vs Y% for naked call, (4) Better R:R for timeframe, (5) Defined risk without stops.",
+      "rationale": "The <P/C ratio> P/C ratio shows <P/C signal>, and <ATM IV> IV is <IV signal>. A debit spread is superior to naked call for this 2-8 week timeframe because: (1) Lower breakeven of $XXX vs $XXX for naked call, (2) Theta protection from short call offsetting decay, (3) Only needs X% move vs Y% for naked call, (4) Better R:R for timeframe, (5) Defined risk without stops.",
       "best_case": "Stock reaches $XXX+ by expiration for max profit of $XXX per contract",
       "risk_factors": ["Max profit capped at $XXX", "Needs move above $XXX within X weeks"],
       "why_not_naked_call": "Naked call would cost $XXX, need $XXX BE, and theta decay would hurt if stock consolidates. Spread is superior for 2-8 weeks."
-    }}
+    }
   ],
-  "summary": "Primary recommendation based on {pc_signal} and {iv_signal}"
-}}
-</output_format>"""
-
-        try:
-            response = self.client.messages.create(
-                model=self.model,
-                max_tokens=3500,
-                temperature=0.3,
-                messages=[{"role": "user", "content": prompt}]
-            )
-            result = self._extract_json(response.content[0].text)
-            if not result:
-                return {'strategies': [], 'summary': 'Parse error.'}
-            return result
-        except Exception as e:
-            print(f"    ⚠ Options strategy error: {e}")
-            return {'strategies': [], 'summary': f'Error: {str(e)}'}
-    
-    def _generate_thesis(self, context: str, stock_data: Dict) -> Dict:
-        """Generate bull/bear thesis with enhanced structure"""
-        
-        prompt = f"""<task>Create actionable bull/bear thesis for 2-8 week trade</task>
+  "summary": "Primary recommendation based on <P/C signal> and <IV signal>"
+}
+</output_format>
+</task_definition>
 
-<context>
-{context}
-</context>
+<task_definition name="thesis">
+<goal>Create actionable bull/bear thesis for 2-8 week trade</goal>
 
 <instructions>
 Focus on SPECIFIC, TIMELY factors for short-term trading.
@@ -635,8 +429,7 @@ Entry Timing Guidance:
 </instructions>
 
 <output_format>
-Return ONLY valid JSON:
-{{
+{
   "bull_case": ["<specific reason 1>", "<specific reason 2>", "..."],
   "bear_case": ["<specific reason 1>", "<specific reason 2>", "..."],
   "stronger_case": "bull|bear|neutral",
@@ -646,51 +439,12 @@ Return ONLY valid JSON:
   "exit_strategy": "<specific exit plan with targets and stops>",
   "time_horizon": "<specific timeframe>",
   "summary": "<2-3 sentences on overall thesis>"
-}}
-</output_format>"""
-
-        try:
-            response = self.client.messages.create(
-                model=self.model,
-                max_tokens=2500,
-                temperature=0.3,
-                messages=[{"role": "user", "content": prompt}]
-            )
-            result = self._extract_json(response.content[0].text)
-            if not result:
-                return {'bull_case': [], 'bear_case': [], 'stronger_case': 'neutral', 'summary': 'Parse error.'}
-            return result
-        except Exception as e:
-            print(f"    ⚠ Thesis error: {e}")
-            return {'bull_case': [], 'bear_case': [], 'stronger_case': 'neutral', 'summary': f'Error: {str(e)}'}
-    
-    def _generate_recommendation(self, context: str, stock_data: Dict, analyses: Dict) -> Dict:
-        """Generate final recommendation with options consideration"""
-        
-        sentiment = analyses.get('sentiment', {})
-        catalysts = analyses.get('catalysts', {})
-        risks = analyses.get('risks', {})
-        thesis = analyses.get('thesis', {})
-        has_options = 'options_strategies' in analyses
-        
-        options_note = ""
-        if has_options:
-            options_note = "\n\nOPTIONS STRATEGIES AVAILABLE - See separate options_strategies section for specific trade ideas."
-        
-        prompt = f"""<task>Make FINAL trading recommendation for 2-8 week trade</task>
+}
+</output_format>
+</task_definition>
 
-<context>
-{context}
-
-ANALYSIS SUMMARY:
-- Sentiment: {sentiment.get('score', 5)}/10 ({sentiment.get('label', 'Unknown')})
-- Sentiment Momentum: {sentiment.get('sentiment_momentum', 'Unknown')}
-- Catalyst Score: {catalysts.get('catalyst_score', 5)}/10
-- Risk Score: {risks.get('overall_risk_score', 5)}/10 ({risks.get('risk_label', 'Unknown')})
-- Stronger Case: {thesis.get('stronger_case', 'unknown')}
-- Conviction: {thesis.get('conviction_level', 'Unknown')}
-- Risk/Reward: {thesis.get('risk_reward_ratio', 'Unknown')}{options_note}
-</context>
+<task_definition name="recommendation">
+<goal>Make FINAL trading recommendation for 2-8 week trade from the <scorecard> and <analysis_summary> in the request (no <context> is sent for this task)</goal>
 
 <instructions>
 Recommendation Criteria:
@@ -722,8 +476,7 @@ Provide:
 </instructions>
 
 <output_format>
-Return ONLY valid JSON:
-{{
+{
   "recommendation": "Strong Buy|Buy|Hold|Avoid",
   "confidence": "High|Medium|Low",
   "position_size": "Large|Medium|Small|None",
@@ -733,55 +486,13 @@ Return ONLY valid JSON:
   "time_horizon": "<specific timeframe>",
   "trading_style": "stocks|options|both",
   "summary": "<1 sentence bottom line>"
-}}
-</output_format>"""
+}
+</output_format>
+</task_definition>"""
 
-        try:
-            response = self.client.messages.create(
-                model=self.model,
-                max_tokens=2000,
-                temperature=0.3,
-                messages=[{"role": "user", "content": prompt}]
-            )
-            result = self._extract_json(response.content[0].text)
-            if not result:
-                return {'recommendation': 'Hold', 'confidence': 'Low', 'summary': 'Parse error.'}
-            return result
-        except Exception as e:
-            print(f"    ⚠ Recommendation error: {e}")
-            return {'recommendation': 'Hold', 'confidence': 'Low', 'summary': f'Error: {str(e)}'}
-    
-    def comparative_ranking(self, stocks_data: List[Dict]) -> Dict:
-        """Re-rank stocks with enhanced criteria"""
-        
-        print(f"\n🤖 Claude performing comparative analysis on {len(stocks_data)} stocks...")
-        
-        stocks_summary = []
-        for i, stock in enumerate(stocks_data, 1):
-            ca = stock.get('claude_analysis', {})
-            opts = stock.get('options_analysis', {})
-            
-            # Build summary line
-            summary = f"{i}. {stock['symbol']} - Quant: {stock['total_score']:.2f}/10"
-            summary += f" | Sent: {ca.get('sentiment', {}).get('score', 0):.1f}/10"
-            summary += f" | Cat: {ca.get('catalysts', {}).get('catalyst_score', 0):.1f}/10"
-            summary += f" | Risk: {ca.get('risks', {}).get('overall_risk_score', 0):.1f}/10"
-            summary += f"\n   Rec: {ca.get('recommendation', {}).get('recommendation', 'Unknown')}"
-            summary += f" ({ca.get('recommendation', {}).get('confidence', 'Unknown')} conf)"
-            summary += f" | {ca.get('thesis', {}).get('stronger_case', 'Unknown')} case"
-            
-            # Add options note if available
-            if opts:
-                summary += f" | P/C: {opts.get('put_call_ratio', 'N/A')}"
-                summary += f" | Options: Yes"
-            
-            stocks_summary.append(summary)
-        
-        prompt = f"""<task>Rank stocks BEST TO WORST for short-term trading (2-8 weeks)</task>
-
-<stocks>
-{''.join(stocks_summary)}
-</stocks>
+# Static rubric for the comparative ranking; the request only carries the stock summaries
+RANKING_SYSTEM_PROMPT = """You rank stocks BEST TO WORST for short-term trading (2-8 weeks).
+Each request lists the candidates in <stocks>. Return ONLY valid JSON (no additional text), in exactly the output format shown.
 
 <instructions>
 Re-rank from BEST to WORST using these criteria:
@@ -822,41 +533,577 @@ MARKET ASSESSMENT:
 </instructions>
 
 <output_format>
-Return ONLY valid JSON:
-{{
+{
   "top_5": [
-    {{
+    {
       "rank": 1,
       "symbol": "<ticker>",
       "reason": "<concise reason>",
       "key_edge": "<specific advantage>",
       "entry_timing": "immediate|wait_for_pullback|wait_for_confirmation",
       "best_vehicle": "stocks|options|both"
-    }}
+    }
   ],
   "avoid": [
-    {{
+    {
       "symbol": "<ticker>",
       "reason": "<why to avoid>"
-    }}
+    }
   ],
   "market_outlook": "<2-3 sentences on overall market conditions>",
   "top_pick_summary": "<1-2 sentences on #1 pick>",
   "portfolio_approach": "<guidance on diversification and position sizing>"
-}}
+}
 </output_format>"""
 
+# The rubric is static, so its digest is computed once; it keys cached results
+# so that editing the rubric invalidates analyses produced under the old one
+_RUBRIC_DIGEST = hashlib.blake2b(SYSTEM_PROMPT.encode('utf-8'), digest_size=8).hexdigest()
+
+
+# Expected fields of each task's result and the value used when one is missing.
+# Parsed results are filled and type-checked against these once, so consumers
+# can rely on every field being present with the right type
+_RESULT_DEFAULTS = {
+    'sentiment': {'score': 5, 'label': 'Neutral', 'summary': '', 'key_themes': [],
+                  'sentiment_momentum': 'stable'},
+    'catalysts': {'upcoming_catalysts': [], 'recent_catalysts': [], 'catalyst_score': 5, 'summary': ''},
+    'risks': {'risks': [], 'red_flags': [], 'overall_risk_score': 5, 'risk_label': 'Unknown', 'summary': ''},
+    'options': {'strategies': [], 'summary': ''},
+    'thesis': {'bull_case': [], 'bear_case': [], 'stronger_case': 'neutral', 'conviction_level': 'Unknown',
+               'risk_reward_ratio': 'Unknown', 'summary': ''},
+    'recommendation': {'recommendation': 'Hold', 'confidence': 'Low', 'summary': ''},
+    'ranking': {'top_5': [], 'avoid': [], 'market_outlook': ''},
+}
+
+
+def _defaults(task: str) -> Dict:
+    """Fresh copy of a task's default result (lists are copied so callers may mutate them)"""
+    return {key: list(value) if isinstance(value, list) else value
+            for key, value in _RESULT_DEFAULTS[task].items()}
+
+
+def _normalize(task: str, result: Dict) -> Dict:
+    """Fill missing fields of a parsed result and coerce mistyped ones (e.g. "7" for a score)"""
+    for key, default in _defaults(task).items():
+        value = result.get(key)
+        if value is None:
+            result[key] = default
+        elif isinstance(default, (int, float)) and not isinstance(value, (int, float)):
+            try:
+                result[key] = float(value)
+            except (TypeError, ValueError):
+                result[key] = default
+        elif isinstance(default, list) and not isinstance(value, list):
+            result[key] = default
+    return result
+
+
+class _Fallback(dict):
+    """Default result returned when an API call fails (never cached)"""
+
+
+class ClaudeAnalyzer:
+    """Deep analysis using Claude API with optimized prompts and options strategies"""
+    
+    # Output ceilings per call; looser ceilings only add tail latency when a response
+    # rambles. Options (three full spreads) and thesis (entry/exit plans) keep their
+    # original budgets, since a truncated answer fails to parse and falls back
+    MAX_TOKENS = {
+        'sentiment': 600,
+        'catalysts': 1400,
+        'risks': 1400,
+        'options': 3500,
+        'thesis': 2500,
+        'recommendation': 1200,
+        'ranking': 3000,
+    }
+    
+    def __init__(self, api_key: str, model: str = "claude-opus-4-20250514",
+                 model_light: str = "claude-3-5-haiku-20241022"):
+        """
+        Initialize Claude API client
+        `model` does the research calls; the cheaper `model_light` handles the
+        recommendation and ranking, which only read already-distilled scores
+        """
+        # One pooled keep-alive client, sized for analyze_many's concurrent calls
+        http_client = httpx.Client(
+            http2=_HTTP2,
+            limits=httpx.Limits(max_keepalive_connections=32, max_connections=64),
+            timeout=60.0
+        )
+        # Retries are handled by the backoff on _call, not inside the SDK
+        self.client = anthropic.Anthropic(api_key=api_key, http_client=http_client, max_retries=0)
+        self._breaker = _CircuitBreaker()
+        self.model = model
+        self.model_light = model_light
+        self.cache = ResultCache() if config.CLAUDE_CACHE_CONFIG['enabled'] else None
+    
+    def _create(self, prompt: str, max_tokens: int, context: Optional[str] = None,
+                model: Optional[str] = None, system: str = SYSTEM_PROMPT) -> str:
+        """
+        Send one prompt to `model` (default self.model) and return the response text
+        The static rubric goes in a cached system prompt and the shared stock
+        context follows as its own cache_control block, so every call for a
+        stock reuses the same cached prefix. The reply is prefilled with "{" so
+        it always starts as a bare JSON object
+        """
+        if context is None:
+            content = prompt
+        else:
+            content = [
+                {"type": "text", "text": f"<context>\n{context}\n</context>",
+                 "cache_control": {"type": "ephemeral"}},
+                {"type": "text", "text": prompt},
+            ]
+        
+        self._breaker.check()
         try:
-            response = self.client.messages.create(
-                model=self.model,
-                max_tokens=4000,
+            text = self._call(
+                model=model or self.model,
+                max_tokens=max_tokens,
                 temperature=0.3,
-                messages=[{"role": "user", "content": prompt}]
+                system=[{"type": "text", "text": system, "cache_control": {"type": "ephemeral"}}],
+                messages=[
+                    {"role": "user", "content": content},
+                    {"role": "assistant", "content": "{"},
+                ]
             )
-            result = self._extract_json(response.content[0].text)
-            if not result:
+        except Exception as e:
+            # Only outages count against the breaker; a bad request is not the API's fault
+            if _is_transient(e):
+                self._breaker.record(success=False)
+            raise
+        self._breaker.record(success=True)
+        return text
+    
+    @retry(retry=retry_if_exception(_is_transient),
+           wait=wait_random_exponential(multiplier=1, max=30), stop=stop_after_attempt(5), reraise=True)
+    def _call(self, **request) -> str:
+        """
+        One streamed messages request, retried with jittered exponential backoff
+        on transient errors. The stream is closed as soon as the prefilled JSON
+        object is complete rather than waiting for any trailing text
+        """
+        # The prefilled brace is not echoed back, so it seeds both the text and the tracker
+        parts = ["{"]
+        tracker = _BraceTracker()
+        tracker.feed("{")
+        with self.client.messages.stream(**request) as stream:
+            for chunk in stream.text_stream:
+                end = tracker.feed(chunk)
+                if end is not None:
+                    parts.append(chunk[:end])
+                    break
+                parts.append(chunk)
+        return ''.join(parts)
+    
+    def _extract_json(self, text: str) -> Dict:
+        """Extract JSON from Claude's response with improved error handling"""
+        # Fast path: the prompts ask for bare JSON, which most responses are
+        json_str = text.strip()
+        if json_str.startswith('{'):
+            try:
+                return _loads(json_str)
+            except json.JSONDecodeError:
+                pass
+        
+        # Otherwise drop a markdown fence and scan for the first complete object
+        fence = json_str.find('```')
+        if fence >= 0:
+            body = json_str.find('\n', fence)
+            close = json_str.find('```', body)
+            if body >= 0 and close >= 0:
+                json_str = json_str[body + 1:close]
+        
+        span = _find_json_span(json_str)
+        if span is not None:
+            json_str = json_str[span]
+        
+        try:
+            return _loads(json_str)
+        except json.JSONDecodeError as e:
+            print(f"      ⚠ JSON parse error: {e}")
+            print(f"      Attempted to parse: {json_str[:200]}...")
+            return None
+    
+    def _parse_result(self, task: str, text: str) -> Dict:
+        """Parse and normalize a task's response, or its default result if it is not a JSON object"""
+        result = self._extract_json(text)
+        if not isinstance(result, dict) or not result:
+            return _Fallback(_defaults(task), summary='Parse error.')
+        return _normalize(task, result)
+    
+    def analyze_stock_deep(self, stock_data: Dict, news_articles: List[Dict]) -> Dict:
+        """Perform comprehensive deep analysis including options strategies"""
+        print(f"  🤖 Claude analyzing {stock_data['symbol']}...")
+        
+        context = self._prepare_stock_context(stock_data, news_articles)
+        
+        # The rubric, context and raw options data are everything the prompts see, so they key the cache
+        cache_key = None
+        if self.cache is not None:
+            cache_key = ResultCache.make_key('analyze_stock_deep_enhanced', _RUBRIC_DIGEST,
+                                             self.model, self.model_light, context, bool(news_articles),
+                                             stock_data.get('options_analysis'))
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                print(f"    ✓ Using cached analysis for {stock_data['symbol']}")
+                return cached
+        
+        # Core analyses - independent of each other, so run them concurrently
+        futures = {
+            'sentiment': _EXECUTOR.submit(self._analyze_sentiment, context, news_articles),
+            'catalysts': _EXECUTOR.submit(self._identify_catalysts, context, news_articles),
+            'risks': _EXECUTOR.submit(self._assess_risks, context, news_articles),
+            'thesis': _EXECUTOR.submit(self._generate_thesis, context, stock_data),
+        }
+        analyses = {name: futures[name].result() for name in ('sentiment', 'catalysts', 'risks')}
+        
+        # NEW: Options trade ideas (if the options market is liquid enough to trade)
+        # Needs sentiment/catalysts/risks; overlaps with the thesis call still in flight
+        if self._options_tradeable(stock_data.get('options_analysis')):
+            print(f"  📊 Generating options strategies...")
+            options_block = self._format_options_block(stock_data, analyses)
+            options_strategies = self._generate_options_strategies(context, options_block)
+            analyses['thesis'] = futures['thesis'].result()
+            analyses['options_strategies'] = options_strategies
+        else:
+            analyses['thesis'] = futures['thesis'].result()
+        
+        # Final recommendation
+        analysis_summary = self._format_analysis_summary(analyses)
+        analyses['recommendation'] = self._generate_recommendation(stock_data, analysis_summary)
+        
+        # Only cache complete results; failed calls should be retried next run
+        if cache_key is not None and not any(isinstance(r, _Fallback) for r in analyses.values()):
+            self.cache.set(cache_key, analyses)
+        
+        return analyses
+    
+    def analyze_many(self, stocks: List[Dict], news_map: Dict[str, List[Dict]],
+                     concurrency: int = 8,
+                     on_done: Optional[Callable[[str, Dict], None]] = None) -> Dict[str, Dict]:
+        """
+        Deep-analyze several stocks concurrently, at most `concurrency` at a time
+        on_done(symbol, analyses) is called on the calling thread as each stock
+        finishes, in completion order. Returns {symbol: analyses} in input order;
+        run comparative_ranking once on the results
+        """
+        results = {}
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='claude-stock') as pool:
+            futures = {
+                pool.submit(self.analyze_stock_deep, stock,
+                            news_map.get(stock['symbol']) or []): stock['symbol']
+                for stock in stocks
+            }
+            for future in as_completed(futures):
+                symbol = futures[future]
+                results[symbol] = future.result()
+                if on_done is not None:
+                    on_done(symbol, results[symbol])
+        return {stock['symbol']: results[stock['symbol']] for stock in stocks}
+    
+    def _prepare_stock_context(self, stock_data: Dict, news_articles: List[Dict]) -> str:
+        """Prepare comprehensive stock context with enhanced formatting"""
+        metrics = stock_data['metrics']
+        ratios = stock_data.get('financial_ratios')
+        si = stock_data.get('short_interest_data')
+        growth = stock_data.get('growth_metrics')
+        options = stock_data.get('options_analysis')
+        
+        # Optional sections are pre-rendered (or left empty) so the template has no branches
+        fundamentals = ""
+        if ratios:
+            fundamentals = (
+                f"\n\nFUNDAMENTALS: P/E {ratios.get('priceEarningsRatio', 'N/A')}"
+                f" | ROE {_fmt_pct(ratios.get('returnOnEquity'))}"
+                f" | Debt/Eq {ratios.get('debtEquityRatio', 'N/A')}"
+                f" | Margin {_fmt_pct(ratios.get('netProfitMargin'))}"
+            )
+        
+        short_interest = ""
+        if si:
+            short_interest = (f"\nSHORT INTEREST: {si.get('shortPercentOfFloat', 'N/A')}% float"
+                              f" | {si.get('daysToCover', 'N/A')} days to cover")
+        
+        growth_line = ""
+        if growth:
+            growth_line = (f"\nGROWTH: Revenue {_fmt_pct(growth.get('revenueGrowth'))}"
+                           f" | EPS {_fmt_pct(growth.get('epsgrowth'))}")
+        
+        # Options data (ENHANCED)
+        options_block = ""
+        if options:
+            call_vol = options.get('total_call_volume', 0)
+            put_vol = options.get('total_put_volume', 0)
+            options_block = (
+                f"\n\nOPTIONS DATA:"
+                f"\n  P/C Ratio: {options.get('put_call_ratio', 'N/A')}"
+                f" | ATM IV: {_fmt_pct(options.get('atm_implied_volatility'))}"
+                f"\n  Volume: {call_vol + put_vol:,} total ({call_vol:,} calls, {put_vol:,} puts)"
+                f"\n  Net Delta: {options.get('net_delta', 'N/A')}"
+                f" | Contracts: {options.get('total_contracts', 0):,}"
+            )
+            if options.get('near_term_expirations'):
+                options_block += f"\n  Near expirations: {', '.join(options['near_term_expirations'][:3])}"
+        
+        news = ''.join(
+            f"\n  {i}. {article.get('title', 'No title')} ({article.get('publishedDate', '')})"
+            for i, article in enumerate(news_articles[:5], 1)
+        )
+        
+        return (
+            f"STOCK: {stock_data['symbol']} - {stock_data['company_name']}\n"
+            f"SECTOR: {stock_data['sector']} | PRICE: ${stock_data['price']:.2f}"
+            f" | CAP: ${stock_data.get('market_cap', 0):,.0f}\n"
+            f"\nSCORES: Total {stock_data['total_score']:.2f}/10"
+            f" | Momentum {stock_data['momentum_score']:.2f}/10"
+            f" | Volume {stock_data['volume_score']:.2f}/10\n"
+            f"PERFORMANCE: Day {metrics['day_change_pct']:.2f}%"
+            f" | Week {metrics['week_change_pct']:.2f}%"
+            f" | Month {metrics['month_change_pct']:.2f}%\n"
+            f"INDICATORS: RSI {metrics['rsi_14']:.1f} | Volume {metrics['volume_ratio']:.2f}x avg"
+            f"{fundamentals}{short_interest}{growth_line}{options_block}\n"
+            f"\nRECENT NEWS:{news}"
+        )
+    
+    def _analyze_sentiment(self, context: str, news_articles: List[Dict]) -> Dict:
+        """Analyze sentiment with optimized prompt structure"""
+        
+        if not news_articles:
+            return _defaults('sentiment') | {'summary': 'No recent news available.'}
+        
+        prompt = "<task>sentiment</task>"
+
+        try:
+            text = self._create(prompt, max_tokens=self.MAX_TOKENS['sentiment'], context=context)
+            return self._parse_result('sentiment', text)
+        except Exception as e:
+            print(f"    ⚠ Sentiment error: {e}")
+            return _Fallback(_defaults('sentiment'), summary=f'Error: {str(e)}')
+    
+    def _identify_catalysts(self, context: str, news_articles: List[Dict]) -> Dict:
+        """Identify catalysts with enhanced specificity"""
+        
+        prompt = "<task>catalysts</task>"
+
+        try:
+            text = self._create(prompt, max_tokens=self.MAX_TOKENS['catalysts'], context=context)
+            return self._parse_result('catalysts', text)
+        except Exception as e:
+            print(f"    ⚠ Catalyst error: {e}")
+            return _Fallback(_defaults('catalysts'), summary=f'Error: {str(e)}')
+    
+    def _assess_risks(self, context: str, news_articles: List[Dict]) -> Dict:
+        """Assess risks with enhanced red flag detection"""
+        
+        prompt = "<task>risks</task>"
+
+        try:
+            text = self._create(prompt, max_tokens=self.MAX_TOKENS['risks'], context=context)
+            return self._parse_result('risks', text)
+        except Exception as e:
+            print(f"    ⚠ Risk error: {e}")
+            return _Fallback(_defaults('risks'), summary=f'Error: {str(e)}')
+    
+    def _options_tradeable(self, options: Optional[Dict]) -> bool:
+        """Whether there is enough volume and near-term expirations for spread ideas to be worth a call"""
+        if not options or not options.get('near_term_expirations'):
+            return False
+        total_vol = options.get('total_call_volume', 0) + options.get('total_put_volume', 0)
+        return total_vol >= config.OPTIONS_STRATEGY_MIN_VOLUME
+    
+    def _format_options_block(self, stock_data: Dict, analyses: Dict) -> str:
+        """Options market data, its signals and the strategy brief for the options task"""
+        options = stock_data.get('options_analysis', {})
+        sentiment = analyses.get('sentiment', {})
+        catalysts = analyses.get('catalysts', {})
+        risks = analyses.get('risks', {})
+        
+        # Calculate key metrics
+        price = stock_data.get('price', 0)
+        put_call = options.get('put_call_ratio', 'N/A')
+        atm_iv = options.get('atm_implied_volatility', 'N/A')
+        if isinstance(atm_iv, (int, float)):
+            iv_pct = atm_iv * 100 if atm_iv < 1 else atm_iv
+        else:
+            iv_pct = 'N/A'
+        
+        total_vol = options.get('total_call_volume', 0) + options.get('total_put_volume', 0)
+        
+        # Interpret the data
+        pc_signal = "NEUTRAL"
+        direction_rec = "NEUTRAL"
+        if isinstance(put_call, (int, float)):
+            if put_call < 0.7:
+                pc_signal = "VERY BULLISH (heavy call buying)"
+                direction_rec = "BULLISH - Recommend debit call spreads"
+            elif put_call < 0.85:
+                pc_signal = "MODERATELY BULLISH"
+                direction_rec = "BULLISH - Recommend debit call spreads"
+            elif put_call < 1.0:
+                pc_signal = "SLIGHTLY BULLISH"
+                direction_rec = "BULLISH - Recommend debit call spreads"
+            elif put_call < 1.2:
+                pc_signal = "NEUTRAL"
+                direction_rec = "NEUTRAL - Consider iron condors or avoid"
+            elif put_call < 1.5:
+                pc_signal = "SLIGHTLY BEARISH"
+                direction_rec = "BEARISH - Recommend debit put spreads"
+            else:
+                pc_signal = "VERY BEARISH (heavy put buying)"
+                direction_rec = "BEARISH - Recommend debit put spreads"
+        else:
+            direction_rec = "UNKNOWN - Default to debit call spreads if bullish thesis"
+        
+        iv_signal = "NORMAL"
+        if isinstance(iv_pct, (int, float)):
+            if iv_pct > 50:
+                iv_signal = "ELEVATED (still ok for spreads)"
+            elif iv_pct >= 20:
+                iv_signal = "NORMAL RANGE (ideal for buying spreads)"
+            else:
+                iv_signal = "LOW (cheap options, good for buying)"
+        
+        liquidity_signal = "LIQUID" if total_vol > 1000 else "LOW" if total_vol < 100 else "MODERATE"
+        
+        # Build enhanced options context
+        options_context = f"""
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+OPTIONS MARKET DATA - {stock_data.get('symbol')} at ${price:.2f}
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+PUT/CALL RATIO: {put_call} → {pc_signal}
+→ {direction_rec}
+
+IMPLIED VOLATILITY: {iv_pct}{'%' if isinstance(iv_pct, (int, float)) else ''} → {iv_signal}
+
+OPTIONS VOLUME: {total_vol:,} ({liquidity_signal})
+
+AVAILABLE EXPIRATIONS: {', '.join(options.get('near_term_expirations', [])[:5])}
+
+FUNDAMENTAL CONTEXT:
+- Sentiment: {sentiment.get('score', 5)}/10 ({sentiment.get('label', 'Unknown')})
+- Upcoming Catalysts: {', '.join(catalysts.get('upcoming', ['None'])[:3])}
+- Risk Level: {risks.get('overall_risk_score', 5)}/10
+"""
+        
+        spread_type = "Debit CALL spread" if "BULLISH" in direction_rec else "Debit PUT spread" if "BEARISH" in direction_rec else "Debit CALL spread"
+        width_suggestion = "$5 width" if price > 100 else "$2.50 width" if price > 50 else "$1 width"
+        
+        return f"""<options_data>
+{options_context}
+</options_data>
+
+<task>options
+Based on {pc_signal} P/C ratio and {iv_signal} IV, generate 3 DEBIT SPREAD strategies for {stock_data.get('symbol')} at ${price:.2f}.
+- Suggested structure: {spread_type} ({direction_rec})
+- Suggested width for ${price:.2f}: {width_suggestion}
+- Available expirations: {', '.join(options.get('near_term_expirations', [])[:3])}
+</task>"""
+    
+    def _generate_options_strategies(self, context: str, options_block: str) -> Dict:
+        """Generate options strategies using PROVEN SHORT-TERM methodology: Debit spreads over naked calls"""
+        try:
+            text = self._create(options_block, max_tokens=self.MAX_TOKENS['options'], context=context)
+            return self._parse_result('options', text)
+        except Exception as e:
+            print(f"    ⚠ Options strategy error: {e}")
+            return _Fallback(_defaults('options'), summary=f'Error: {str(e)}')
+    
+    def _generate_thesis(self, context: str, stock_data: Dict) -> Dict:
+        """Generate bull/bear thesis with enhanced structure"""
+        
+        prompt = "<task>thesis</task>"
+
+        try:
+            text = self._create(prompt, max_tokens=self.MAX_TOKENS['thesis'], context=context)
+            return self._parse_result('thesis', text)
+        except Exception as e:
+            print(f"    ⚠ Thesis error: {e}")
+            return _Fallback(_defaults('thesis'), summary=f'Error: {str(e)}')
+    
+    def _format_analysis_summary(self, analyses: Dict) -> str:
+        """Scores and conclusions from the sub-analyses, as read by the recommendation"""
+        sentiment = analyses.get('sentiment', {})
+        catalysts = analyses.get('catalysts', {})
+        risks = analyses.get('risks', {})
+        thesis = analyses.get('thesis', {})
+        
+        options_note = ""
+        if 'options_strategies' in analyses:
+            options_note = "\n\nOPTIONS STRATEGIES AVAILABLE - See separate options_strategies section for specific trade ideas."
+        
+        return f"""<analysis_summary>
+- Sentiment: {sentiment.get('score', 5)}/10 ({sentiment.get('label', 'Unknown')})
+- Sentiment Momentum: {sentiment.get('sentiment_momentum', 'Unknown')}
+- Catalyst Score: {catalysts.get('catalyst_score', 5)}/10
+- Risk Score: {risks.get('overall_risk_score', 5)}/10 ({risks.get('risk_label', 'Unknown')})
+- Stronger Case: {thesis.get('stronger_case', 'unknown')}
+- Conviction: {thesis.get('conviction_level', 'Unknown')}
+- Risk/Reward: {thesis.get('risk_reward_ratio', 'Unknown')}{options_note}
+</analysis_summary>"""
+    
+    def _generate_recommendation(self, stock_data: Dict, analysis_summary: str) -> Dict:
+        """
+        Generate final recommendation with options consideration
+        The rubric only weighs the distilled scores, so the full stock context
+        is left out and a one-line scorecard stands in for it
+        """
+        prompt = f"""<scorecard>
+{stock_data['symbol']} | Price ${stock_data['price']:.2f} | Quant {stock_data['total_score']:.2f}/10 | Momentum {stock_data['momentum_score']:.2f}/10 | Volume {stock_data['volume_score']:.2f}/10
+</scorecard>
+
+{analysis_summary}
+
+<task>recommendation</task>"""
+        
+        try:
+            text = self._create(prompt, max_tokens=self.MAX_TOKENS['recommendation'], model=self.model_light)
+            return self._parse_result('recommendation', text)
+        except Exception as e:
+            print(f"    ⚠ Recommendation error: {e}")
+            return _Fallback(_defaults('recommendation'), summary=f'Error: {str(e)}')
+    
+    def comparative_ranking(self, stocks_data: List[Dict]) -> Dict:
+        """Re-rank stocks with enhanced criteria"""
+        
+        print(f"\n🤖 Claude performing comparative analysis on {len(stocks_data)} stocks...")
+        
+        stocks_summary = []
+        for i, stock in enumerate(stocks_data, 1):
+            ca = stock.get('claude_analysis', {})
+            opts = stock.get('options_analysis', {})
+            rec = ca.get('recommendation', {})
+            
+            # Add options note if available
+            options_note = f" | P/C: {opts.get('put_call_ratio', 'N/A')} | Options: Yes" if opts else ""
+            
+            stocks_summary.append(
+                f"{i}. {stock['symbol']} - Quant: {stock['total_score']:.2f}/10"
+                f" | Sent: {ca.get('sentiment', {}).get('score', 0):.1f}/10"
+                f" | Cat: {ca.get('catalysts', {}).get('catalyst_score', 0):.1f}/10"
+                f" | Risk: {ca.get('risks', {}).get('overall_risk_score', 0):.1f}/10"
+                f"\n   Rec: {rec.get('recommendation', 'Unknown')} ({rec.get('confidence', 'Unknown')} conf)"
+                f" | {ca.get('thesis', {}).get('stronger_case', 'Unknown')} case{options_note}"
+            )
+        
+        # One entry per line
+        stocks_block = '\n'.join(stocks_summary)
+        prompt = f"""<stocks>
+{stocks_block}
+</stocks>
+
+<task>Rank these stocks</task>"""
+
+        try:
+            text = self._create(prompt, max_tokens=self.MAX_TOKENS['ranking'], model=self.model_light,
+                                system=RANKING_SYSTEM_PROMPT)
+            result = self._extract_json(text)
+            if not isinstance(result, dict) or not result:
                 return {'top_5': [], 'avoid': [], 'market_outlook': 'Parse error.'}
-            return result
+            return _normalize('ranking', result)
         except Exception as e:
             print(f"  ⚠ Comparative error: {e}")
             return {'top_5': [], 'avoid': [], 'market_outlook': f'Error: {str(e)}'}
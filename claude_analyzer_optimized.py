@@ -4,110 +4,144 @@ Enhanced prompts for maximum insight quality on short-term trades
 """
 
 import anthropic
+import hashlib
+import httpx
+import threading
 import time
-import re
-from typing import List, Dict, Optional
-import json
-
-
-class ClaudeAnalyzer:
-    """Deep analysis using Claude API with optimized prompts"""
-    
-    def __init__(self, api_key: str, model: str = "claude-opus-4-20250514"):
-        """Initialize Claude API client"""
-        self.client = anthropic.Anthropic(api_key=api_key)
-        self.model = model
-    
-    def _extract_json(self, text: str) -> Dict:
-        """Extract JSON from Claude's response"""
-        json_match = re.search(r'```(?:json)?\s*(\{.*?\})\s*```', text, re.DOTALL)
-        if json_match:
-            json_str = json_match.group(1)
-        else:
-            json_match = re.search(r'\{.*\}', text, re.DOTALL)
-            if json_match:
-                json_str = json_match.group(0)
-            else:
-                json_str = text
-        
-        try:
-            return json.loads(json_str)
-        except json.JSONDecodeError as e:
-            print(f"      JSON parse error: {e}")
-            return None
-    
-    def analyze_stock_deep(self, stock_data: Dict, news_articles: List[Dict]) -> Dict:
-        """Perform comprehensive deep analysis"""
-        print(f"  🤖 Claude analyzing {stock_data['symbol']}...")
-        
-        context = self._prepare_stock_context(stock_data, news_articles)
-        
-        analyses = {}
-        analyses['sentiment'] = self._analyze_sentiment(context, news_articles)
-        analyses['catalysts'] = self._identify_catalysts(context, news_articles)
-        analyses['risks'] = self._assess_risks(context, news_articles)
-        analyses['thesis'] = self._generate_thesis(context, stock_data)
-        analyses['recommendation'] = self._generate_recommendation(context, stock_data, analyses)
-        
-        return analyses
-    
-    def _prepare_stock_context(self, stock_data: Dict, news_articles: List[Dict]) -> str:
-        """Prepare stock context"""
-        context = f"""Stock: {stock_data['symbol']} - {stock_data['company_name']}
-Sector: {stock_data['sector']} | Price: ${stock_data['price']:.2f} | Market Cap: ${stock_data.get('market_cap', 0):,.0f}
-
-Technical Scores: Composite {stock_data['total_score']:.2f}/10, Momentum {stock_data['momentum_score']:.2f}/10, Volume {stock_data['volume_score']:.2f}/10
-Performance: Day {stock_data['metrics']['day_change_pct']:.2f}%, Week {stock_data['metrics']['week_change_pct']:.2f}%, Month {stock_data['metrics']['month_change_pct']:.2f}%
-Indicators: RSI {stock_data['metrics']['rsi_14']:.1f}, Volume {stock_data['metrics']['volume_ratio']:.2f}x avg"""
-
-        # Add fundamental data if available
-        if stock_data.get('financial_ratios'):
-            ratios = stock_data['financial_ratios']
-            context += f"\n\nFundamentals: P/E {ratios.get('priceEarningsRatio', 'N/A')}, ROE {ratios.get('returnOnEquity', 'N/A')}, Debt/Equity {ratios.get('debtEquityRatio', 'N/A')}"
-            context += f", Current Ratio {ratios.get('currentRatio', 'N/A')}, Net Margin {ratios.get('netProfitMargin', 'N/A')}"
-        
-        # Add short interest if available
-        if stock_data.get('short_interest_data'):
-            si = stock_data['short_interest_data']
-            short_pct = si.get('shortPercentOfFloat', 'N/A')
-            days_cover = si.get('daysaToCover', 'N/A')
-            context += f"\nShort Interest: {short_pct}% of float, {days_cover} days to cover"
-        
-        # Add growth metrics if available
-        if stock_data.get('growth_metrics'):
-            growth = stock_data['growth_metrics']
-            rev_growth = growth.get('revenueGrowth', 'N/A')
-            eps_growth = growth.get('epsgrowth', 'N/A')
-            context += f"\nGrowth: Revenue {rev_growth}, EPS {eps_growth}"
-        
-        # Add options data if available
-        if stock_data.get('options_analysis'):
-            options = stock_data['options_analysis']
-            put_call = options.get('put_call_ratio', 'N/A')
-            iv = options.get('atm_implied_volatility', 'N/A')
-            if iv != 'N/A':
-                iv = f"{float(iv)*100:.1f}%" if isinstance(iv, (int, float)) else iv
-            total_vol = options.get('total_call_volume', 0) + options.get('total_put_volume', 0)
-            context += f"\nOptions: Put/Call {put_call}, IV {iv}, Volume {total_vol:,}"
-        
-        context += "\n\nRecent News:"
-        
-        for i, article in enumerate(news_articles[:5], 1):
-            context += f"\n{i}. {article.get('title', 'No title')}"
-            if article.get('publishedDate'):
-                context += f" ({article['publishedDate']})"
-        
-        return context
-    
-    def _analyze_sentiment(self, context: str, news_articles: List[Dict]) -> Dict:
-        """Analyze sentiment optimized for short-term trading"""
-        
-        if not news_articles:
-            return {'score': 5, 'label': 'Neutral', 'summary': 'No recent news.', 'key_themes': []}
-        
-        prompt = f"""You are an expert short-term trader (<2 months) analyzing news sentiment.
-
-{context}
+from concurrent.futures import Future, ThreadPoolExecutor
+from tenacity import retry, retry_if_exception, stop_after_attempt, wait_random_exponential
+from itertools import islice
+from typing import List, Dict, Optional, Tuple
+import config
+from llm_cache import ResultCache
+from log_utils import get_logger
+
+# HTTP/2 lets the concurrent calls share one connection; httpx needs the h2 package for it
+try:
+    import h2  # noqa: F401
+    _HTTP2 = True
+except ImportError:
+    _HTTP2 = False
+
+
+logger = get_logger('claude_analyzer_optimized')
+
+# Shared pool for the independent per-stock API calls (I/O-bound, so threads are enough)
+# Sized for several stocks in flight at once via analyze_many
+_EXECUTOR = ThreadPoolExecutor(max_workers=16, thread_name_prefix='claude-optimized')
+
+# One keep-alive connection pool for every analyzer instance, so analyzers built for
+# different models (or per worker) reuse open TLS connections instead of each dialing its own
+_HTTP_CLIENT = httpx.Client(
+    http2=_HTTP2,
+    limits=httpx.Limits(max_keepalive_connections=32, max_connections=64),
+    timeout=60.0
+)
+
+
+def _is_transient(exc: BaseException) -> bool:
+    """Rate limits, overload (529), 5xx responses and dropped connections are worth retrying"""
+    if isinstance(exc, (anthropic.RateLimitError, anthropic.APIConnectionError)):
+        return True
+    return isinstance(exc, anthropic.APIStatusError) and exc.status_code >= 500
+
+
+# Every call forces this tool, so the answer arrives as an already-parsed dict in
+# the tool_use block; each prompt still spells out the fields it expects
+_RESULT_TOOL = {
+    "name": "submit_analysis",
+    "description": "Submit the analysis as a JSON object in exactly the format given in the request.",
+    "input_schema": {"type": "object", "additionalProperties": True},
+}
+
+# Output budget per call; looser ceilings only add tail latency when a response
+# rambles. Thesis (entry/exit plans, the longest answer) keeps its original budget,
+# and an answer cut off at the ceiling is discarded rather than cached
+_MAX_TOKENS = {
+    'sentiment': 600,
+    'catalysts': 1400,
+    'risks': 1400,
+    'thesis': 2200,
+    'recommendation': 1200,
+    'ranking': 3000,
+}
+
+# Fields every result is guaranteed to carry, with their defaults; also the
+# result used when an analysis gets no usable answer (plus a summary saying why)
+_FALLBACKS = {
+    'sentiment': {'score': 5, 'label': 'Neutral', 'key_themes': [], 'sentiment_momentum': 'stable'},
+    'catalysts': {'upcoming_catalysts': [], 'recent_catalysts': [], 'catalyst_score': 5},
+    'risks': {'risks': [], 'red_flags': [], 'overall_risk_score': 5, 'risk_label': 'Unknown'},
+    'thesis': {'bull_case': [], 'bear_case': [], 'stronger_case': 'neutral', 'conviction_level': 'Unknown'},
+    'recommendation': {'recommendation': 'Hold', 'confidence': 'Low'},
+    'ranking': {'top_5': [], 'avoid': [], 'market_outlook': ''},
+}
+
+
+def _fallback(task: str, summary: str) -> Dict:
+    """Fresh fallback result for a task (lists are copied, never shared)"""
+    result = {key: list(value) if isinstance(value, list) else value
+              for key, value in _FALLBACKS[task].items()}
+    result['summary'] = summary
+    return result
+
+
+def _no_news_analyses() -> Dict:
+    """Placeholder analyses for a stock skipped for lack of news, in the usual shape"""
+    return {task: _fallback(task, 'No recent news.')
+            for task in ('sentiment', 'catalysts', 'risks', 'thesis', 'recommendation')}
+
+
+def _pack_news(news_articles: List[Dict]) -> List[Tuple[str, Optional[str]]]:
+    """(title, published date) for the five most recent articles, the only fields the context shows"""
+    return [(article.get('title', 'No title'), article.get('publishedDate'))
+            for article in islice(news_articles, 5)]
+
+
+def _normalize(task: str, result: Dict) -> Dict:
+    """
+    Check a result against its task's fields: fill missing ones with their
+    defaults and coerce mistyped ones (e.g. "7" for a score), so callers can
+    index results directly instead of guarding every read with .get()
+    """
+    for key, default in _FALLBACKS[task].items():
+        value = result.get(key)
+        if value is None:
+            result[key] = list(default) if isinstance(default, list) else default
+        elif isinstance(default, (int, float)) and not isinstance(value, (int, float)):
+            try:
+                result[key] = float(value)
+            except (TypeError, ValueError):
+                result[key] = default
+        elif isinstance(default, list) and not isinstance(value, list):
+            result[key] = list(default)
+    return result
+
+
+def _tool_input(task: str, message) -> Optional[Dict]:
+    """
+    Validated result dict from a response message, or None if it is unusable
+    The tool_use block is looked up by type rather than position, so a text
+    or thinking block ahead of it does not hide the result
+    """
+    tool_input = next((block.input for block in message.content if block.type == "tool_use"), None)
+    # A response cut off by max_tokens carries an empty or partial input
+    if not tool_input or message.stop_reason == "max_tokens":
+        logger.warning("      Unusable response (stop reason: %s)", message.stop_reason)
+        return None
+    return _normalize(task, tool_input)
+
+
+# Instructions for every per-stock task. They are identical on every call, so they go
+# out once as a cached system prompt (about 1.3k tokens with the tool definition, over
+# the 1024-token caching minimum of the main models); each user message is then just
+# the stock context and a TASK line. Haiku's minimum is 2048 tokens, so calls routed
+# to CLAUDE_MODEL_LIGHT run uncached.
+_SYSTEM_PROMPT = """You are an expert short-term trader evaluating stocks for trades of under 2 months.
+Each request gives one stock's context followed by a TASK line naming one of the analyses below.
+Perform only that analysis and submit it with the submit_analysis tool, in exactly the format shown for it.
+
+TASK sentiment - analyze news sentiment.
 
 Focus on NEAR-TERM price impact (next 2-8 weeks), not fundamentals.
 Weight recent news heavily. Look for sentiment SHIFTS and ACCELERATION.
@@ -115,35 +149,21 @@ Consider if sentiment is priced in or has momentum.
 
 Provide:
 1. Sentiment Score (0-10): 0-2 Very Negative, 3-4 Negative, 5 Neutral, 6-7 Positive, 8-10 Very Positive
-2. Label: Very Negative | Negative | Neutral | Positive | Very Positive  
+2. Label: Very Negative | Negative | Neutral | Positive | Very Positive
 3. Summary: 2-3 sentences on narrative, direction, and short-term opportunity
 4. Key Themes: 3-5 dominant topics
 5. Sentiment Momentum: accelerating_positive | reversing_positive | stable | weakening | accelerating_negative
 
-Return ONLY valid JSON:
-{{
+Format:
+{
   "score": <0-10>,
   "label": "<label>",
   "summary": "<summary>",
   "key_themes": ["theme1", "theme2"],
   "sentiment_momentum": "<momentum>"
-}}"""
-
-        try:
-            response = self.client.messages.create(model=self.model, max_tokens=1000, temperature=0.3,
-                                                   messages=[{"role": "user", "content": prompt}])
-            result = self._extract_json(response.content[0].text)
-            return result if result else {'score': 5, 'label': 'Neutral', 'summary': 'Parse error.', 'key_themes': []}
-        except Exception as e:
-            print(f"    ⚠ Sentiment error: {e}")
-            return {'score': 5, 'label': 'Neutral', 'summary': 'Error.', 'key_themes': []}
-    
-    def _identify_catalysts(self, context: str, news_articles: List[Dict]) -> Dict:
-        """Identify catalysts with dates and impact"""
-        
-        prompt = f"""You are a catalyst-focused trader. Identify SPECIFIC, ACTIONABLE catalysts (<8 weeks).
+}
 
-{context}
+TASK catalysts - as a catalyst-focused trader, identify SPECIFIC, ACTIONABLE catalysts (<8 weeks).
 
 Be SPECIFIC with DATES. Prioritize BINARY events. Consider SURPRISE potential and CONVERGENCE.
 
@@ -159,30 +179,16 @@ Examples: "Q4 earnings Oct 28 - guidance raise expected", "FDA decision Nov 15 -
 
 Also identify: Recent catalysts (last 2 weeks, priced in?), Catalyst convergence, Overall score 0-10
 
-Return ONLY valid JSON:
-{{
-  "upcoming_catalysts": [{{"event": "", "impact": "", "timeframe": "", "type": "", "surprise_potential": "", "probability": ""}}],
-  "recent_catalysts": [{{"event": "", "impact": "", "timing": "", "priced_in": ""}}],
+Format:
+{
+  "upcoming_catalysts": [{"event": "", "impact": "", "timeframe": "", "type": "", "surprise_potential": "", "probability": ""}],
+  "recent_catalysts": [{"event": "", "impact": "", "timing": "", "priced_in": ""}],
   "catalyst_convergence": "",
   "catalyst_score": <0-10>,
   "summary": ""
-}}"""
+}
 
-        try:
-            response = self.client.messages.create(model=self.model, max_tokens=1800, temperature=0.3,
-                                                   messages=[{"role": "user", "content": prompt}])
-            result = self._extract_json(response.content[0].text)
-            return result if result else {'upcoming_catalysts': [], 'catalyst_score': 5, 'summary': 'Parse error.'}
-        except Exception as e:
-            print(f"    ⚠ Catalyst error: {e}")
-            return {'upcoming_catalysts': [], 'catalyst_score': 5, 'summary': 'Error.'}
-    
-    def _assess_risks(self, context: str, news_articles: List[Dict]) -> Dict:
-        """Assess downside risks"""
-        
-        prompt = f"""You are a risk analyst for short-term trades (<2 months). Assess DOWNSIDE RISKS.
-
-{context}
+TASK risks - as a risk analyst for short-term trades (<2 months), assess DOWNSIDE RISKS.
 
 Focus on NEXT 2 MONTHS. Distinguish IMMINENT vs MEDIUM-TERM risks. Look for RED FLAGS.
 
@@ -199,31 +205,17 @@ RED FLAGS: Insider selling, accounting issues, investigations, management exits,
 Risk Score (0-10): 0-2 Very High (avoid), 3-4 High (small position), 5-6 Moderate, 7-8 Low, 9-10 Very Low
 Risk Label: Very High | High | Moderate | Low | Very Low
 
-Return ONLY valid JSON:
-{{
-  "risks": [{{"risk": "", "severity": "", "likelihood": "", "timeframe": "", "category": "", "mitigation": ""}}],
+Format:
+{
+  "risks": [{"risk": "", "severity": "", "likelihood": "", "timeframe": "", "category": "", "mitigation": ""}],
   "red_flags": [""],
   "overall_risk_score": <0-10>,
   "risk_label": "",
   "risk_vs_reward": "",
   "summary": ""
-}}"""
+}
 
-        try:
-            response = self.client.messages.create(model=self.model, max_tokens=1800, temperature=0.3,
-                                                   messages=[{"role": "user", "content": prompt}])
-            result = self._extract_json(response.content[0].text)
-            return result if result else {'risks': [], 'overall_risk_score': 5, 'risk_label': 'Unknown', 'summary': 'Parse error.'}
-        except Exception as e:
-            print(f"    ⚠ Risk error: {e}")
-            return {'risks': [], 'overall_risk_score': 5, 'risk_label': 'Unknown', 'summary': 'Error.'}
-    
-    def _generate_thesis(self, context: str, stock_data: Dict) -> Dict:
-        """Generate bull/bear thesis"""
-        
-        prompt = f"""Create ACTIONABLE bull/bear thesis for <2 month trade.
-
-{context}
+TASK thesis - create an ACTIONABLE bull/bear thesis for a <2 month trade.
 
 Focus on NEXT 2-8 WEEKS. Be SPECIFIC. Consider TIMING. Provide TACTICAL guidance.
 
@@ -236,8 +228,8 @@ Entry Strategy: When to enter, price levels, position size
 Exit Strategy: Profit target, stop loss, time-based exit
 Time Horizon: Specific timeframe
 
-Return ONLY valid JSON:
-{{
+Format:
+{
   "bull_case": [""],
   "bear_case": [""],
   "stronger_case": "",
@@ -247,31 +239,10 @@ Return ONLY valid JSON:
   "exit_strategy": "",
   "time_horizon": "",
   "summary": ""
-}}"""
+}
 
-        try:
-            response = self.client.messages.create(model=self.model, max_tokens=2200, temperature=0.3,
-                                                   messages=[{"role": "user", "content": prompt}])
-            result = self._extract_json(response.content[0].text)
-            return result if result else {'bull_case': [], 'bear_case': [], 'stronger_case': 'neutral', 'summary': 'Parse error.'}
-        except Exception as e:
-            print(f"    ⚠ Thesis error: {e}")
-            return {'bull_case': [], 'bear_case': [], 'stronger_case': 'neutral', 'summary': 'Error.'}
-    
-    def _generate_recommendation(self, context: str, stock_data: Dict, analyses: Dict) -> Dict:
-        """Generate final recommendation"""
-        
-        sentiment = analyses.get('sentiment', {})
-        catalysts = analyses.get('catalysts', {})
-        risks = analyses.get('risks', {})
-        thesis = analyses.get('thesis', {})
-        
-        prompt = f"""Make FINAL TRADING RECOMMENDATION for <2 month trade.
-
-{context}
-
-Scores: Sentiment {sentiment.get('score', 5)}/10, Catalyst {catalysts.get('catalyst_score', 5)}/10, Risk {risks.get('overall_risk_score', 5)}/10
-Thesis: {thesis.get('stronger_case', 'unknown')} case stronger, {thesis.get('conviction_level', 'Unknown')} conviction
+TASK recommendation - make the FINAL TRADING RECOMMENDATION for a <2 month trade.
+The request also gives the scores and thesis from the other analyses.
 
 Recommendation:
 - Strong Buy: All align, high conviction, >1:2 risk/reward, catalyst in 2-4 weeks
@@ -286,8 +257,8 @@ Watch Points: 2-4 items to monitor
 Exit Conditions: Profit target, stop loss, time/news-based exits
 Time Horizon: How long to hold
 
-Return ONLY valid JSON:
-{{
+Format:
+{
   "recommendation": "",
   "confidence": "",
   "position_size": "",
@@ -296,32 +267,27 @@ Return ONLY valid JSON:
   "exit_conditions": [""],
   "time_horizon": "",
   "summary": ""
-}}"""
+}"""
 
-        try:
-            response = self.client.messages.create(model=self.model, max_tokens=1800, temperature=0.3,
-                                                   messages=[{"role": "user", "content": prompt}])
-            result = self._extract_json(response.content[0].text)
-            return result if result else {'recommendation': 'Hold', 'confidence': 'Low', 'summary': 'Parse error.'}
-        except Exception as e:
-            print(f"    ⚠ Recommendation error: {e}")
-            return {'recommendation': 'Hold', 'confidence': 'Low', 'summary': 'Error.'}
-    
-    def comparative_ranking(self, stocks_data: List[Dict]) -> Dict:
-        """Re-rank stocks based on all analysis"""
-        
-        print(f"\n🤖 Claude performing comparative analysis on {len(stocks_data)} stocks...")
-        
-        stocks_summary = []
-        for i, stock in enumerate(stocks_data, 1):
-            ca = stock.get('claude_analysis', {})
-            stocks_summary.append(f"""
-{i}. {stock['symbol']} - Quant: {stock['total_score']:.2f}/10, Sentiment: {ca.get('sentiment', {}).get('score', 0):.1f}/10, Catalyst: {ca.get('catalysts', {}).get('catalyst_score', 0):.1f}/10, Risk: {ca.get('risks', {}).get('overall_risk_score', 0):.1f}/10
-   Rec: {ca.get('recommendation', {}).get('recommendation', 'Unknown')} ({ca.get('recommendation', {}).get('confidence', 'Unknown')}), Case: {ca.get('thesis', {}).get('stronger_case', 'Unknown')}""")
-        
-        prompt = f"""You are a portfolio manager selecting BEST stocks for short-term trading (<2 months).
+# Keys cached results to the instructions that produced them
+_RUBRIC_DIGEST = hashlib.blake2b(_SYSTEM_PROMPT.encode('utf-8'), digest_size=8).hexdigest()
+
+# The per-stock prompts, sent after the stock context; the instructions live in _SYSTEM_PROMPT
+_SENTIMENT_PROMPT = "TASK: sentiment"
+_CATALYSTS_PROMPT = "TASK: catalysts"
+_RISKS_PROMPT = "TASK: risks"
+_THESIS_PROMPT = "TASK: thesis"
+
+# The recommendation also carries the other analyses' results (a str.format_map template)
+_RECOMMENDATION_TMPL = """TASK: recommendation
+
+Scores: Sentiment {sentiment_score}/10, Catalyst {catalyst_score}/10, Risk {risk_score}/10
+Thesis: {stronger_case} case stronger, {conviction_level} conviction"""
 
-{''.join(stocks_summary)}
+# The ranking has no stock context and keeps its instructions inline (literal braces doubled)
+_RANKING_TMPL = """You are a portfolio manager selecting BEST stocks for short-term trading (<2 months).
+
+{stocks_summary}
 
 Re-rank BEST TO WORST. Consider ALL factors. Prioritize IMMINENT catalysts (2-4 weeks).
 
@@ -336,7 +302,7 @@ Ranking Factors: Catalyst Timing (30%), Risk/Reward (25%), Technical (20%), Sent
 Provide Top 5 with: rank, symbol, reason (1-2 sentences), key_edge (specific advantage), entry_timing
 Stocks to Avoid with red flags/poor setup: symbol, reason
 
-Return ONLY valid JSON:
+Submit with the submit_analysis tool, in this format:
 {{
   "top_5": [{{"rank": 1, "symbol": "", "reason": "", "key_edge": "", "entry_timing": ""}}],
   "avoid": [{{"symbol": "", "reason": ""}}],
@@ -344,11 +310,362 @@ Return ONLY valid JSON:
   "top_pick_summary": ""
 }}"""
 
+
+class ClaudeAnalyzer:
+    """Deep analysis using Claude API with optimized prompts"""
+    
+    def __init__(self, api_key: str, model: str = "claude-opus-4-20250514",
+                 cache_ttl_hours: Optional[float] = None,
+                 http_client: Optional[httpx.Client] = None,
+                 model_map: Optional[Dict[str, str]] = None):
+        """
+        Initialize Claude API client
+        Parsed responses are cached on disk for `cache_ttl_hours`
+        (default CLAUDE_CACHE_CONFIG['ttl_hours']); requests go through
+        `http_client`, or the module's shared connection pool if not given.
+        `model_map` routes individual calls (sentiment, catalysts, risks, thesis,
+        recommendation, ranking) to other models; unlisted calls use `model`.
+        By default the recommendation and ranking, which only read
+        already-distilled scores, go to the cheaper CLAUDE_MODEL_LIGHT
+        """
+        # Retries are handled by the backoff on _create, not inside the SDK
+        self.client = anthropic.Anthropic(api_key=api_key, http_client=http_client or _HTTP_CLIENT,
+                                          max_retries=0)
+        self.model = model
+        self.model_map = (model_map if model_map is not None else
+                          {'recommendation': config.CLAUDE_MODEL_LIGHT, 'ranking': config.CLAUDE_MODEL_LIGHT})
+        self.cache = (ResultCache(ttl_hours=cache_ttl_hours)
+                      if config.CLAUDE_CACHE_CONFIG['enabled'] else None)
+        # Calls currently on the wire, by cache key, so identical concurrent prompts share one request
+        self._inflight: Dict[str, Future] = {}
+        self._inflight_lock = threading.Lock()
+    
+    def _params(self, task: str, prompt: str, context: Optional[str] = None) -> Dict:
+        """
+        Request parameters for one task's prompt, shared by direct and batched calls
+        Per-stock calls get _SYSTEM_PROMPT and then the stock context, each marked
+        for caching: every stock shares the instructions, and the calls for one
+        stock on the same model also share its context
+        """
+        request = {}
+        if context is None:
+            content = prompt
+        else:
+            request['system'] = [
+                {"type": "text", "text": _SYSTEM_PROMPT, "cache_control": {"type": "ephemeral"}},
+            ]
+            content = [
+                {"type": "text", "text": context, "cache_control": {"type": "ephemeral"}},
+                {"type": "text", "text": prompt},
+            ]
+        request.update({
+            "model": self.model_map.get(task, self.model),
+            "max_tokens": _MAX_TOKENS[task],
+            "temperature": 0.3,
+            "tools": [_RESULT_TOOL],
+            "tool_choice": {"type": "tool", "name": _RESULT_TOOL["name"]},
+            "messages": [{"role": "user", "content": content}],
+        })
+        return request
+    
+    @retry(retry=retry_if_exception(_is_transient),
+           wait=wait_random_exponential(multiplier=1, max=30), stop=stop_after_attempt(5), reraise=True)
+    def _create(self, task: str, prompt: str, context: Optional[str] = None) -> Optional[Dict]:
+        """Send one prompt and return the submitted result dict, backing off on transient errors"""
+        response = self.client.messages.create(**self._params(task, prompt, context))
+        return _tool_input(task, response)
+    
+    def _cache_key(self, task: str, prompt: str, context: Optional[str] = None) -> str:
+        """Cache key for one prompt's result, covering the instructions, model and budget it runs with"""
+        return ResultCache.make_key('claude_analyzer_optimized', _RUBRIC_DIGEST,
+                                    self.model_map.get(task, self.model), _MAX_TOKENS[task],
+                                    context, prompt)
+    
+    def _cached_call(self, task: str, prompt: str, context: Optional[str] = None) -> Optional[Dict]:
+        """
+        Result dict for a prompt, served from the cache when the same prompt
+        was answered within the TTL; None if no usable result came back.
+        A prompt already in flight from another thread is awaited, not resent
+        """
+        cache_key = self._cache_key(task, prompt, context)
+        if self.cache is not None:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return _normalize(task, cached)
+        
+        with self._inflight_lock:
+            future = self._inflight.get(cache_key)
+            owner = future is None
+            if owner:
+                future = self._inflight[cache_key] = Future()
+        if not owner:
+            return future.result()
+        
+        try:
+            result = self._create(task, prompt, context)
+            # Only usable results are cached; a bad response is retried next time
+            if result and self.cache is not None:
+                self.cache.set(cache_key, result)
+            future.set_result(result)
+            return result
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._inflight_lock:
+                del self._inflight[cache_key]
+    
+    def analyze_stock_deep(self, stock_data: Dict, news_articles: List[Dict]) -> Dict:
+        """Perform comprehensive deep analysis"""
+        if self._skip_without_news(stock_data, news_articles):
+            logger.info("  ⏭ Skipping %s (no recent news)", stock_data['symbol'])
+            return _no_news_analyses()
+        
+        logger.info("  🤖 Claude analyzing %s...", stock_data['symbol'])
+        
+        context = self._prepare_stock_context(stock_data, _pack_news(news_articles))
+        
+        # The first four analyses are independent of each other, so run them concurrently
+        futures = {
+            'sentiment': _EXECUTOR.submit(self._analyze_sentiment, context, news_articles),
+            'catalysts': _EXECUTOR.submit(self._identify_catalysts, context, news_articles),
+            'risks': _EXECUTOR.submit(self._assess_risks, context, news_articles),
+            'thesis': _EXECUTOR.submit(self._generate_thesis, context, stock_data),
+        }
+        analyses = {name: future.result() for name, future in futures.items()}
+        analyses['recommendation'] = self._generate_recommendation(context, stock_data, analyses)
+        
+        return analyses
+    
+    def analyze_many(self, stocks: List[Dict], news_map: Dict[str, List[Dict]],
+                     concurrency: int = 8) -> Dict[str, Dict]:
+        """
+        Deep-analyze several stocks concurrently, at most `concurrency` at a time
+        Returns {symbol: analyses}, leaving out any stock whose analysis raised;
+        run comparative_ranking once on the results
+        """
+        results = {}
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='claude-stock') as pool:
+            futures = {
+                stock['symbol']: pool.submit(self.analyze_stock_deep, stock,
+                                             news_map.get(stock['symbol']) or [])
+                for stock in stocks
+            }
+            for symbol, future in futures.items():
+                try:
+                    results[symbol] = future.result()
+                except Exception as e:
+                    logger.error("  ⚠ Analysis failed for %s: %s", symbol, e)
+        return results
+    
+    def analyze_many_batched(self, stocks: List[Dict], news_map: Dict[str, List[Dict]],
+                             poll_interval: float = 30.0) -> Dict[str, Dict]:
+        """
+        Deep-analyze many stocks through the Message Batches API, for overnight
+        runs that can wait on results in exchange for half-price tokens
+        Runs two batches, since each recommendation needs that stock's other
+        four analyses; returns {symbol: analyses} like analyze_many
+        """
+        contexts = {}
+        analyses = {}
+        skipped = {}
+        jobs = []
+        for stock in stocks:
+            symbol = stock['symbol']
+            news_articles = news_map.get(symbol) or []
+            if self._skip_without_news(stock, news_articles):
+                skipped[symbol] = _no_news_analyses()
+                continue
+            contexts[symbol] = self._prepare_stock_context(stock, _pack_news(news_articles))
+            analyses[symbol] = {}
+            if news_articles:
+                jobs.append((symbol, 'sentiment', _SENTIMENT_PROMPT))
+            else:
+                analyses[symbol]['sentiment'] = _fallback('sentiment', 'No recent news.')
+            jobs.append((symbol, 'catalysts', _CATALYSTS_PROMPT))
+            jobs.append((symbol, 'risks', _RISKS_PROMPT))
+            jobs.append((symbol, 'thesis', _THESIS_PROMPT))
+        self._run_batch(jobs, contexts, analyses, poll_interval)
+        
+        jobs = [(symbol, 'recommendation', self._recommendation_prompt(results))
+                for symbol, results in analyses.items()]
+        self._run_batch(jobs, contexts, analyses, poll_interval)
+        
+        analyses.update(skipped)
+        return analyses
+    
+    def _skip_without_news(self, stock_data: Dict, news_articles: List[Dict]) -> bool:
+        """
+        True for a stock with no news and an unremarkable score: the catalyst,
+        risk and thesis calls would only restate the numbers already in hand
+        """
+        return (not news_articles and
+                stock_data.get('total_score', 0) < config.CLAUDE_NO_NEWS_MIN_SCORE)
+    
+    def _run_batch(self, jobs: List[tuple], contexts: Dict[str, str], analyses: Dict[str, Dict],
+                   poll_interval: float):
+        """
+        Answer (symbol, task, prompt) jobs with one message batch, filling analyses in place
+        Cached results are used directly and only the misses are submitted
+        """
+        pending = {}
+        for symbol, task, prompt in jobs:
+            cached = None
+            if self.cache is not None:
+                cached = self.cache.get(self._cache_key(task, prompt, contexts[symbol]))
+            if cached is not None:
+                analyses[symbol][task] = _normalize(task, cached)
+            else:
+                pending[f"req-{len(pending)}"] = (symbol, task, prompt)
+        if not pending:
+            return
+        
+        batch = self.client.messages.batches.create(requests=[
+            {"custom_id": custom_id, "params": self._params(task, prompt, contexts[symbol])}
+            for custom_id, (symbol, task, prompt) in pending.items()
+        ])
+        logger.info("  📦 Submitted batch %s (%d requests)", batch.id, len(pending))
+        while batch.processing_status != "ended":
+            time.sleep(poll_interval)
+            batch = self.client.messages.batches.retrieve(batch.id)
+        
+        for entry in self.client.messages.batches.results(batch.id):
+            symbol, task, prompt = pending.pop(entry.custom_id)
+            if entry.result.type != "succeeded":
+                logger.warning("    ⚠ %s %s request %s", symbol, task, entry.result.type)
+                analyses[symbol][task] = _fallback(task, 'Error.')
+                continue
+            result = _tool_input(task, entry.result.message)
+            if result and self.cache is not None:
+                self.cache.set(self._cache_key(task, prompt, contexts[symbol]), result)
+            analyses[symbol][task] = result if result else _fallback(task, 'Parse error.')
+        
+        # Anything the results stream did not include
+        for symbol, task, _ in pending.values():
+            analyses[symbol][task] = _fallback(task, 'Error.')
+    
+    def _prepare_stock_context(self, stock_data: Dict, news: List[Tuple[str, Optional[str]]]) -> str:
+        """Prepare stock context from the stock and its _pack_news() headlines"""
+        metrics = stock_data['metrics']
+        # Collect lines and join once at the end rather than growing one string
+        parts = [
+            f"Stock: {stock_data['symbol']} - {stock_data['company_name']}",
+            f"Sector: {stock_data['sector']} | Price: ${stock_data['price']:.2f} | Market Cap: ${stock_data.get('market_cap', 0):,.0f}",
+            "",
+            f"Technical Scores: Composite {stock_data['total_score']:.2f}/10, Momentum {stock_data['momentum_score']:.2f}/10, Volume {stock_data['volume_score']:.2f}/10",
+            f"Performance: Day {metrics['day_change_pct']:.2f}%, Week {metrics['week_change_pct']:.2f}%, Month {metrics['month_change_pct']:.2f}%",
+            f"Indicators: RSI {metrics['rsi_14']:.1f}, Volume {metrics['volume_ratio']:.2f}x avg",
+        ]
+
+        # Add fundamental data if available
+        if stock_data.get('financial_ratios'):
+            ratios = stock_data['financial_ratios']
+            parts.append("")
+            parts.append(f"Fundamentals: P/E {ratios.get('priceEarningsRatio', 'N/A')}, ROE {ratios.get('returnOnEquity', 'N/A')}, Debt/Equity {ratios.get('debtEquityRatio', 'N/A')}"
+                         f", Current Ratio {ratios.get('currentRatio', 'N/A')}, Net Margin {ratios.get('netProfitMargin', 'N/A')}")
+        
+        # Add short interest if available
+        if stock_data.get('short_interest_data'):
+            si = stock_data['short_interest_data']
+            short_pct = si.get('shortPercentOfFloat', 'N/A')
+            days_cover = si.get('daysaToCover', 'N/A')
+            parts.append(f"Short Interest: {short_pct}% of float, {days_cover} days to cover")
+        
+        # Add growth metrics if available
+        if stock_data.get('growth_metrics'):
+            growth = stock_data['growth_metrics']
+            rev_growth = growth.get('revenueGrowth', 'N/A')
+            eps_growth = growth.get('epsgrowth', 'N/A')
+            parts.append(f"Growth: Revenue {rev_growth}, EPS {eps_growth}")
+        
+        # Add options data if available
+        if stock_data.get('options_analysis'):
+            options = stock_data['options_analysis']
+            put_call = options.get('put_call_ratio', 'N/A')
+            iv = options.get('atm_implied_volatility', 'N/A')
+            if iv != 'N/A':
+                iv = f"{float(iv)*100:.1f}%" if isinstance(iv, (int, float)) else iv
+            total_vol = options.get('total_call_volume', 0) + options.get('total_put_volume', 0)
+            parts.append(f"Options: Put/Call {put_call}, IV {iv}, Volume {total_vol:,}")
+        
+        parts.append("")
+        parts.append("Recent News:")
+        
+        for i, (title, published) in enumerate(news, 1):
+            parts.append(f"{i}. {title} ({published})" if published else f"{i}. {title}")
+        
+        return "\n".join(parts)
+    
+    def _run_task(self, task: str, prompt: str, context: str) -> Dict:
+        """Result for one per-stock analysis, or its fallback when no usable answer comes back"""
+        try:
+            result = self._cached_call(task, prompt, context)
+            return result if result else _fallback(task, 'Parse error.')
+        except Exception as e:
+            logger.error("    ⚠ %s error: %s", task.capitalize(), e)
+            return _fallback(task, 'Error.')
+    
+    def _analyze_sentiment(self, context: str, news_articles: List[Dict]) -> Dict:
+        """Analyze sentiment optimized for short-term trading"""
+        if not news_articles:
+            return _fallback('sentiment', 'No recent news.')
+        return self._run_task('sentiment', _SENTIMENT_PROMPT, context)
+    
+    def _identify_catalysts(self, context: str, news_articles: List[Dict]) -> Dict:
+        """Identify catalysts with dates and impact"""
+        return self._run_task('catalysts', _CATALYSTS_PROMPT, context)
+    
+    def _assess_risks(self, context: str, news_articles: List[Dict]) -> Dict:
+        """Assess downside risks"""
+        return self._run_task('risks', _RISKS_PROMPT, context)
+    
+    def _generate_thesis(self, context: str, stock_data: Dict) -> Dict:
+        """Generate bull/bear thesis"""
+        return self._run_task('thesis', _THESIS_PROMPT, context)
+    
+    def _recommendation_prompt(self, analyses: Dict) -> str:
+        """Recommendation prompt built from the other four (normalized) analyses"""
+        thesis = analyses['thesis']
+        return _RECOMMENDATION_TMPL.format_map({
+            'sentiment_score': analyses['sentiment']['score'],
+            'catalyst_score': analyses['catalysts']['catalyst_score'],
+            'risk_score': analyses['risks']['overall_risk_score'],
+            'stronger_case': thesis['stronger_case'],
+            'conviction_level': thesis['conviction_level'],
+        })
+    
+    def _generate_recommendation(self, context: str, stock_data: Dict, analyses: Dict) -> Dict:
+        """Generate final recommendation"""
+        return self._run_task('recommendation', self._recommendation_prompt(analyses), context)
+    
+    def comparative_ranking(self, stocks_data: List[Dict]) -> Dict:
+        """Re-rank stocks based on all analysis"""
+        
+        logger.info("\n🤖 Claude performing comparative analysis on %d stocks...", len(stocks_data))
+        
+        # One pass pulls every field the table needs out of the nested analyses
+        rows = []
+        for stock in stocks_data:
+            ca = stock.get('claude_analysis', {})
+            rec = ca.get('recommendation', {})
+            rows.append((stock['symbol'], stock['total_score'],
+                         ca.get('sentiment', {}).get('score', 0),
+                         ca.get('catalysts', {}).get('catalyst_score', 0),
+                         ca.get('risks', {}).get('overall_risk_score', 0),
+                         rec.get('recommendation', 'Unknown'), rec.get('confidence', 'Unknown'),
+                         ca.get('thesis', {}).get('stronger_case', 'Unknown')))
+        
+        stocks_summary = "\n".join(
+            f"{i}. {symbol} - Quant: {quant:.2f}/10, Sentiment: {sentiment:.1f}/10, Catalyst: {catalyst:.1f}/10, Risk: {risk:.1f}/10\n"
+            f"   Rec: {recommendation} ({confidence}), Case: {case}"
+            for i, (symbol, quant, sentiment, catalyst, risk, recommendation, confidence, case) in enumerate(rows, 1)
+        )
+        # The table has always opened with a blank line; keep it so the prompt is unchanged
+        prompt = _RANKING_TMPL.format_map({'stocks_summary': "\n" + stocks_summary})
+
         try:
-            response = self.client.messages.create(model=self.model, max_tokens=3500, temperature=0.3,
-                                                   messages=[{"role": "user", "content": prompt}])
-            result = self._extract_json(response.content[0].text)
+            result = self._cached_call('ranking', prompt)
             return result if result else {'top_5': [], 'avoid': [], 'market_outlook': 'Parse error.'}
         except Exception as e:
-            print(f"  ⚠ Comparative error: {e}")
+            logger.error("  ⚠ Comparative error: %s", e)
             return {'top_5': [], 'avoid': [], 'market_outlook': 'Error.'}
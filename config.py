@@ -42,6 +42,11 @@ POLYGON_RATE_LIMIT = {
     'delay_between_requests': 0.01  # Seconds between requests (1/100)
 }
 
+CLAUDE_RATE_LIMIT = {
+    'tokens_per_minute': 40000,   # Set to your Anthropic tier's token limit
+    'burst_tokens': 10000,        # Tokens that may be spent at once before pacing starts
+}
+
 # ============================================================================
 # ANALYSIS CONFIGURATION v4.0
 # ============================================================================
@@ -389,6 +394,20 @@ ENABLE_DEEP_ANALYSIS = False  # Set to True to enable by default (or use --deep-
 # Output directory for reports
 OUTPUT_DIR = 'output'
 
+# Persistent score cache (skips re-scoring when a ticker's inputs are unchanged)
+SCORE_CACHE_CONFIG = {
+    'enabled': True,
+    'path': 'data/score_cache.bin',
+    'max_records': 200000,   # Compacted on load beyond this
+}
+
+# Claude result cache (skips repeat API calls when the prompt inputs are unchanged)
+CLAUDE_CACHE_CONFIG = {
+    'enabled': True,
+    'db_path': 'data/claude_cache.db',
+    'ttl_hours': 24,
+}
+
 # Top N stocks to report
 TOP_N_STOCKS = 20
 
@@ -397,9 +416,12 @@ CLAUDE_MODEL = 'claude-sonnet-4-20250514'  # Or 'claude-opus-4-20250514' for bes
 
 # Claude API Settings
 CLAUDE_MODEL = 'claude-opus-4-20250514'  # Best for options strategies
+CLAUDE_MODEL_LIGHT = 'claude-3-5-haiku-20241022'  # Summary stages (recommendation, ranking)
+CLAUDE_NO_NEWS_MIN_SCORE = 7.0  # Stocks with no news get a full Claude analysis only at or above this score
 
 # Options analysis toggle
 ENABLE_OPTIONS_ANALYSIS = True  # Set to False to skip options analysis
+OPTIONS_STRATEGY_MIN_VOLUME = 500  # Skip Claude options strategies below this daily call+put volume
 
 # Deep analysis settings
 DEEP_ANALYSIS_TOP_N = 10  # Analyze top N stocks with Claude
@@ -10,6 +10,23 @@ from typing import Dict, List, Optional
 import os
 
 
+def _json_default(o):
+    """NumPy scalars as Python numbers; anything else unserializable (dates, Decimals) as text"""
+    return o.item() if hasattr(o, 'item') else str(o)
+
+
+# orjson serializes several times faster and handles NumPy scalars/arrays natively
+try:
+    import orjson
+    
+    def _dumps(obj) -> str:
+        return orjson.dumps(obj, default=_json_default,
+                            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS).decode()
+except ImportError:
+    def _dumps(obj) -> str:
+        return json.dumps(obj, default=_json_default)
+
+
 class DataCollector:
     """Collects and stores analysis data for backtesting"""
     
@@ -347,17 +364,17 @@ class DataCollector:
             sentiment.get('sentiment_momentum'),
             
             catalysts.get('catalyst_score'),
-            json.dumps(catalysts.get('upcoming_catalysts', [])),
+            _dumps(catalysts.get('upcoming_catalysts', [])),
             
             risks.get('overall_risk_score'),
             risks.get('risk_label'),
-            json.dumps(risks.get('red_flags', [])),
+            _dumps(risks.get('red_flags', [])),
             
             thesis.get('stronger_case'),
             thesis.get('conviction_level'),
             thesis.get('risk_reward_ratio'),
-            json.dumps(thesis.get('bull_case', [])),
-            json.dumps(thesis.get('bear_case', [])),
+            _dumps(thesis.get('bull_case', [])),
+            _dumps(thesis.get('bear_case', [])),
             
             recommendation.get('recommendation'),
             recommendation.get('confidence'),
@@ -365,7 +382,7 @@ class DataCollector:
             recommendation.get('time_horizon'),
             
             1 if options_strats.get('strategies') else 0,
-            json.dumps(options_strats.get('strategies', [])),
+            _dumps(options_strats.get('strategies', [])),
             
             datetime.now().isoformat()
         ))
@@ -0,0 +1,335 @@
+"""
+Indicator Kernels - JIT-compiled inner loops for the stock analyzer
+Numba is optional: without it the same kernels run as plain Python
+"""
+
+import numpy as np
+
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    prange = range
+
+    def njit(*args, **kwargs):
+        """Stand-in for numba.njit when numba is not installed"""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+
+
+# ============================================================================
+# MOVING AVERAGES
+# ============================================================================
+
+@njit(cache=True, fastmath=True)
+def ema_loop(data, period):
+    """EMA recurrence seeded with the SMA of the first `period` bars"""
+    n = len(data)
+    ema = np.zeros(n)
+    multiplier = 2.0 / (period + 1)
+
+    seed = 0.0
+    for i in range(period):
+        seed += data[i]
+    ema[period - 1] = seed / period
+
+    for i in range(period, n):
+        ema[i] = (data[i] - ema[i - 1]) * multiplier + ema[i - 1]
+
+    return ema[period - 1:]
+
+
+@njit(cache=True, fastmath=True)
+def ema_multi(data, periods):
+    """
+    Several EMAs in a single pass over `data`
+    Row k holds the EMA for periods[k], valid from index periods[k]-1 on
+    """
+    n = len(data)
+    k_count = len(periods)
+    out = np.zeros((k_count, n))
+
+    running_sum = 0.0
+    for i in range(n):
+        running_sum += data[i]
+        for k in range(k_count):
+            period = periods[k]
+            if i == period - 1:
+                out[k, i] = running_sum / period
+            elif i >= period:
+                multiplier = 2.0 / (period + 1)
+                out[k, i] = (data[i] - out[k, i - 1]) * multiplier + out[k, i - 1]
+
+    return out
+
+
+# ============================================================================
+# OSCILLATORS
+# ============================================================================
+
+@njit(cache=True)
+def rsi_loop(gains, losses, period):
+    """Wilder-smoothed RSI over precomputed per-bar gains and losses"""
+    n = len(gains)
+    rsi = np.zeros(n + 1)
+    rsi[:period] = 50  # Default value
+
+    avg_gain = 0.0
+    avg_loss = 0.0
+    for i in range(period):
+        avg_gain += gains[i]
+        avg_loss += losses[i]
+    avg_gain /= period
+    avg_loss /= period
+
+    for i in range(period, n):
+        avg_gain = (avg_gain * (period - 1) + gains[i]) / period
+        avg_loss = (avg_loss * (period - 1) + losses[i]) / period
+
+        if avg_loss == 0:
+            rsi[i + 1] = 100
+        else:
+            rs = avg_gain / avg_loss
+            rsi[i + 1] = 100 - (100 / (1 + rs))
+
+    return rsi
+
+
+# ============================================================================
+# VOLATILITY
+# ============================================================================
+
+@njit(cache=True, fastmath=True)
+def atr_loop(highs, lows, closes, period):
+    """
+    True range and Wilder-smoothed ATR fused into a single pass
+    Returns len(closes) - period values, the first seeded with the mean TR
+    """
+    n = len(closes)
+    atr = np.empty(n - period)
+
+    seed = 0.0
+    for i in range(1, n):
+        high = highs[i]
+        low = lows[i]
+        prev_close = closes[i - 1]
+        tr = max(high - low, abs(high - prev_close), abs(low - prev_close))
+
+        if i < period:
+            seed += tr
+        elif i == period:
+            atr[0] = (seed + tr) / period
+        else:
+            atr[i - period] = (atr[i - period - 1] * (period - 1) + tr) / period
+
+    return atr
+
+
+@njit(cache=True)
+def bb_percentiles(bb_width, lookback):
+    """
+    Percentile rank of today's BB width and of the width `lookback` bars ago,
+    each against the bars before it, in one pass over the series
+    """
+    n = len(bb_width)
+    today = bb_width[n - 1]
+    prior_idx = n - lookback - 1
+    prior = bb_width[prior_idx]
+
+    below_today = 0
+    below_prior = 0
+    for i in range(n - 1):
+        value = bb_width[i]
+        if value < today:
+            below_today += 1
+        if i < prior_idx and value < prior:
+            below_prior += 1
+
+    pct_today = below_today / (n - 1) * 100
+    pct_prior = below_prior / prior_idx * 100 if prior_idx > 0 else 50.0
+    return pct_today, pct_prior
+
+
+def true_range(highs, lows, closes):
+    """True range using one scratch buffer and in-place ufuncs"""
+    tr = np.subtract(highs[1:], lows[1:])
+    tmp = np.subtract(highs[1:], closes[:-1])
+    np.abs(tmp, out=tmp)
+    np.fmax(tr, tmp, out=tr)
+
+    np.subtract(lows[1:], closes[:-1], out=tmp)
+    np.abs(tmp, out=tmp)
+    np.fmax(tr, tmp, out=tr)
+    return tr
+
+
+def atr_numpy(highs, lows, closes, period):
+    """
+    ATR for interpreters without numba, same output as atr_loop
+    Vectorized true range, then the Wilder recurrence over plain floats
+    """
+    tr = true_range(highs, lows, closes)
+    atr = np.empty(len(tr) - period + 1)
+
+    prev = tr[:period].mean()
+    atr[0] = prev
+    for i, value in enumerate(tr[period:].tolist(), 1):
+        prev = (prev * (period - 1) + value) / period
+        atr[i] = prev
+
+    return atr
+
+
+# ============================================================================
+# SCORING
+# ============================================================================
+
+@njit(cache=True)
+def percentile_lookup(value, refs):
+    """
+    0-100 rank of value against sorted reference points, linearly
+    interpolated between the bracketing pair; NaN maps to the neutral 50
+    """
+    m = len(refs)
+    if value != value:
+        return 50.0
+    if value <= refs[0]:
+        return 0.0
+    if value >= refs[m - 1]:
+        return 100.0
+
+    i = np.searchsorted(refs, value) - 1
+    pct_lower = (i / (m - 1)) * 100
+    pct_upper = ((i + 1) / (m - 1)) * 100
+
+    ratio = (value - refs[i]) / (refs[i + 1] - refs[i])
+    return pct_lower + (pct_upper - pct_lower) * ratio
+
+
+# ============================================================================
+# FUSED BUNDLE
+# ============================================================================
+
+@njit(cache=True)
+def compute_indicators(highs, lows, closes, volumes, ema_periods, rsi_period,
+                       atr_period, bb_period, bb_std, vwap_period):
+    """
+    Every per-ticker indicator in a single pass over the OHLCV columns
+    Returns (emas, rsi, atr, bb_width, vwap) laid out like ema_multi,
+    rsi_loop, atr_loop, the analyzer's BB width and its trailing VWAP
+    """
+    n = len(closes)
+    k_count = len(ema_periods)
+    emas = np.zeros((k_count, n))
+    rsi = np.zeros(n)
+    rsi[:rsi_period] = 50
+    atr = np.zeros(max(n - atr_period, 0))
+    bb_width = np.zeros(max(n - bb_period + 1, 0))
+
+    running_sum = 0.0
+    tr_seed = 0.0
+    avg_gain = 0.0
+    avg_loss = 0.0
+    pv_sum = 0.0
+    vol_sum = 0.0
+    vwap_start = n - min(vwap_period, n)
+
+    for i in range(n):
+        close = closes[i]
+        high = highs[i]
+        low = lows[i]
+
+        # EMAs, seeded with the SMA of their first `period` bars
+        running_sum += close
+        for k in range(k_count):
+            period = ema_periods[k]
+            if i == period - 1:
+                emas[k, i] = running_sum / period
+            elif i >= period:
+                multiplier = 2.0 / (period + 1)
+                emas[k, i] = (close - emas[k, i - 1]) * multiplier + emas[k, i - 1]
+
+        if i > 0:
+            prev_close = closes[i - 1]
+
+            # Wilder ATR over the true range
+            tr = max(high - low, abs(high - prev_close), abs(low - prev_close))
+            if i < atr_period:
+                tr_seed += tr
+            elif i == atr_period:
+                atr[0] = (tr_seed + tr) / atr_period
+            else:
+                atr[i - atr_period] = (atr[i - atr_period - 1] * (atr_period - 1) + tr) / atr_period
+
+            # Wilder RSI over close-to-close gains and losses
+            delta = close - prev_close
+            gain = delta if delta > 0 else 0.0
+            loss = -delta if delta < 0 else 0.0
+            if i <= rsi_period:
+                avg_gain += gain
+                avg_loss += loss
+                if i == rsi_period:
+                    avg_gain /= rsi_period
+                    avg_loss /= rsi_period
+            else:
+                avg_gain = (avg_gain * (rsi_period - 1) + gain) / rsi_period
+                avg_loss = (avg_loss * (rsi_period - 1) + loss) / rsi_period
+                if avg_loss == 0:
+                    rsi[i] = 100
+                else:
+                    rsi[i] = 100 - (100 / (1 + avg_gain / avg_loss))
+
+        # Bollinger Band width of the window ending here (window is cache-resident)
+        if i >= bb_period - 1:
+            start = i - bb_period + 1
+            mean = 0.0
+            for j in range(start, i + 1):
+                mean += closes[j]
+            mean /= bb_period
+            var = 0.0
+            for j in range(start, i + 1):
+                var += (closes[j] - mean) ** 2
+            std = np.sqrt(var / bb_period)
+            bb_width[start] = (2 * bb_std * std / mean) * 100 if mean > 0 else 0.0
+
+        # Trailing VWAP
+        if i >= vwap_start:
+            pv_sum += (high + low + close) / 3 * volumes[i]
+            vol_sum += volumes[i]
+
+    vwap = pv_sum / vol_sum if vol_sum > 0 else np.nan
+    return emas, rsi, atr, bb_width, vwap
+
+
+# ============================================================================
+# UNIVERSE BATCH
+# ============================================================================
+
+@njit(cache=True, parallel=True)
+def universe_indicators(highs, lows, closes, volumes, bar_counts, ema_periods, rsi_period,
+                        atr_period, bb_period, bb_std, vwap_period):
+    """
+    compute_indicators for every ticker of padded (n_tickers, max_bars) matrices
+    Row t holds bar_counts[t] valid bars, left-aligned; tickers run in parallel
+    """
+    n_tickers, max_bars = closes.shape
+    emas = np.zeros((n_tickers, len(ema_periods), max_bars))
+    rsis = np.zeros((n_tickers, max_bars))
+    atrs = np.zeros((n_tickers, max_bars))
+    bb_widths = np.zeros((n_tickers, max_bars))
+    vwaps = np.zeros(n_tickers)
+
+    for t in prange(n_tickers):
+        n = bar_counts[t]
+        e, r, a, b, v = compute_indicators(highs[t, :n], lows[t, :n], closes[t, :n],
+                                           volumes[t, :n], ema_periods, rsi_period,
+                                           atr_period, bb_period, bb_std, vwap_period)
+        emas[t, :, :n] = e
+        rsis[t, :n] = r
+        atrs[t, :len(a)] = a
+        bb_widths[t, :len(b)] = b
+        vwaps[t] = v
+
+    return emas, rsis, atrs, bb_widths, vwaps
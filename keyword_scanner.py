@@ -0,0 +1,55 @@
+"""
+Keyword Scanner - single-pass multi-keyword matching for news text
+Uses an Aho-Corasick automaton when pyahocorasick is installed
+"""
+
+from typing import Dict, List, Set
+
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+
+class KeywordScanner:
+    """
+    Match several keyword buckets against a text in one scan
+
+    Keywords are matched case-insensitively as substrings, and a keyword may
+    belong to more than one bucket. scan() returns, per bucket, the set of
+    distinct keywords found in the text.
+    """
+
+    def __init__(self, buckets: Dict[str, List[str]]):
+        self.bucket_names = list(buckets)
+
+        # keyword -> names of the buckets it belongs to
+        self._keywords = {}
+        for name, words in buckets.items():
+            for word in words:
+                self._keywords.setdefault(word.lower(), []).append(name)
+
+        self._automaton = None
+        if AHOCORASICK_AVAILABLE and self._keywords:
+            automaton = ahocorasick.Automaton()
+            for word, names in self._keywords.items():
+                automaton.add_word(word, (word, tuple(names)))
+            automaton.make_automaton()
+            self._automaton = automaton
+
+    def scan(self, text: str) -> Dict[str, Set[str]]:
+        """Return {bucket: keywords found} for an already lower-cased text"""
+        found = {name: set() for name in self.bucket_names}
+
+        if self._automaton is not None:
+            for _, (word, names) in self._automaton.iter(text):
+                for name in names:
+                    found[name].add(word)
+        else:
+            for word, names in self._keywords.items():
+                if word in text:
+                    for name in names:
+                        found[name].add(word)
+
+        return found
@@ -0,0 +1,90 @@
+"""
+LLM Result Cache - on-disk cache for Claude analysis results
+Skips paid API calls when a stock's prompt inputs have not changed
+"""
+
+import sqlite3
+import json
+import hashlib
+import time
+from typing import Dict, Optional
+import os
+
+import config
+
+# Cached results are multi-KB JSON blobs; orjson (de)serializes them several times faster
+try:
+    import orjson
+    
+    def _dumps(obj) -> str:
+        return orjson.dumps(obj, default=str).decode()
+    
+    _loads = orjson.loads
+except ImportError:
+    def _dumps(obj) -> str:
+        return json.dumps(obj, default=str)
+    
+    _loads = json.loads
+
+
+class ResultCache:
+    """SQLite-backed key -> JSON result store with a time-to-live"""
+
+    def __init__(self, db_path: str = None, ttl_hours: float = None):
+        """Initialize cache database"""
+        cfg = config.CLAUDE_CACHE_CONFIG
+        self.db_path = db_path or cfg['db_path']
+        self.ttl_seconds = (ttl_hours if ttl_hours is not None else cfg['ttl_hours']) * 3600
+
+        # Create data directory if it doesn't exist
+        os.makedirs(os.path.dirname(self.db_path) or '.', exist_ok=True)
+
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS llm_results (
+                cache_key TEXT PRIMARY KEY,
+                created_at REAL NOT NULL,
+                result TEXT NOT NULL
+            )
+        """)
+        conn.commit()
+        conn.close()
+
+    @staticmethod
+    def make_key(*parts) -> str:
+        """Stable hex key for any JSON-serializable inputs"""
+        payload = json.dumps(parts, sort_keys=True, default=str).encode('utf-8')
+        return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Cached result for key, or None if missing or expired"""
+        conn = sqlite3.connect(self.db_path)
+        row = conn.execute(
+            "SELECT created_at, result FROM llm_results WHERE cache_key = ?", (key,)
+        ).fetchone()
+        conn.close()
+
+        if row is None or time.time() - row[0] > self.ttl_seconds:
+            return None
+        return _loads(row[1])
+
+    def set(self, key: str, result: Dict):
+        """Store a result under key, replacing any older entry"""
+        conn = sqlite3.connect(self.db_path)
+        conn.execute(
+            "INSERT OR REPLACE INTO llm_results (cache_key, created_at, result) VALUES (?, ?, ?)",
+            (key, time.time(), _dumps(result))
+        )
+        conn.commit()
+        conn.close()
+
+    def purge_expired(self) -> int:
+        """Delete expired entries and return how many were removed"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.execute(
+            "DELETE FROM llm_results WHERE created_at < ?", (time.time() - self.ttl_seconds,)
+        )
+        removed = cursor.rowcount
+        conn.commit()
+        conn.close()
+        return removed
@@ -0,0 +1,40 @@
+"""
+Logging Utilities - non-blocking console logging for hot paths
+Records are queued and written to the console by a background listener thread
+"""
+
+import atexit
+import logging
+import logging.handlers
+import queue
+import sys
+
+_listener = None
+
+
+def _start_listener():
+    """Route the 'stocks' logger through a queue drained by a background thread"""
+    global _listener
+
+    # Plain message format, so output reads the same as the prints it replaces
+    console = logging.StreamHandler(sys.stdout)
+    console.setFormatter(logging.Formatter('%(message)s'))
+
+    log_queue = queue.Queue(-1)
+    root = logging.getLogger('stocks')
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    root.setLevel(logging.INFO)
+    root.propagate = False
+
+    _listener = logging.handlers.QueueListener(log_queue, console)
+    _listener.start()
+
+    # Flush anything still queued before the interpreter exits
+    atexit.register(_listener.stop)
+
+
+def get_logger(name: str) -> logging.Logger:
+    """Logger under the shared 'stocks' hierarchy, starting the listener on first use"""
+    if _listener is None:
+        _start_listener()
+    return logging.getLogger(f'stocks.{name}')
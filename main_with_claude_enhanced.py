@@ -11,6 +11,7 @@ Usage:
 import sys
 import os
 from datetime import datetime
+from itertools import count
 from typing import List
 import config
 from fmp_client import DataClient
@@ -68,7 +69,8 @@ def main():
             from claude_analyzer_enhanced import ClaudeAnalyzer  # Use enhanced version
             claude_analyzer = ClaudeAnalyzer(
                 api_key=config.CLAUDE_API_KEY,
-                model=config.CLAUDE_MODEL
+                model=config.CLAUDE_MODEL,
+                model_light=config.CLAUDE_MODEL_LIGHT
             )
             print(f"âœ… Claude API initialized (Model: {config.CLAUDE_MODEL})")
             print(f"âœ… Will analyze top stocks deeply with options strategies\n")
@@ -195,16 +197,19 @@ def main():
         print(f"\nAnalyzing top {len(deep_analysis_stocks)} stocks with Claude...")
         print("This may take a few minutes...\n")
         
-        for i, stock in enumerate(deep_analysis_stocks, 1):
-            print(f"[{i}/{len(deep_analysis_stocks)}] {stock['symbol']}")
-            
-            # Get full news for Claude
-            news = client.get_stock_news(stock['symbol'], limit=10)
-            
-            # Perform deep analysis
-            claude_analysis = claude_analyzer.analyze_stock_deep(stock, news or [])
+        # Get full news for Claude
+        news_map = {stock['symbol']: client.get_stock_news(stock['symbol'], limit=10)
+                    for stock in deep_analysis_stocks}
+        
+        # Perform deep analysis, several stocks at a time, reporting each as it finishes
+        stocks_by_symbol = {stock['symbol']: stock for stock in deep_analysis_stocks}
+        progress = count(1)
+        
+        def record_analysis(symbol, claude_analysis):
+            print(f"[{next(progress)}/{len(deep_analysis_stocks)}] {symbol}")
             
             # Add Claude's analysis to stock data
+            stock = stocks_by_symbol[symbol]
             stock['claude_analysis'] = claude_analysis
             
             # Log Claude analysis to database
@@ -221,6 +226,8 @@ def main():
                 print(f"  ðŸ“ˆ Options Strategies: {len(options['strategies'])} strategies generated")
             print()
         
+        claude_analyzer.analyze_many(deep_analysis_stocks, news_map, on_done=record_analysis)
+        
         # Comparative ranking
         print("=" * 80)
         print("PHASE 4: COMPARATIVE ANALYSIS")
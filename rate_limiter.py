@@ -0,0 +1,37 @@
+"""
+Rate Limiter - token bucket for API throughput limits
+Paces requests to stay under a tokens-per-minute budget instead of hitting 429s
+"""
+
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket refilled at a steady per-minute rate
+
+    acquire() deducts the requested tokens immediately and sleeps for however
+    long the bucket is overdrawn, so concurrent callers queue up in order
+    rather than racing for the same refill.
+    """
+
+    def __init__(self, tokens_per_minute: float, burst: float):
+        self.rate = tokens_per_minute / 60.0
+        self.capacity = float(burst)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float):
+        """Block until `tokens` fit within the rate (requests above burst are capped at burst)"""
+        tokens = min(tokens, self.capacity)
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= tokens
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+        if wait > 0:
+            time.sleep(wait)
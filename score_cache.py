@@ -0,0 +1,193 @@
+"""
+Score Cache - persist per-ticker scores between runs
+Append-only file of fixed-layout records, read back through np.memmap
+"""
+
+import os
+import hashlib
+import tempfile
+import time
+from datetime import date
+from typing import Dict, Optional
+
+import numpy as np
+import config
+
+# Order of the score columns inside each record
+SCORE_FIELDS = [
+    'momentum_score', 'volume_score', 'technical_score', 'volatility_score',
+    'relative_strength_score', 'catalyst_score', 'fundamental_quality_score',
+    'short_interest_score', 'growth_score', 'options_score', 'composite_score',
+]
+
+RECORD_DTYPE = np.dtype([
+    ('key', '<u8'),
+    ('scores', '<f8', (len(SCORE_FIELDS),)),
+])
+
+# A compaction lock older than this was left by a crashed process and is taken over
+LOCK_STALE_SECONDS = 60
+# How long an append waits for another process's compaction to finish
+LOCK_WAIT_SECONDS = 5
+
+
+def scoring_digest(analysis_config: Dict, percentile_refs: Dict) -> str:
+    """
+    Digest of the scoring configuration: weights, reference points and thresholds
+    Callables in the config (validation helpers) are skipped, since their repr
+    holds a memory address that changes every run
+    """
+    settings = {k: v for k, v in analysis_config.items() if not callable(v)}
+    return hashlib.blake2b(repr((settings, percentile_refs)).encode('utf-8'),
+                           digest_size=8).hexdigest()
+
+
+def score_key(data: Dict, config_digest: str = '') -> Optional[int]:
+    """
+    64-bit key for a stock's scoring inputs, or None if it has no symbol
+    Covers the latest bar plus every non-price input the scores read,
+    today's date (the earnings window depends on it) and the scoring_digest()
+    of the configuration, so retuned weights never reuse stale scores
+    """
+    symbol = data.get('symbol')
+    hist = data.get('historical')
+    if not symbol or not hist:
+        return None
+
+    first, last = hist[0], hist[-1]
+    spy = data.get('spy_data') or [{}]
+    sector = data.get('sector_data') or [{}]
+    news = [(a.get('title', ''), a.get('text', '')) for a in data.get('news') or []]
+
+    h = hashlib.blake2b(digest_size=8)
+    h.update(repr((
+        symbol, date.today().isoformat(), config_digest,
+        len(hist), first.get('date'), last.get('date'), last.get('close'),
+        spy[-1].get('date'), spy[-1].get('close'),
+        sector[-1].get('date'), sector[-1].get('close'),
+        news,
+        (data.get('profile') or {}).get('next_earnings_date'),
+        data.get('financials'), data.get('short_interest'),
+        data.get('growth_metrics'), data.get('options_analysis'),
+    )).encode('utf-8'))
+    return int.from_bytes(h.digest(), 'little')
+
+
+class ScoreCache:
+    """Disk-backed map of score_key -> score record"""
+
+    def __init__(self, path: str = None, max_records: int = None):
+        cfg = config.SCORE_CACHE_CONFIG
+        self.path = path or cfg['path']
+        self.max_records = max_records or cfg['max_records']
+
+        self._lock_path = self.path + '.lock'
+        self._records = np.empty(0, dtype=RECORD_DTYPE)
+        self._index = {}    # key -> row in self._records
+        self._pending = {}  # key -> scores written since the file was mapped
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._load()
+
+    def _load(self):
+        """Map the record file and index it (later records win)"""
+        if not os.path.exists(self.path):
+            return
+
+        size = os.path.getsize(self.path)
+        if size % RECORD_DTYPE.itemsize or size // RECORD_DTYPE.itemsize > self.max_records:
+            self._compact()
+
+        count = os.path.getsize(self.path) // RECORD_DTYPE.itemsize
+        if count == 0:
+            return
+        records = np.memmap(self.path, dtype=RECORD_DTYPE, mode='r', shape=(count,))
+        self._records = records
+        self._index = {int(k): i for i, k in enumerate(records['key'])}
+
+    def _compact(self):
+        """
+        Drop a partial record left by an interrupted write and, past max_records,
+        rewrite the file with only the newest record per key, trimmed to half capacity
+
+        Runs under a lock file so only one process rewrites at a time. The file is
+        read afresh under the lock, and appends in other processes wait while it is
+        held, so their records are not dropped by the replace.
+        The rewrite goes to a unique temp file that replaces the original in one step;
+        if the replace is refused (Windows, while another process has the file
+        mapped) the file is left as is and compaction is retried on a later load
+        """
+        if not self._acquire_lock():
+            return  # Another process is already compacting
+        try:
+            size = os.path.getsize(self.path)
+            count = size // RECORD_DTYPE.itemsize
+            if size % RECORD_DTYPE.itemsize:
+                with open(self.path, 'r+b') as f:
+                    f.truncate(count * RECORD_DTYPE.itemsize)
+            if count <= self.max_records:
+                return
+
+            records = np.fromfile(self.path, dtype=RECORD_DTYPE, count=count)
+            index = {int(k): i for i, k in enumerate(records['key'])}
+            rows = sorted(index.values())[-(self.max_records // 2):]
+
+            directory = os.path.dirname(self.path) or '.'
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(self.path) + '.',
+                                            suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    records[rows].tofile(f)
+                os.replace(tmp_path, self.path)
+            except OSError:
+                os.remove(tmp_path)
+        finally:
+            os.remove(self._lock_path)
+
+    def _acquire_lock(self) -> bool:
+        """Create the compaction lock file; False if another live process holds it"""
+        for _ in range(2):
+            try:
+                os.close(os.open(self._lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                return True
+            except FileExistsError:
+                try:
+                    if time.time() - os.path.getmtime(self._lock_path) < LOCK_STALE_SECONDS:
+                        return False
+                    os.remove(self._lock_path)
+                except FileNotFoundError:
+                    pass  # Released in the meantime; try again
+        return False
+
+    def get(self, key: int) -> Optional[Dict[str, float]]:
+        """Cached scores for a key, or None on a miss"""
+        scores = self._pending.get(key)
+        if scores is None:
+            row = self._index.get(key)
+            if row is None:
+                return None
+            scores = self._records['scores'][row]
+        return dict(zip(SCORE_FIELDS, scores.tolist()))
+
+    def put(self, key: int, scores: Dict):
+        """Append a record for key"""
+        record = np.zeros(1, dtype=RECORD_DTYPE)
+        record['key'] = key
+        record['scores'][0] = [scores[f] for f in SCORE_FIELDS]
+
+        # Let a compaction in another process finish, so the append lands in the new file
+        deadline = time.monotonic() + LOCK_WAIT_SECONDS
+        while os.path.exists(self._lock_path) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        with open(self.path, 'ab') as f:
+            f.write(record.tobytes())
+        self._pending[key] = record['scores'][0]
+
+    def records(self) -> np.ndarray:
+        """All records mapped at load time, for bulk reads"""
+        return self._records
+
+    def __len__(self) -> int:
+        return len(self._index.keys() | self._pending.keys())
@@ -91,7 +91,8 @@ def main():
             print("ERROR: Set CLAUDE_API_KEY in .env")
             return
         from claude_analyzer_enhanced import ClaudeAnalyzer
-        claude = ClaudeAnalyzer(api_key=config.CLAUDE_API_KEY, model=config.CLAUDE_MODEL)
+        claude = ClaudeAnalyzer(api_key=config.CLAUDE_API_KEY, model=config.CLAUDE_MODEL,
+                                model_light=config.CLAUDE_MODEL_LIGHT)
         print(f"Claude initialized: {config.CLAUDE_MODEL}")
     
     print("="*80)